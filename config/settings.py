@@ -18,6 +18,26 @@ PROCESSED_DATA_DIR = DATA_DIR / "processed"
 EXTERNAL_DATA_DIR = DATA_DIR / "external"
 TEMP_DIR = Path(os.environ.get("TEMP_DIR", "/tmp/cats_dogs"))
 
+## Préparation et validation des images avant entraînement (incrémentale : manifeste des fichiers déjà vérifiés)
+PREPROCESSING_CONFIG = {
+    "workers": int(os.getenv('PREPROCESSING_WORKERS', os.cpu_count() or 1)), # Processus de validation en parallèle
+    "manifest_path": Path(os.getenv('IMAGE_MANIFEST_PATH', PROCESSED_DATA_DIR / "image_manifest.json")),
+    "quarantine_dir": Path(os.getenv('IMAGE_QUARANTINE_DIR', DATA_DIR / "quarantine")), # Images invalides déplacées ici
+    "staging_mode": os.getenv('DATA_STAGING_MODE', 'auto'), # Répertoire de travail : auto, hardlink, symlink ou copy
+}
+
+## Données d'entraînement : shards .npy prétraités (décodage JPEG une seule fois) ou lecture du répertoire
+TRAINING_DATA_CONFIG = {
+    "source": os.getenv('TRAINING_DATA_SOURCE', 'directory'), # 'directory' (PetImages extrait) ou 'archive' (zip lu sans extraction)
+    "archive_path": Path(os.getenv('DATA_ARCHIVE_PATH', RAW_DATA_DIR / "kagglecatsanddogs_5340.zip")),
+    "format": os.getenv('TRAINING_DATA_FORMAT', 'shards'), # 'shards' ou 'directory' (image_dataset_from_directory)
+    "shards_dir": Path(os.getenv('TRAINING_SHARDS_DIR', PROCESSED_DATA_DIR / "shards")), # Un sous-dossier par version du contenu
+    "shard_size": int(os.getenv('TRAINING_SHARD_SIZE', 1024)), # Images par shard (~48 Mo en 128×128)
+    "validation_split": 0.2,
+    "seed": 1337,
+    "parallel_shards": int(os.getenv('TRAINING_PARALLEL_SHARDS', 4)), # Shards lus simultanément (interleave)
+}
+
 # Base de données
 ## Récupération des variables d'environnement et Construction de l'URL PostgreSQL
 DB_HOST = os.getenv('DB_HOST')
@@ -30,6 +50,99 @@ DB_URL = f"postgresql://{DB_USER}:{DB_PWD_ENCODED}@{DB_HOST}:{DB_PORT}/{DB_NAME}
 DB_URL_MASKED = DB_URL.replace(DB_PWD_ENCODED, '***') if DB_PWD_ENCODED else DB_URL # Masquage du mdp dans l'URL (sert uniquement pour l'affichage dans le terminal, de manière sécurisée)
 DB_TABLE_MONITORING = os.getenv('DB_TABLE_MONITORING')
 
+## Pool de connexions SQLAlchemy (base principale et réplica)
+## Connexions simultanées max = pool_size + max_overflow ; au-delà, attente jusqu'à pool_timeout
+DB_POOL_CONFIG = {
+    "pool_size": int(os.getenv('DB_POOL_SIZE', 5)), # Connexions gardées ouvertes en permanence
+    "max_overflow": int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)), # Connexions supplémentaires ouvertes lors des pics
+    "pool_timeout": float(os.getenv('DB_POOL_TIMEOUT', 30)), # Secondes d'attente d'une connexion libre avant erreur
+    "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', 1800)), # Renouvellement des connexions plus anciennes (secondes, -1 = jamais)
+    "pool_pre_ping": os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true', # Vérifier la connexion avant utilisation
+}
+
+## Instrumentation des requêtes SQL (latence par requête, journal des requêtes lentes)
+QUERY_MONITOR_CONFIG = {
+    "slow_query_ms": float(os.getenv('DB_SLOW_QUERY_MS', 200)), # Seuil du journal des requêtes lentes
+    "slow_log_size": int(os.getenv('DB_SLOW_QUERY_LOG_SIZE', 100)), # Dernières requêtes lentes conservées en mémoire
+    "explain_sample_rate": float(os.getenv('DB_SLOW_QUERY_EXPLAIN_RATE', 0)), # Part des SELECT lents ré-exécutés avec EXPLAIN ANALYZE dans un savepoint annulé (0 = désactivé)
+}
+
+## Réplica en lecture (optionnel) : requêtes de reporting (statistiques, dashboard)
+## Sans DB_REPLICA_HOST, lectures et écritures partagent la base principale
+DB_REPLICA_HOST = os.getenv('DB_REPLICA_HOST')
+DB_REPLICA_PORT = os.getenv('DB_REPLICA_PORT', DB_PORT)
+DB_REPLICA_URL = f"postgresql://{DB_USER}:{DB_PWD_ENCODED}@{DB_REPLICA_HOST}:{DB_REPLICA_PORT}/{DB_NAME}" if DB_REPLICA_HOST else None
+DB_REPLICA_CONFIG = {
+    "max_lag_seconds": float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', 30)), # Retard de réplication toléré pour le reporting
+    "check_interval_seconds": float(os.getenv('DB_REPLICA_CHECK_INTERVAL_SECONDS', 10)), # Fréquence de vérification du réplica (thread d'arrière-plan)
+    "connect_timeout": int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', 2)), # Secondes avant de déclarer le réplica injoignable (vérification en arrière-plan)
+}
+
+## Partitionnement mensuel de predictions_feedback et rétention
+PARTITION_CONFIG = {
+    "months_ahead": int(os.getenv('PARTITION_MONTHS_AHEAD', 3)), # Partitions futures créées à l'avance
+    "check_interval_hours": float(os.getenv('PARTITION_CHECK_INTERVAL_HOURS', 24)), # Création des partitions à venir par l'API (0 = désactivée)
+    "retention_months": int(os.getenv('PARTITION_RETENTION_MONTHS', 6)), # Au-delà : agrégation horaire puis suppression
+}
+
+## Archive Parquet des partitions expirées (requiert pyarrow)
+ARCHIVE_CONFIG = {
+    "enabled": os.getenv('ARCHIVE_ENABLED', 'true').lower() == 'true', # Archivage avant suppression d'une partition (sans pyarrow : aucune suppression) ; false : suppression sans archive
+    "dir": Path(os.getenv('ARCHIVE_DIR', DATA_DIR / "archive" / "predictions")), # Un sous-dossier date=YYYY-MM-DD par jour
+    "compression": os.getenv('ARCHIVE_COMPRESSION', 'zstd'),
+}
+
+
+## Profilage par échantillonnage des piles (endpoint admin et mode continu)
+## Coût : ~20-50 µs par échantillon et par thread actif ; à 100 Hz sur une dizaine
+## de threads, moins de 5 % d'un cœur pendant la capture, ~0,5 % en continu à 10 Hz
+PROFILER_CONFIG = {
+    "max_seconds": float(os.getenv('PROFILER_MAX_SECONDS', 60)), # Durée max d'une capture à la demande
+    "interval_ms": float(os.getenv('PROFILER_INTERVAL_MS', 10)), # Période d'échantillonnage par défaut (100 Hz)
+    "min_interval_ms": float(os.getenv('PROFILER_MIN_INTERVAL_MS', 5)), # Borne basse acceptée par l'endpoint
+    "continuous": os.getenv('PROFILER_CONTINUOUS', 'false').lower() == 'true', # Profilage continu à basse fréquence
+    "continuous_interval_ms": float(os.getenv('PROFILER_CONTINUOUS_INTERVAL_MS', 100)), # 10 Hz
+    "continuous_window_seconds": float(os.getenv('PROFILER_CONTINUOUS_WINDOW_SECONDS', 300)), # Un fichier par fenêtre
+    "continuous_keep": int(os.getenv('PROFILER_CONTINUOUS_KEEP', 24)), # Fichiers conservés par worker (rotation)
+    "dir": Path(os.getenv('PROFILER_DIR', DATA_DIR / "profiles")),
+}
+
+
+## SLO de latence des prédictions (quantiles sur fenêtre glissante, alerte Discord)
+LATENCY_SLO_CONFIG = {
+    "p95_ms": float(os.getenv('LATENCY_SLO_P95_MS', 500)), # Seuil du p95 de la latence de bout en bout
+    "p99_ms": float(os.getenv('LATENCY_SLO_P99_MS', 1000)), # Seuil du p99
+    "window_seconds": float(os.getenv('LATENCY_SLO_WINDOW_SECONDS', 300)), # Fenêtre glissante
+    "slices": int(os.getenv('LATENCY_SLO_SLICES', 10)), # Granularité de la fenêtre (tranches de 30 s)
+    "relative_accuracy": 0.01, # Erreur relative max des quantiles (DDSketch)
+    "hysteresis": float(os.getenv('LATENCY_SLO_HYSTERESIS', 0.2)), # Fin d'alerte sous seuil × (1 - hystérésis)
+    "min_samples": int(os.getenv('LATENCY_SLO_MIN_SAMPLES', 50)), # Pas d'évaluation sur trop peu de requêtes
+    "evaluation_interval_seconds": float(os.getenv('LATENCY_SLO_EVALUATION_INTERVAL_SECONDS', 5)),
+}
+
+## Notifications Discord (file d'envoi en arrière-plan)
+## Limite Discord : ~5 requêtes / 2 s par webhook ; au-delà, réponse 429 avec retry_after
+DISCORD_CONFIG = {
+    "queue_size": int(os.getenv('DISCORD_QUEUE_SIZE', 100)), # Alertes en attente max (au-delà : abandon)
+    "coalesce_seconds": float(os.getenv('DISCORD_COALESCE_SECONDS', 300)), # Une alerte identique max par fenêtre
+    "rate_per_second": float(os.getenv('DISCORD_RATE_PER_SECOND', 0.5)), # Débit moyen (token bucket)
+    "burst": int(os.getenv('DISCORD_BURST', 5)), # Rafale autorisée
+    "timeout_seconds": float(os.getenv('DISCORD_TIMEOUT_SECONDS', 5)), # Timeout HTTP d'un envoi
+    "max_retries": int(os.getenv('DISCORD_MAX_RETRIES', 3)),
+    "backoff_seconds": float(os.getenv('DISCORD_BACKOFF_SECONDS', 1)), # Backoff exponentiel : 1 s, 2 s, 4 s...
+}
+
+## Sonde de santé en arrière-plan (/health répond depuis le dernier état connu)
+HEALTH_CONFIG = {
+    "interval_seconds": float(os.getenv('HEALTH_PROBE_INTERVAL_SECONDS', 10)), # Fréquence des vérifications DB/modèle
+}
+
+## Prometheus multi-workers (API_WORKERS > 1) : chaque worker écrit ses métriques dans
+## des fichiers mmap d'un dossier partagé, agrégés par /metrics quel que soit le worker interrogé
+PROMETHEUS_CONFIG = {
+    "multiproc_dir": Path(os.getenv('PROMETHEUS_MULTIPROC_DIR', TEMP_DIR / "prometheus_multiproc")), # Vidé au lancement de l'API
+    "refresh_seconds": float(os.getenv('PROMETHEUS_REFRESH_SECONDS', 5)), # Rafraîchissement des gauges lues dans le processus (pool, mémoire, latence)
+}
 
 # Modèles
 MODELS_DIR = PROCESSED_DATA_DIR / "models" # SRC_DIR / "models/trained"
@@ -40,6 +153,56 @@ MODEL_CONFIG = {
     "batch_size": 64,
     "epochs": 3, #10, # Optimized for speed-up
     "learning_rate": 0.001,
+    # Mode d'entraînement : précision mixte et compilation XLA (la sortie sigmoïde reste en float32)
+    "precision": os.getenv('TRAINING_PRECISION', 'float32'), # 'float32', 'mixed_bfloat16' (CPU x86 AMX / AVX512-BF16) ou 'mixed_float16' (GPU)
+    "jit_compile": os.getenv('TRAINING_JIT_COMPILE', 'false').lower() == 'true', # XLA ; l'augmentation passe alors dans le pipeline tf.data
+    # Pipeline d'entrée tf.data (src/data/pipeline.py)
+    "cache": os.getenv('TRAINING_CACHE', 'auto'), # 'memory', 'disk', 'none' ou 'auto' (mémoire si ram_budget_mb suffit, sinon disque)
+    "cache_dir": Path(os.getenv('TRAINING_CACHE_DIR', TEMP_DIR / "tf_cache")), # Cache fichier des images décodées
+    "ram_budget_mb": int(os.getenv('TRAINING_RAM_BUDGET_MB', 2048)), # Cache mémoire + buffer de mélange
+    "num_parallel_calls": int(os.getenv('TRAINING_PARALLEL_CALLS', -1)), # Décodages simultanés (-1 : tf.data.AUTOTUNE)
+    "deterministic": os.getenv('TRAINING_DETERMINISTIC', 'false').lower() == 'true', # false : éléments rendus dès qu'ils sont prêts (forcé à true si TRAINING_CHECKPOINT_STEPS > 0)
+    "shuffle_buffer": int(os.getenv('TRAINING_SHUFFLE_BUFFER', 8192)), # Images (uint8) mélangées ; ~400 Mo en 128×128
+}
+
+## Entraînement multi-workers (tf.distribute) : cluster décrit par TF_CONFIG ou par
+## scripts/train.py --worker-hosts ; les workers partagent DATA_DIR et TEMP_DIR (même hôte ou stockage partagé)
+DISTRIBUTED_CONFIG = {
+    "scale_learning_rate": os.getenv('TRAINING_SCALE_LR', 'true').lower() == 'true', # learning_rate × nombre de replicas (batch global plus grand)
+    "communication": os.getenv('TRAINING_COLLECTIVE', 'auto'), # Collectives : 'auto', 'ring' (gRPC, CPU) ou 'nccl' (GPU)
+}
+
+## Reprise d'un entraînement interrompu : état complet (modèle, optimiseur, epoch, RNG, position dans les données)
+## sauvegardé tous les every_steps pas ; scripts/train.py reprend automatiquement depuis le dernier.
+## Actif par défaut : l'entraînement passe alors par training_loop.fit_loop au lieu de model.fit (mêmes
+## callbacks, barre de progression et validation à chaque epoch ; batches de chaque epoch mélangés avec la
+## graine seed + epoch ; seules loss / accuracy et leurs val_ sont calculées, pas les autres métriques compilées)
+CHECKPOINT_CONFIG = {
+    "dir": Path(os.getenv('TRAINING_CHECKPOINT_DIR', MODELS_DIR / "training_state")), # Un sous-dossier par version des données
+    "every_steps": int(os.getenv('TRAINING_CHECKPOINT_STEPS', 100)), # 0 : désactivé (model.fit, reprise impossible)
+    "keep": int(os.getenv('TRAINING_CHECKPOINT_KEEP', 3)), # Checkpoints conservés, les plus anciens sont supprimés
+}
+
+## Dérive des prédictions : fenêtre glissante comparée à la référence du jeu de validation
+## (écrite par CatDogTrainer à côté du modèle ; sans référence, le suivi est désactivé)
+DRIFT_CONFIG = {
+    "reference_path": Path(os.getenv('DRIFT_REFERENCE_PATH', MODELS_DIR / "drift_reference.json")),
+    "score_bins": 20, # Bins du score brut (0-1) dans la référence
+    "window_seconds": float(os.getenv('DRIFT_WINDOW_SECONDS', 3600)), # Fenêtre glissante
+    "slices": int(os.getenv('DRIFT_SLICES', 12)), # Granularité de la fenêtre (tranches de 5 min)
+    "min_samples": int(os.getenv('DRIFT_MIN_SAMPLES', 400)), # Sous ~20 requêtes par bin, le bruit d'échantillonnage seul gonfle le PSI
+    "psi_threshold": float(os.getenv('DRIFT_PSI_THRESHOLD', 0.25)), # 0 = seuil désactivé
+    "kl_threshold": float(os.getenv('DRIFT_KL_THRESHOLD', 0)),
+    "ks_threshold": float(os.getenv('DRIFT_KS_THRESHOLD', 0.2)),
+    "hysteresis": float(os.getenv('DRIFT_HYSTERESIS', 0.2)), # Fin d'alerte sous seuil × (1 - hystérésis)
+    "evaluation_interval_seconds": float(os.getenv('DRIFT_EVALUATION_INTERVAL_SECONDS', 30)),
+}
+
+## Statistiques des images reçues (luminosité, contraste, format...) suivies par le DriftMonitor
+IMAGE_STATS_CONFIG = {
+    "budget_ms": float(os.getenv('IMAGE_STATS_BUDGET_MS', 1.0)), # Coût max par requête (moyenne glissante)
+    "max_stride": int(os.getenv('IMAGE_STATS_MAX_STRIDE', 8)), # Sous-échantillonnage max des pixels si le budget est dépassé
+    "reference_sample_size": int(os.getenv('IMAGE_STATS_REFERENCE_SAMPLE_SIZE', 2000)), # Images d'entraînement de la référence
 }
 
 # Configuration API
@@ -47,6 +210,7 @@ API_TOKEN = os.getenv('API_TOKEN')
 API_CONFIG = {
     "host": "0.0.0.0", #"127.0.0.1",
     "port": 8000,
+    "workers": int(os.getenv('API_WORKERS', 1)), # Processus uvicorn (> 1 : métriques Prometheus en mode multiprocess)
     "token": API_TOKEN,
     "model_path": MODELS_DIR / "cats_dogs_model.keras",
 }
@@ -55,3 +219,14 @@ API_CONFIG = {
 DATA_URLS = {
     "kaggle_cats_dogs": "https://download.microsoft.com/download/3/E/1/3E1C3F21-ECDB-4869-8368-6DEBA77B919F/kagglecatsanddogs_5340.zip"
 }
+
+# Téléchargement (requêtes HTTP Range en parallèle, reprise après interruption)
+DOWNLOAD_CONFIG = {
+    "workers": int(os.getenv('DOWNLOAD_WORKERS', 8)), # Plages téléchargées simultanément
+    "chunk_size": int(os.getenv('DOWNLOAD_CHUNK_MB', 8)) * 1024 * 1024, # Taille d'une plage (unité de reprise)
+    "retries": int(os.getenv('DOWNLOAD_RETRIES', 3)), # Nouvelles tentatives par plage
+    "timeout_seconds": 30,
+    "sha256": { # Empreintes attendues (sinon : enregistrée au premier téléchargement puis vérifiée)
+        "kaggle_cats_dogs": os.getenv('KAGGLE_CATS_DOGS_SHA256'),
+    },
+}
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'entraînement multi-workers sur un seul hôte
+
+Lance 1, 2 puis 4 workers locaux (scripts/train.py avec TF_CONFIG) sur une
+archive synthétique, dans un répertoire temporaire (données, shards, modèle),
+et rapporte le débit global et l'efficacité du passage à l'échelle :
+
+    efficacité(N) = débit(N workers) / (N × débit(1 worker))
+
+Le débit est mesuré par le chief sur les epochs après la première
+(construction des shards et des graphes exclue). Sur un seul hôte, les
+workers se partagent les cœurs : --threads-per-worker les répartit.
+
+Usage :
+    python scripts/benchmark_distributed_training.py
+    python scripts/benchmark_distributed_training.py --workers 1,2 --images 2000 --epochs 4
+"""
+
+import argparse
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+from PIL import Image
+
+
+def synthetic_archive(path: Path, count: int, size=(160, 120), seed: int = 0) -> Path:
+    """Archive PetImages : chats à rayures horizontales, chiens à rayures verticales"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    rows, cols = np.mgrid[0:height, 0:width]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+        for i in range(count):
+            folder_name = ("Cat", "Dog")[i % 2]
+            axis = cols if folder_name == "Dog" else rows
+            stripes = 127 + 100 * np.sin(2 * np.pi * axis / rng.integers(4, 16))
+            pixels = np.clip(stripes[..., None] + rng.normal(0, 40, (height, width, 3)), 0, 255)
+            buffer = io.BytesIO()
+            Image.fromarray(pixels.astype(np.uint8)).save(buffer, format="JPEG")
+            zf.writestr(f"PetImages/{folder_name}/{i // 2}.jpg", buffer.getvalue())
+    return path
+
+
+def free_ports(count: int):
+    sockets = [socket.socket() for _ in range(count)]
+    for sock in sockets:
+        sock.bind(("localhost", 0))
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+def worker_env(work_dir: Path, archive: Path, threads: int, epochs: int) -> dict:
+    """Environnement des workers : tous les fichiers écrits dans work_dir"""
+    env = dict(os.environ)
+    env.update({
+        "TEMP_DIR": str(work_dir / "tmp"),
+        "TRAINING_DATA_SOURCE": "archive",
+        "DATA_ARCHIVE_PATH": str(archive),
+        "IMAGE_MANIFEST_PATH": str(work_dir / "image_manifest.json"),
+        "IMAGE_QUARANTINE_DIR": str(work_dir / "quarantine"),
+        "TRAINING_SHARDS_DIR": str(work_dir / "shards"),
+        "TRAINING_SHARD_SIZE": "64",
+        "TRAINING_CACHE_DIR": str(work_dir / "tf_cache"),
+        "TRAINING_CHECKPOINT_DIR": str(work_dir / "training_state"),
+        "DRIFT_REFERENCE_PATH": str(work_dir / "models" / "drift_reference.json"),
+        "IMAGE_STATS_REFERENCE_SAMPLE_SIZE": "50",
+        "BENCHMARK_EPOCHS": str(epochs),
+        "TF_NUM_INTRAOP_THREADS": str(threads),
+        "TF_NUM_INTEROP_THREADS": str(threads),
+        "TF_CPP_MIN_LOG_LEVEL": "3",
+    })
+    return env
+
+
+def run_worker(args):
+    """Un worker du cluster (sous-processus lancé par run_cluster)"""
+    os.environ["TF_CONFIG"] = args.tf_config or ""  # Avant la création de la stratégie
+    from config.settings import MODEL_CONFIG
+    from src.models.trainer import CatDogTrainer
+
+    MODEL_CONFIG["epochs"] = int(os.environ["BENCHMARK_EPOCHS"])
+    trainer = CatDogTrainer()
+    trainer.models_dir = Path(args.report).parent / "models"
+    trainer.models_dir.mkdir(parents=True, exist_ok=True)
+    model, history = trainer.train()
+    report = {
+        "index": trainer.cluster["index"],
+        "chief": trainer.cluster["chief"],
+        "global_batch_size": trainer.global_batch_size,
+        "epochs": trainer.input_stalls,
+        "val_accuracy": history.history["val_accuracy"][-1],
+    }
+    Path(args.report).write_text(json.dumps(report), encoding="utf-8")
+
+
+def run_cluster(num_workers: int, work_dir: Path, archive: Path, threads: int, epochs: int,
+                timeout: float = 900):
+    """Lance num_workers workers locaux ; rapports JSON des workers (chief en premier)"""
+    from src.models.distributed import tf_config_from_hosts
+
+    run_dir = work_dir / f"{num_workers}_workers"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    hosts = [f"localhost:{port}" for port in free_ports(num_workers)]
+    env = worker_env(work_dir, archive, threads, epochs)
+    processes = []
+    for index in range(num_workers):
+        command = [sys.executable, __file__, "--worker", "--report", str(run_dir / f"worker_{index}.json"),
+                   "--tf-config", tf_config_from_hosts(hosts, index) if num_workers > 1 else ""]
+        log = open(run_dir / f"worker_{index}.log", "w")
+        processes.append((subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT), log))
+    for process, log in processes:
+        try:
+            process.wait(timeout=timeout)
+        finally:
+            process.kill()
+            log.close()
+    failed = [index for index, (process, _) in enumerate(processes) if process.returncode != 0]
+    if failed:
+        raise RuntimeError(f"Workers en échec : {failed} (journaux dans {run_dir})")
+    return [json.loads((run_dir / f"worker_{index}.json").read_text()) for index in range(num_workers)]
+
+
+def throughput(report: dict) -> float:
+    """Images/s globales du chief, hors première epoch"""
+    epochs = report["epochs"][1:] or report["epochs"]
+    steps = sum(epoch["steps"] for epoch in epochs)
+    return steps * report["global_batch_size"] / sum(epoch["train_seconds"] for epoch in epochs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Tailles de cluster séparées par des virgules")
+    parser.add_argument("--images", type=int, default=1024, help="Images de l'archive synthétique")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--threads-per-worker", type=int, default=0,
+                        help="Threads TensorFlow par worker (0 : cœurs / nombre de workers)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--tf-config", help=argparse.SUPPRESS)
+    parser.add_argument("--report", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        archive = synthetic_archive(work_dir / "synthetic.zip", args.images)
+        results = []
+        for num_workers in (int(n) for n in args.workers.split(",")):
+            threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+            print(f"▶️  {num_workers} worker(s), {threads} thread(s) chacun")
+            reports = run_cluster(num_workers, work_dir, archive, threads, args.epochs)
+            results.append((num_workers, reports[0]))
+
+    base = throughput(results[0][1]) / results[0][0]
+    print(f"\n{'workers':>8} {'batch global':>13} {'images/s':>10} {'accélération':>13} "
+          f"{'efficacité':>11} {'val_accuracy':>13}")
+    for num_workers, report in results:
+        rate = throughput(report)
+        print(f"{num_workers:8d} {report['global_batch_size']:13d} {rate:10.1f} {rate / base:12.2f}× "
+              f"{rate / (num_workers * base):10.0%} {report['val_accuracy']:13.3f}")
+
+
+if __name__ == "__main__":
+    main()
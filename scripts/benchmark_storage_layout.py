@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark du format de stockage de predictions_feedback (ancien format vs format compact)
+
+Génère N lignes synthétiques (10 millions par défaut) dans deux tables UNLOGGED
+d'un schéma temporaire, avec les mêmes index que la table de production, puis
+compare taille du heap, taille des index et taille moyenne d'une ligne.
+Le schéma est supprimé à la fin.
+
+Usage : python scripts/benchmark_storage_layout.py [--rows 10000000]
+
+Mesuré sur 10 millions de lignes (PostgreSQL 16.2, 1 vCPU) :
+
+                        ancien       compact    gain
+    Heap              801.9 MB      646.4 MB   19.4%
+    Index             580.8 MB      580.8 MB    0.0%
+    Ligne moy.          78.5 o        60.2 o   23.3%
+
+Les index ne gagnent rien : une entrée B-tree est alignée sur 8 octets, un
+VARCHAR court ('cat') et un SMALLINT y occupent la même place, et la clé
+primaire (id, created_at) est identique dans les deux formats.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy import text
+from src.database.db_connector import engine
+
+SCHEMA = "storage_benchmark"
+
+# Distribution proche de la production : ~2% d'erreurs, ~30% de consentements RGPD,
+# la moitié des consentements avec un feedback, quelques commentaires
+WIDE_DDL = f"""
+CREATE UNLOGGED TABLE {SCHEMA}.wide (
+    id SERIAL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    inference_time_ms INTEGER NOT NULL,
+    success BOOLEAN NOT NULL,
+    prediction_result VARCHAR(10) NOT NULL CHECK (prediction_result IN ('cat', 'dog', 'error')),
+    proba_cat DECIMAL(5,2) NOT NULL CHECK (proba_cat >= 0 AND proba_cat <= 100),
+    proba_dog DECIMAL(5,2) NOT NULL CHECK (proba_dog >= 0 AND proba_dog <= 100),
+    rgpd_consent BOOLEAN NOT NULL DEFAULT FALSE,
+    filename VARCHAR(255) NULL,
+    user_feedback INTEGER NULL CHECK (user_feedback IN (0, 1)),
+    user_comment TEXT NULL,
+    PRIMARY KEY (id, created_at)
+)
+"""
+
+COMPACT_DDL = f"""
+CREATE UNLOGGED TABLE {SCHEMA}.compact (
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    id SERIAL,
+    inference_time_ms INTEGER NOT NULL,
+    score_dog SMALLINT NOT NULL CHECK (score_dog >= 0 AND score_dog <= 10000),
+    result_code SMALLINT NOT NULL CHECK (result_code IN (0, 1, 2)),
+    user_feedback SMALLINT NULL CHECK (user_feedback IN (0, 1)),
+    success BOOLEAN NOT NULL,
+    rgpd_consent BOOLEAN NOT NULL DEFAULT FALSE,
+    filename VARCHAR(255) NULL,
+    user_comment TEXT NULL,
+    PRIMARY KEY (id, created_at)
+)
+"""
+
+SYNTHETIC_SQL = f"""
+CREATE UNLOGGED TABLE {SCHEMA}.synthetic AS
+SELECT
+    g AS id,
+    TIMESTAMP '2025-01-01' + g * INTERVAL '3 seconds' AS created_at,
+    (20 + random() * 200)::INTEGER AS inference_time_ms,
+    random() > 0.02 AS success,
+    (random() * 10000)::SMALLINT AS score_dog,
+    random() < 0.3 AS rgpd_consent,
+    random() AS r
+FROM generate_series(1, :rows) AS g
+"""
+
+FILL_WIDE = f"""
+INSERT INTO {SCHEMA}.wide
+SELECT id, created_at, inference_time_ms, success,
+       CASE WHEN NOT success THEN 'error' WHEN score_dog > 5000 THEN 'dog' ELSE 'cat' END,
+       CASE WHEN NOT success THEN 0 ELSE (10000 - score_dog) / 100.0 END,
+       CASE WHEN NOT success THEN 0 ELSE score_dog / 100.0 END,
+       rgpd_consent,
+       CASE WHEN rgpd_consent THEN 'upload_' || id || '.jpg' END,
+       CASE WHEN rgpd_consent AND r < 0.5 THEN (r < 0.4)::INTEGER END,
+       CASE WHEN rgpd_consent AND r < 0.05 THEN 'commentaire utilisateur' END
+FROM {SCHEMA}.synthetic
+"""
+
+FILL_COMPACT = f"""
+INSERT INTO {SCHEMA}.compact
+SELECT created_at, id, inference_time_ms,
+       CASE WHEN NOT success THEN 0 ELSE score_dog END,
+       CASE WHEN NOT success THEN 2 WHEN score_dog > 5000 THEN 1 ELSE 0 END,
+       CASE WHEN rgpd_consent AND r < 0.5 THEN (r < 0.4)::INTEGER::SMALLINT END,
+       success,
+       rgpd_consent,
+       CASE WHEN rgpd_consent THEN 'upload_' || id || '.jpg' END,
+       CASE WHEN rgpd_consent AND r < 0.05 THEN 'commentaire utilisateur' END
+FROM {SCHEMA}.synthetic
+"""
+
+INDEXES = {
+    "wide": ["created_at", "prediction_result"],
+    "compact": ["created_at", "result_code"],
+}
+
+
+def _mb(size_bytes: int) -> str:
+    return f"{size_bytes / 1024 / 1024:,.1f} MB"
+
+
+def measure(connection, table: str) -> dict:
+    """Taille du heap, des index et taille moyenne d'une ligne"""
+    row = connection.execute(text(f"""
+        SELECT pg_table_size('{SCHEMA}.{table}'),
+               pg_indexes_size('{SCHEMA}.{table}'),
+               (SELECT AVG(pg_column_size(t.*)) FROM {SCHEMA}.{table} t)
+    """)).fetchone()
+    return {"heap": row[0], "indexes": row[1], "avg_row": float(row[2])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Nombre de lignes synthétiques")
+    args = parser.parse_args()
+
+    print(f"Benchmark du format de stockage sur {args.rows:,} lignes")
+
+    with engine.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+        try:
+            start = time.perf_counter()
+            connection.execute(text(SYNTHETIC_SQL), {"rows": args.rows})
+            print(f"Données synthétiques générées en {time.perf_counter() - start:.1f}s")
+
+            results = {}
+            for table, ddl, fill in (("wide", WIDE_DDL, FILL_WIDE), ("compact", COMPACT_DDL, FILL_COMPACT)):
+                connection.execute(text(ddl))
+                start = time.perf_counter()
+                connection.execute(text(fill))
+                for column in INDEXES[table]:
+                    connection.execute(text(f"CREATE INDEX ON {SCHEMA}.{table}({column})"))
+                connection.execute(text(f"VACUUM ANALYZE {SCHEMA}.{table}"))
+                results[table] = measure(connection, table)
+                print(f"Table {table} remplie et indexée en {time.perf_counter() - start:.1f}s")
+
+            print(f"\n{'':12}{'ancien':>14}{'compact':>14}{'gain':>8}")
+            for key, label in (("heap", "Heap"), ("indexes", "Index"), ("avg_row", "Ligne moy.")):
+                before, after = results["wide"][key], results["compact"][key]
+                fmt = _mb if key != "avg_row" else (lambda v: f"{v:.1f} o")
+                print(f"{label:12}{fmt(before):>14}{fmt(after):>14}{(1 - after / before):>8.1%}")
+        finally:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark des pipelines de données d'entraînement (répertoire JPEG ou archive zip vs shards .npy)
+
+Mesure, sans entraîner de modèle, le débit (images/s) de chaque epoch :
+- directory : image_dataset_from_directory + cache + prefetch (pipeline historique,
+  décodage JPEG pendant la première epoch)
+- archive : lecture directe des membres du zip (--archive), décodage en threads
+- shards : construction unique des shards (mesurée séparément) puis lecture
+  parallèle des shards déjà décodés
+
+Usage :
+    python scripts/benchmark_training_data.py                  # Données de setup_data_directory
+    python scripts/benchmark_training_data.py --synthetic 3000 # JPEG synthétiques 400×300
+    python scripts/benchmark_training_data.py --archive data/raw/kagglecatsanddogs_5340.zip
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+from PIL import Image
+
+from config.settings import MODEL_CONFIG, TRAINING_DATA_CONFIG
+
+
+def make_synthetic_dataset(root: Path, count: int) -> Path:
+    data_path = root / "PetImages"
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        folder = data_path / ("Cat" if i % 2 else "Dog")
+        folder.mkdir(parents=True, exist_ok=True)
+        pixels = rng.integers(0, 255, (300, 400, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(folder / f"{i}.jpg", quality=85)
+    return data_path
+
+
+def time_epochs(dataset, epochs: int):
+    """Durée et nombre d'images de chaque epoch (itération complète du dataset)"""
+    results = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        count = sum(int(images.shape[0]) for images, _ in dataset)
+        results.append((time.perf_counter() - start, count))
+    return results
+
+
+def report(name: str, results, setup_seconds: float = 0.0):
+    for epoch, (seconds, count) in enumerate(results, start=1):
+        print(f"{name:<10} epoch {epoch}: {seconds:7.2f}s  {count / seconds:9.0f} images/s")
+    if setup_seconds:
+        print(f"{name:<10} construction: {setup_seconds:.2f}s (une seule fois par version du contenu)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synthetic", type=int, default=0, help="Nombre de JPEG synthétiques à générer")
+    parser.add_argument("--archive", type=Path, help="Archive zip lue sans extraction (PetImages/Cat|Dog)")
+    parser.add_argument("--epochs", type=int, default=2)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    from src.data.preprocessing import setup_data_directory, validate_dataset
+    from src.data.shards import build_shards, load_sharded_dataset, split_samples
+    from src.data.zip_source import ZipImageArchive, archive_dataset
+
+    batch_size = MODEL_CONFIG["batch_size"]
+    image_size = MODEL_CONFIG["image_size"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.archive:
+            data_path = ZipImageArchive(args.archive)
+        else:
+            data_path = make_synthetic_dataset(tmp, args.synthetic) if args.synthetic else setup_data_directory()
+        validate_dataset(data_path, manifest_path=tmp / "manifest.json", quarantine_dir=tmp / "quarantine")
+
+        if args.archive:
+            files = json.loads((tmp / "manifest.json").read_text(encoding="utf-8"))["files"]
+            keys = split_samples([key for key, entry in files.items() if entry["valid"]],
+                                 TRAINING_DATA_CONFIG["validation_split"], TRAINING_DATA_CONFIG["seed"])["train"]
+            archive_ds = archive_dataset(data_path, keys, image_size, batch_size, shuffle=True)
+            report("archive", time_epochs(archive_ds, args.epochs))
+        else:
+            directory_ds = tf.keras.utils.image_dataset_from_directory(
+                data_path, validation_split=0.2, subset="training", seed=1337,
+                image_size=image_size, batch_size=batch_size, verbose=False,
+            ).cache().shuffle(1000).prefetch(tf.data.AUTOTUNE)
+            report("directory", time_epochs(directory_ds, args.epochs))
+
+        start = time.perf_counter()
+        index_path = build_shards(data_path, manifest_path=tmp / "manifest.json",
+                                  image_size=image_size, shards_dir=tmp / "shards")
+        build_seconds = time.perf_counter() - start
+        shards_ds = load_sharded_dataset(index_path, "train", batch_size, shuffle=True,
+                                         seed=TRAINING_DATA_CONFIG["seed"])
+        report("shards", time_epochs(shards_ds, args.epochs), build_seconds)
+
+
+if __name__ == "__main__":
+    main()
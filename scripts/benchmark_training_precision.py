@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark des modes d'entraînement (précision mixte, compilation XLA)
+
+Entraîne le modèle de CatDogTrainer dans chaque mode sur les mêmes données et
+rapporte le temps médian d'un pas (première epoch exclue : compilation), le
+débit et l'exactitude de validation finale, comparés au premier mode (référence).
+
+Usage :
+    python scripts/benchmark_training_precision.py                   # Données de prepare_data
+    python scripts/benchmark_training_precision.py --synthetic 2000  # Rayures horizontales / verticales
+    python scripts/benchmark_training_precision.py --modes float32,mixed_bfloat16 --epochs 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import numpy as np
+import tensorflow as tf
+
+from config.settings import MODEL_CONFIG
+
+DEFAULT_MODES = "float32,float32+xla,mixed_bfloat16,mixed_bfloat16+xla"
+
+
+class StepTimer(tf.keras.callbacks.Callback):
+    """Durée de chaque pas d'entraînement, par epoch"""
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epochs = getattr(self, "epochs", []) + [[]]
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.epochs[-1].append(time.perf_counter() - self._start)
+
+
+def synthetic_datasets(count: int, image_size, batch_size: int, seed: int = 0):
+    """Chats : rayures horizontales, chiens : verticales (bruitées, périodes variables)"""
+    rng = np.random.default_rng(seed)
+    width, height = image_size
+    labels = rng.integers(0, 2, count)
+    periods = rng.integers(4, 16, count)
+    rows, cols = np.mgrid[0:height, 0:width]
+    images = np.empty((count, height, width, 3), dtype=np.uint8)
+    for i in range(count):
+        axis = cols if labels[i] else rows
+        stripes = 127 + 100 * np.sin(2 * np.pi * axis / periods[i])
+        images[i] = np.clip(stripes[..., None] + rng.normal(0, 40, (height, width, 3)), 0, 255)
+
+    split = int(count * 0.8)
+    def make(x, y, shuffle):
+        dataset = tf.data.Dataset.from_tensor_slices((x, y.astype(np.int32)))
+        if shuffle:
+            dataset = dataset.shuffle(len(x), seed=seed)
+        return dataset.batch(batch_size).map(lambda a, b: (tf.cast(a, tf.float32), b)).prefetch(tf.data.AUTOTUNE)
+    return make(images[:split], labels[:split], True), make(images[split:], labels[split:], False)
+
+
+def run_mode(trainer, mode: str, train_ds, val_ds, epochs: int, seed: int):
+    precision, _, xla = mode.partition("+")
+    jit_compile = xla == "xla"
+    tf.keras.utils.set_random_seed(seed)  # Mêmes poids initiaux pour tous les modes
+    model = trainer.create_model(precision=precision, jit_compile=jit_compile, augmentation=not jit_compile)
+    if jit_compile:
+        train_ds = trainer.augment_dataset(train_ds)
+    timer = StepTimer()
+    history = model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=[timer], verbose=0)
+
+    steps = [step for epoch in timer.epochs[1:] for step in epoch] or timer.epochs[0]
+    return {
+        "mode": mode,
+        "jit_compile": model.jit_compile,  # False si Keras a refusé la compilation XLA
+        "step_ms": statistics.median(steps) * 1000,
+        "first_epoch_s": sum(timer.epochs[0]),
+        "val_accuracy": history.history["val_accuracy"][-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default=DEFAULT_MODES, help="Modes séparés par des virgules (<precision>[+xla])")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--synthetic", type=int, default=0, help="Nombre d'images synthétiques (0 : prepare_data)")
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+
+    from src.models.trainer import CatDogTrainer
+
+    trainer = CatDogTrainer()
+    batch_size = MODEL_CONFIG["batch_size"]
+    if args.synthetic:
+        train_ds, val_ds = synthetic_datasets(args.synthetic, MODEL_CONFIG["image_size"], batch_size, args.seed)
+    else:
+        train_ds, val_ds = trainer.prepare_data()
+
+    results = []
+    for mode in args.modes.split(","):
+        print(f"▶️  {mode}")
+        results.append(run_mode(trainer, mode, train_ds, val_ds, args.epochs, args.seed))
+
+    baseline = results[0]
+    print(f"\n{'mode':<22} {'XLA':>5} {'pas (ms)':>10} {'images/s':>10} {'accélération':>13} "
+          f"{'1re epoch (s)':>14} {'val_accuracy':>13}")
+    for result in results:
+        print(f"{result['mode']:<22} {str(result['jit_compile']):>5} {result['step_ms']:10.1f} "
+              f"{batch_size / result['step_ms'] * 1000:10.0f} {baseline['step_ms'] / result['step_ms']:12.2f}× "
+              f"{result['first_epoch_s']:14.1f} {result['val_accuracy']:13.3f}")
+
+
+if __name__ == "__main__":
+    main()
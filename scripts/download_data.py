@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Script de téléchargement des jeux de données (DATA_URLS)
+
+Usage :
+    python scripts/download_data.py                        # Tous les jeux de DATA_URLS
+    python scripts/download_data.py kaggle_cats_dogs --workers 16
+    python scripts/download_data.py --extract              # Extrait aussi PetImages dans data/raw
+
+Relancer la commande après une interruption reprend le téléchargement.
+Sans --extract, l'archive peut servir directement à l'entraînement
+(TRAINING_DATA_SOURCE=archive).
+"""
+
+import argparse
+import sys
+import zipfile
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import DATA_URLS, DOWNLOAD_CONFIG, RAW_DATA_DIR
+from src.data.download import download_datasets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("names", nargs="*", help=f"Jeux à télécharger parmi {', '.join(DATA_URLS)}")
+    parser.add_argument("--dest-dir", type=Path, default=RAW_DATA_DIR)
+    parser.add_argument("--workers", type=int, default=DOWNLOAD_CONFIG["workers"], help="Plages simultanées")
+    parser.add_argument("--chunk-mb", type=int, default=DOWNLOAD_CONFIG["chunk_size"] // (1024 * 1024))
+    parser.add_argument("--extract", action="store_true", help="Extraire les archives zip dans --dest-dir")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(DATA_URLS)
+    if unknown:
+        parser.error(f"Jeux inconnus : {', '.join(sorted(unknown))}")
+
+    paths = download_datasets(args.names or None, args.dest_dir, workers=args.workers,
+                              chunk_size=args.chunk_mb * 1024 * 1024)
+
+    if args.extract:
+        for path in paths.values():
+            if zipfile.is_zipfile(path):
+                print(f"📦 Extraction de {path.name} dans {args.dest_dir}")
+                with zipfile.ZipFile(path) as zf:
+                    zf.extractall(args.dest_dir)
+
+    print("Téléchargement terminé avec succès!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Script d'export en flux de l'historique des prédictions
+
+Usage :
+    python scripts/export_predictions.py --format parquet --output predictions.parquet
+    python scripts/export_predictions.py --start 2025-01-01 --rgpd-consent --has-feedback > feedbacks.csv
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.db_connector import get_db_session
+from src.database.export_service import ExportService, EXPORT_FORMATS, DEFAULT_BATCH_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description="Export de l'historique des prédictions")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--output", type=Path, default=None, help="Fichier de sortie (défaut : sortie standard)")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="Date de début incluse (ISO 8601)")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="Date de fin exclue (ISO 8601)")
+    parser.add_argument("--rgpd-consent", action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument("--has-feedback", action=argparse.BooleanOptionalAction, default=None)
+    parser.add_argument("--user-feedback", type=int, choices=[0, 1], default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    
+    db = get_db_session()
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        batches = ExportService.iter_batches(
+            db,
+            batch_size=args.batch_size,
+            start=args.start,
+            end=args.end,
+            rgpd_consent=args.rgpd_consent,
+            has_feedback=args.has_feedback,
+            user_feedback=args.user_feedback,
+        )
+        written = 0
+        for chunk in ExportService.stream(batches, args.format):
+            output.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            output.close()
+        db.close()
+    
+    print(f"Export terminé : {written / 1024:.1f} Ko écrits", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
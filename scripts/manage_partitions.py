@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script de maintenance des partitions de predictions_feedback : partitions à venir,
+archivage et rétention des partitions expirées
+
+Planifié chaque jour par le service partition_maintenance de docker/docker-compose.yml
+(hors Docker : cron quotidien, ex. `0 3 * * * cd /app && python scripts/manage_partitions.py`).
+L'API crée aussi les partitions à venir au démarrage (PARTITION_CHECK_INTERVAL_HOURS).
+"""
+
+import sys
+from pathlib import Path
+
+# Ajouter le répertoire racine au path
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from src.database.db_connector import get_db_session
+from src.database.partition_manager import PartitionManager
+
+def main():
+    print("Maintenance des partitions predictions_feedback")
+    
+    db = get_db_session()
+    try:
+        created = PartitionManager.ensure_future_partitions(db)
+        print(f"Partitions créées : {created}")
+        
+        dropped = PartitionManager.apply_retention(db)
+        print(f"Partitions expirées agrégées et supprimées : {len(dropped)}")
+    finally:
+        db.close()
+    
+    print("Maintenance terminée avec succès!")
+
+if __name__ == "__main__":
+    main()
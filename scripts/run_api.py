@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Script de lancement de l'API"""
 
+import os
 import sys
 from pathlib import Path
 
@@ -8,17 +9,37 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
+
+def prepare_prometheus_multiproc_dir(path: Path):
+    """
+    Active le mode multiprocess de prometheus_client pour les workers uvicorn
+    
+    La variable doit être posée avant tout import de prometheus_client (les
+    workers en héritent) et le dossier vidé à chaque lancement : des fichiers
+    d'une exécution précédente fausseraient compteurs et gauges.
+    """
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for db_file in path.glob("*.db"):
+        db_file.unlink()
+
+
 if __name__ == "__main__":
     import uvicorn
-    from config.settings import API_CONFIG
+    from config.settings import API_CONFIG, PROMETHEUS_CONFIG
+    
+    if API_CONFIG["workers"] > 1 or "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        prepare_prometheus_multiproc_dir(PROMETHEUS_CONFIG["multiproc_dir"])
     
     print("Lancement de l'API Cats vs Dogs")
     print(f"URL: http://{API_CONFIG['host']}:{API_CONFIG['port']}")
     print(f"Docs: http://{API_CONFIG['host']}:{API_CONFIG['port']}/docs")
+    print(f"Workers: {API_CONFIG['workers']}")
     
     uvicorn.run(
         "src.api.main:app",
         host=API_CONFIG["host"],
         port=API_CONFIG["port"],
+        workers=API_CONFIG["workers"],
         reload=False  # En production Docker
-    )
\ No newline at end of file
+    )
@@ -1,6 +1,17 @@
 #!/usr/bin/env python3
-"""Script d'entraînement du modèle"""
+"""
+Script d'entraînement du modèle
 
+Usage :
+    python scripts/train.py             # Reprend un entraînement interrompu s'il y en a un
+    python scripts/train.py --restart   # Repart de zéro
+    # Multi-workers (une commande par worker, le worker 0 est le chief) ;
+    # équivalent à définir TF_CONFIG
+    python scripts/train.py --worker-hosts host1:23456,host2:23456 --task-index 0
+"""
+
+import argparse
+import os
 import sys
 from pathlib import Path
 
@@ -8,15 +19,25 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from src.models.trainer import CatDogTrainer
+from src.models.distributed import tf_config_from_hosts
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker-hosts", help="Workers host:port séparés par des virgules (remplace TF_CONFIG)")
+    parser.add_argument("--task-index", type=int, default=0, help="Rang de ce worker dans --worker-hosts")
+    parser.add_argument("--restart", action="store_true", help="Ignorer l'état sauvegardé d'un entraînement interrompu")
+    args = parser.parse_args()
+    if args.worker_hosts:
+        os.environ["TF_CONFIG"] = tf_config_from_hosts(args.worker_hosts.split(","), args.task_index)
+
+    from src.models.trainer import CatDogTrainer
+
     print("Début de l'entraînement du modèle Cats vs Dogs")
-    
+
     trainer = CatDogTrainer()
-    model, history = trainer.train()
-    
+    model, history = trainer.train(resume=not args.restart)
+
     print("Entraînement terminé avec succès!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
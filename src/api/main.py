@@ -8,7 +8,13 @@ import os
 ROOT_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from .routes import router
+from .routes import router, health_prober
+from src.database.db_connector import router as replica_router
+from src.utils.stage_timer import RequestStartMiddleware
+from src.monitoring.profiler import continuous_profiler
+from src.database.db_connector import SessionLocal
+from src.database.partition_manager import FuturePartitionScheduler
+from config.settings import PROFILER_CONFIG, PARTITION_CONFIG
 
 # V3 - Import optionnel Prometheus
 ENABLE_PROMETHEUS = os.getenv('ENABLE_PROMETHEUS', 'false').lower() == 'true'
@@ -64,6 +70,10 @@ Format : `Authorization: Bearer <votre_token>`
 * `POST /api/predict` - Endpoint de prédiction
 * `GET /api/statistics` - Statistiques du monitoring
 * `GET /api/recent-predictions` - Dernières prédictions
+* `GET /api/export/predictions` - Export en flux de l'historique (CSV, NDJSON, Parquet)
+* `GET /api/admin/slow-queries` - Journal des requêtes SQL lentes
+* `GET /api/admin/profile` - Profil du processus (piles échantillonnées, format flamegraph)
+* `GET /api/admin/memory` - Mémoire du processus (RSS, tas Python, allocateur TensorFlow)
 * `POST /api/update-feedback` - Mise à jour du feedback
 * `GET /health` - État de santé de l'API
 * 🆕 `GET /metrics` - Métriques Prometheus (V3)
@@ -102,9 +112,26 @@ if ENABLE_PROMETHEUS:
     except Exception as e:
         print(f"⚠️  Could not setup Prometheus: {e}")
 
+# ⏱️ Horodatage de l'arrivée des requêtes (étape 'receive' du Server-Timing)
+app.add_middleware(RequestStartMiddleware)
+
 # Ajouter les routes
 app.include_router(router)
 
+# 💚 Sonde de santé DB/modèle en arrière-plan (/health répond depuis la mémoire)
+health_prober.start()
+
+# 🔀 Vérification du retard du réplica en arrière-plan (lectures de reporting)
+replica_router.start()
+
+# 🗓️ Partitions des mois à venir créées au démarrage puis périodiquement
+partition_scheduler = FuturePartitionScheduler(SessionLocal, PARTITION_CONFIG["check_interval_hours"] * 3600)
+partition_scheduler.start()
+
+# 🔥 Profilage continu à basse fréquence (optionnel, PROFILER_CONTINUOUS=true)
+if PROFILER_CONFIG["continuous"]:
+    continuous_profiler.start()
+
 # Optionnel : servir des fichiers statiques
 STATIC_DIR = ROOT_DIR / "src" / "web" / "static"
 if STATIC_DIR.exists():
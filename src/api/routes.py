@@ -1,14 +1,14 @@
 
-import io
-from PIL import Image
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request, Form, Query
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 import sys
 from pathlib import Path
 import time
 import os
+from datetime import datetime
+from typing import Optional
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 📂 CONFIGURATION PATHS
@@ -23,10 +23,21 @@ sys.path.insert(0, str(ROOT_DIR))
 # ─────────────────────────────────────────────────────────────────────────────
 from .auth import verify_token  # 🔐 Authentification JWT/Bearer
 from src.models.predictor import CatDogPredictor  # 🧠 Modèle CNN
+from src.utils.stage_timer import StageTimer  # ⏱️ Chronométrage par étape (Server-Timing)
 
 # Base de données (PostgreSQL)
-from src.database.db_connector import get_db  # 🗄️ Session SQLAlchemy
+from src.database.db_connector import engine, get_db, get_read_db, get_db_session  # 🗄️ Session SQLAlchemy (écriture / lecture réplica)
 from src.database.feedback_service import FeedbackService  # 📊 CRUD feedbacks
+from src.database.export_service import ExportService, EXPORT_FORMATS, PARQUET_AVAILABLE  # 📤 Export en flux
+from src.database.query_monitor import slow_query_log  # 🐢 Journal des requêtes lentes
+from config.settings import QUERY_MONITOR_CONFIG, PROFILER_CONFIG, HEALTH_CONFIG
+from starlette.concurrency import run_in_threadpool
+from src.monitoring.profiler import profile as run_profile  # 🔥 Profilage à la demande
+from src.monitoring.memory_monitor import memory_summary, heap_snapshots  # 🧮 Comptabilité mémoire
+from src.monitoring.latency_slo import latency_monitor  # ⏱️ Quantiles de latence et SLO
+from src.monitoring.drift_monitor import drift_monitor  # 🧭 Dérive des scores, des classes prédites et des images
+from src.monitoring.image_stats import image_stats_extractor  # 🖼️ Luminosité, contraste, format des images reçues
+from src.monitoring.health_prober import HealthProber  # 💚 Sonde de santé en arrière-plan
 
 # Monitoring V2 (Plotly dashboards - conservé)
 from src.monitoring.dashboard_service import DashboardService  # 📈 Graphiques Plotly
@@ -50,7 +61,8 @@ if ENABLE_PROMETHEUS:
             track_feedback as _track_feedback,         # Counter user_feedback_total
             track_low_confidence_prediction as _track_low_confidence_prediction,
             track_inference_time as _track_inference_time,
-            track_image_size as _track_image_size
+            track_image_size as _track_image_size,
+            track_request_stages as _track_request_stages
         )
         # 🔄 Renommage avec underscore pour éviter shadowing (bonne pratique)
         update_db_status = _update_db_status
@@ -58,6 +70,7 @@ if ENABLE_PROMETHEUS:
         track_inference_time = _track_inference_time
         track_low_confidence_prediction = _track_low_confidence_prediction
         track_image_size = _track_image_size
+        track_request_stages = _track_request_stages
         print("✅ Prometheus tracking functions loaded")
     except ImportError as e:
         ENABLE_PROMETHEUS = False  # Désactivation silencieuse
@@ -70,13 +83,21 @@ if ENABLE_PROMETHEUS:
 if ENABLE_DISCORD:
     try:
         from src.monitoring.discord_notifier import (
-            alert_high_latency as _alert_high_latency,
+            alert_latency_slo_breach as _alert_latency_slo_breach,
+            alert_latency_slo_recovered as _alert_latency_slo_recovered,
+            alert_prediction_drift as _alert_prediction_drift,
+            alert_prediction_drift_recovered as _alert_prediction_drift_recovered,
             alert_database_disconnected as _alert_database_disconnected,
             notifier as _notifier  # Instance DiscordNotifier globale
         )
-        alert_high_latency = _alert_high_latency
         alert_database_disconnected = _alert_database_disconnected
         notifier = _notifier
+        
+        # ⏱️ Alertes SLO de latence (p95/p99) : send_alert ne fait que mettre en file
+        latency_monitor.on_breach.append(_alert_latency_slo_breach)
+        latency_monitor.on_recover.append(_alert_latency_slo_recovered)
+        drift_monitor.on_drift.append(_alert_prediction_drift)
+        drift_monitor.on_recover.append(_alert_prediction_drift_recovered)
         print("✅ Discord notifier loaded")
     except ImportError as e:
         ENABLE_DISCORD = False
@@ -96,6 +117,13 @@ router = APIRouter()
 
 predictor = CatDogPredictor()
 
+# 💚 Sonde de santé (démarrée par main.py) : DB et modèle vérifiés en arrière-plan
+health_prober = HealthProber(engine, predictor.is_loaded, HEALTH_CONFIG["interval_seconds"])
+if ENABLE_PROMETHEUS:
+    health_prober.on_check.append(update_db_status)  # Gauge cv_database_connected
+if ENABLE_DISCORD:
+    health_prober.on_db_down.append(alert_database_disconnected)  # Au passage connecté → déconnecté
+
 # ═══════════════════════════════════════════════════════════════════════════
 # 🌐 PAGES WEB (Interface Utilisateur)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -150,6 +178,7 @@ async def inference_page(request: Request):
 
 @router.post("/api/predict", tags=["🧠 Inférence"])
 async def predict_api(
+    request: Request,
     file: UploadFile = File(...),
     rgpd_consent: bool = Form(False),
     token: str = Depends(verify_token),  # 🔐 Authentification requise
@@ -157,7 +186,14 @@ async def predict_api(
 ):
     """
     Endpoint de prédiction avec tracking complet
+    
+    ⏱️ L'en-tête Server-Timing détaille la durée de chaque étape :
+    receive, read, decode, resize, inference, image_stats, db, render
     """
+    # Étape 'receive' : réception de l'upload, parsing multipart et authentification
+    timer = StageTimer(start=getattr(request.state, "start_time", None))
+    timer.record("receive", timer.elapsed())
+    
     # ─────────────────────────────────────────────────────────────────────────
     # ✅ VALIDATIONS PRÉLIMINAIRES
     # ─────────────────────────────────────────────────────────────────────────
@@ -177,12 +213,14 @@ async def predict_api(
     # Alternative : time.time() (moins précis, impacté par ajustements NTP)
     
     try:
-        image_data = await file.read()
+        with timer.stage("read"):
+            image_data = await file.read()
         
-        result = predictor.predict(image_data)
+        result = predictor.predict(image_data, timer)  # Étapes decode, resize, inference
         end_time = time.perf_counter()
         inference_time_ms = int((end_time - start_time) * 1000)
-        track_inference_time(inference_time_ms)
+        if ENABLE_PROMETHEUS:
+            track_inference_time(inference_time_ms)
         proba_cat = result['probabilities']['cat'] * 100  # 0.95 → 95.0
         proba_dog = result['probabilities']['dog'] * 100
         # Stockage en pourcentage (plus intuitif en base)
@@ -191,24 +229,29 @@ async def predict_api(
             prediction_confidence = 'low'if result['confidence'] < 0.55 else 'normal'
             track_low_confidence_prediction(prediction_confidence)
         
-        if ENABLE_PROMETHEUS and track_image_size:
-            # enregistrement de la largeur et hauteur de l'image en pixel, à partir des données de l'image
-            image = Image.open(io.BytesIO(image_data))
-            width, height = image.size
-            track_image_size(width, height)
+        with timer.stage("image_stats"):
+            # Statistiques de l'image sur le tableau déjà décodé (budget IMAGE_STATS_BUDGET_MS)
+            image_features = image_stats_extractor.extract(result["image"])
+            if ENABLE_PROMETHEUS and track_image_size:
+                # enregistrement de la largeur et hauteur de l'image en pixel
+                track_image_size(result["image"]["width"], result["image"]["height"])
+            # 🧭 O(1) : incrément d'un bin par feature dans la fenêtre glissante de dérive
+            drift_monitor.observe({"raw_score": result["raw_score"], "predicted_class": result["prediction"],
+                                   **image_features})
         
-        feedback_record = FeedbackService.save_prediction_feedback(
-            db=db,
-            inference_time_ms=inference_time_ms,
-            success=True,
-            prediction_result=result["prediction"].lower(),  # 'cat' ou 'dog'
-            proba_cat=proba_cat,
-            proba_dog=proba_dog,
-            rgpd_consent=rgpd_consent,
-            filename=file.filename if rgpd_consent else None,  # Anonymisation
-            user_feedback=None,  # Sera mis à jour via /api/update-feedback
-            user_comment=None
-        )
+        with timer.stage("db"):
+            feedback_record = FeedbackService.save_prediction_feedback(
+                db=db,
+                inference_time_ms=inference_time_ms,
+                success=True,
+                prediction_result=result["prediction"].lower(),  # 'cat' ou 'dog'
+                proba_cat=proba_cat,
+                proba_dog=proba_dog,
+                rgpd_consent=rgpd_consent,
+                filename=file.filename if rgpd_consent else None,  # Anonymisation
+                user_feedback=None,  # Sera mis à jour via /api/update-feedback
+                user_comment=None
+            )
         response_data = {
             "filename": file.filename,
             "prediction": result["prediction"],  # "Cat" ou "Dog"
@@ -221,7 +264,14 @@ async def predict_api(
             "feedback_id": feedback_record.id  # Pour update feedback ultérieur
         }
         
-        return response_data
+        with timer.stage("render"):
+            response = JSONResponse(content=response_data)  # Sérialisation JSON
+        
+        response.headers["Server-Timing"] = timer.server_timing()
+        if ENABLE_PROMETHEUS and track_request_stages:
+            track_request_stages(timer.durations)
+        latency_monitor.observe(timer.elapsed() * 1000)  # Latence de bout en bout (p95/p99, SLO)
+        return response
         
     except Exception as e:
         # ─────────────────────────────────────────────────────────────────────
@@ -247,7 +297,12 @@ async def predict_api(
         except:
             pass  # Double échec = on abandonne (évite cascade)
         
-        raise HTTPException(status_code=500, detail=f"Erreur de prédiction: {str(e)}")
+        latency_monitor.observe(timer.elapsed() * 1000)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur de prédiction: {str(e)}",
+            headers={"Server-Timing": timer.server_timing()}
+        )
 
 # ═══════════════════════════════════════════════════════════════════════════
 # 📊 API FEEDBACK UTILISATEUR
@@ -312,7 +367,7 @@ async def update_feedback(
 # ═══════════════════════════════════════════════════════════════════════════
 
 @router.get("/api/statistics", tags=["📊 Monitoring"])
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(db: Session = Depends(get_read_db)):
     """
     Statistiques agrégées sur les prédictions
     """
@@ -325,10 +380,31 @@ async def get_statistics(db: Session = Depends(get_db)):
             detail=f"Erreur lors de la récupération des statistiques: {str(e)}"
         )
 
+@router.get("/api/statistics/long-range", tags=["📊 Monitoring"])
+async def get_long_range_statistics(
+    start: datetime,                     # Borne basse incluse (created_at)
+    end: datetime,                       # Borne haute exclue (created_at)
+    db: Session = Depends(get_read_db)   # 📖 Lecture de reporting (réplica si disponible)
+):
+    """
+    KPI temps d'inférence et satisfaction sur une période arbitraire
+    
+    Les mois déjà supprimés de la base sont lus depuis l'archive Parquet.
+    """
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start doit précéder end")
+    try:
+        return DashboardService.get_long_range_kpis(db, start, end)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erreur lors du calcul des KPI de la période: {str(e)}"
+        )
+
 @router.get("/api/recent-predictions", tags=["📊 Monitoring"])
 async def get_recent_predictions(
     limit: int = 10,  # Nombre de résultats (défaut : 10)
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)  # 📖 Lecture de reporting (réplica si disponible)
 ):
     """
     Liste des N dernières prédictions (triées par timestamp DESC)
@@ -361,6 +437,134 @@ async def get_recent_predictions(
             detail=f"Erreur lors de la récupération des prédictions: {str(e)}"
         )
 
+@router.get("/api/export/predictions", tags=["📊 Monitoring"])
+async def export_predictions(
+    export_format: str = Query("csv", alias="format"),  # csv, ndjson ou parquet
+    start: Optional[datetime] = None,                    # Borne basse incluse (created_at)
+    end: Optional[datetime] = None,                      # Borne haute exclue (created_at)
+    rgpd_consent: Optional[bool] = None,
+    has_feedback: Optional[bool] = None,
+    user_feedback: Optional[int] = None,                 # 0 ou 1
+    token: str = Depends(verify_token)                   # 🔐 Authentification requise
+):
+    """
+    Export en flux de l'historique complet des prédictions
+    
+    Lecture par curseur côté serveur et réponse en transfert chunked :
+    mémoire constante quelle que soit la taille de l'export.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format inconnu, formats disponibles : {', '.join(EXPORT_FORMATS)}"
+        )
+    if export_format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Export Parquet indisponible (pyarrow non installé)")
+    
+    filters = {
+        "start": start,
+        "end": end,
+        "rgpd_consent": rgpd_consent,
+        "has_feedback": has_feedback,
+        "user_feedback": user_feedback,
+    }
+    
+    def generate():
+        # Session dédiée (réplica si disponible) : elle doit rester ouverte pendant toute la durée du flux
+        db = get_db_session(readonly=True)
+        try:
+            yield from ExportService.stream(ExportService.iter_batches(db, **filters), export_format)
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        generate(),  # Itérateur synchrone : exécuté dans le threadpool, n'en bloque pas la boucle
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="predictions_export.{export_format}"'}
+    )
+
+@router.get("/api/admin/slow-queries", tags=["📊 Monitoring"])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    token: str = Depends(verify_token)  # 🔐 Authentification requise
+):
+    """
+    Dernières requêtes SQL plus lentes que le seuil configuré (DB_SLOW_QUERY_MS)
+    
+    Les requêtes sont normalisées (aucun paramètre conservé) ; le plan
+    EXPLAIN ANALYZE est joint aux requêtes échantillonnées.
+    """
+    queries = slow_query_log.entries(limit)
+    return {
+        "threshold_ms": QUERY_MONITOR_CONFIG["slow_query_ms"],
+        "explain_sample_rate": QUERY_MONITOR_CONFIG["explain_sample_rate"],
+        "count": len(queries),
+        "queries": queries
+    }
+
+@router.get("/api/admin/profile", tags=["📊 Monitoring"])
+def profile_process(
+    seconds: float = Query(10, gt=0),
+    interval_ms: Optional[float] = Query(None, gt=0),
+    token: str = Depends(verify_token)  # 🔐 Authentification requise
+):
+    """
+    Profil statistique du processus pendant N secondes (tous les threads)
+    
+    Renvoie un fichier « collapsed stacks » (flamegraph.pl, speedscope).
+    Durée plafonnée à PROFILER_MAX_SECONDS, une capture à la fois.
+    Endpoint synchrone : la capture s'exécute dans le threadpool, la boucle
+    asyncio (et ce qui la bloque) apparaît donc dans le profil.
+    """
+    if seconds > PROFILER_CONFIG["max_seconds"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Durée maximale : {PROFILER_CONFIG['max_seconds']:g} secondes"
+        )
+    
+    result = run_profile(seconds, interval_ms)
+    if result is None:
+        raise HTTPException(status_code=409, detail="Un profilage est déjà en cours")
+    
+    collapsed, stats = result
+    return PlainTextResponse(
+        collapsed,
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{datetime.now():%Y%m%d-%H%M%S}.collapsed"',
+            "X-Profile-Samples": str(stats["samples"]),
+            "X-Profile-Overhead": str(stats["overhead"]),  # Fraction d'un cœur utilisée par l'échantillonnage
+        }
+    )
+
+@router.get("/api/admin/memory", tags=["📊 Monitoring"])
+async def get_memory(token: str = Depends(verify_token)):
+    """
+    Mémoire du processus : RSS, tas Python (tracemalloc) et allocateur TensorFlow
+    """
+    return memory_summary()
+
+@router.get("/api/admin/memory/tracemalloc", tags=["📊 Monitoring"])
+def get_heap_diff(
+    top: int = Query(20, ge=1, le=200),
+    stop: bool = False,                  # True pour désactiver le suivi
+    token: str = Depends(verify_token)   # 🔐 Authentification requise
+):
+    """
+    Croissance du tas Python depuis l'appel précédent (top N des lignes de code)
+    
+    Le premier appel active tracemalloc et prend le snapshot de référence ;
+    chaque appel suivant renvoie la différence puis devient la référence.
+    tracemalloc ralentit les allocations : l'arrêter (stop=true) après le diagnostic.
+    """
+    if stop:
+        heap_snapshots.stop()
+        return {"tracing": False}
+    
+    diff = heap_snapshots.diff(top)
+    if diff is None:
+        return {"tracing": True, "message": "Suivi activé, snapshot de référence enregistré", "top": []}
+    return {"tracing": True, "top": diff}
+
 @router.get("/api/info", tags=["🧠 Inférence"])
 async def api_info():
     """
@@ -387,7 +591,7 @@ async def api_info():
     }
 
 @router.get("/monitoring", response_class=HTMLResponse, tags=["📊 Monitoring"])
-async def monitoring_dashboard(request: Request, db: Session = Depends(get_db)):
+async def monitoring_dashboard(request: Request, db: Session = Depends(get_read_db)):
     """
     📊 Dashboard de monitoring V2 (Plotly - conservé)
     
@@ -421,39 +625,32 @@ async def monitoring_dashboard(request: Request, db: Session = Depends(get_db)):
 # ═══════════════════════════════════════════════════════════════════════════
 
 @router.get("/health", tags=["💚 Santé système"])
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(deep: bool = False):
     """
     Vérification de l'état de l'API et de la base de données
+    
+    Répond depuis le dernier état de la sonde de santé (aucune requête SQL).
+    deep=true force une vérification immédiate de la base.
     """
-    db_status = "connected"
-    db_connected = True
+    checks = await run_in_threadpool(health_prober.check) if deep else health_prober.status()
+    
+    if checks["db_connected"] is None:
+        db_status = "unknown"  # Première vérification en cours
+    elif checks["db_connected"]:
+        db_status = "connected"
+    else:
+        db_status = f"error: {checks['db_error']}"
     
-    try:
-        from sqlalchemy import text
-        db.execute(text("SELECT 1"))
-        
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-        db_connected = False
-        if ENABLE_DISCORD:
-            try:
-                if alert_database_disconnected:
-                    alert_database_disconnected()
-            except Exception as discord_error:
-                print(f"⚠️  Discord alert failed: {discord_error}")
-    if ENABLE_PROMETHEUS and update_db_status:
-        try:
-            update_db_status(db_connected)
-        except Exception as e:
-            print(f"⚠️  Prometheus status update failed: {e}")
     return {
         "status": "healthy" if db_status == "connected" else "degraded",
         # "degraded" = service up mais fonctionnalité réduite (feedback disabled)
         "model_loaded": predictor.is_loaded(),
         "database": db_status,
+        "checks": checks,  # Horodatages et latence de la dernière vérification
+        "latency": latency_monitor.snapshot(),  # p50/p95/p99 sur la fenêtre glissante et état des SLO
         # 🆕 V3 - Info monitoring
         "monitoring": {
             "prometheus": ENABLE_PROMETHEUS,
             "discord": ENABLE_DISCORD
         }
-    }
\ No newline at end of file
+    }
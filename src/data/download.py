@@ -0,0 +1,284 @@
+"""
+Téléchargement des jeux de données (DATA_URLS)
+
+- Requêtes HTTP Range : le fichier est découpé en plages de chunk_size,
+  téléchargées en parallèle dans un fichier préalloué (<dest>.part)
+- Reprise : les plages terminées sont enregistrées dans <dest>.part.json ;
+  une exécution interrompue ne retélécharge que les plages manquantes, tant
+  que la taille et l'ETag / Last-Modified distants sont inchangés
+- Intégrité : sha256 vérifié avant de renommer <dest>.part en <dest>, puis
+  enregistré dans <dest>.sha256 pour contrôler les lancements suivants
+- Débit et temps restant affichés pendant le téléchargement
+
+Un serveur qui ignore les Range est téléchargé séquentiellement (sans reprise).
+"""
+
+import errno
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.settings import DATA_URLS, DOWNLOAD_CONFIG, RAW_DATA_DIR
+
+BLOCK_SIZE = 1024 * 1024  # Lecture du flux HTTP et calcul du sha256
+IDENTITY = {"Accept-Encoding": "identity"}  # Les Range portent sur les octets bruts, pas sur un flux gzip
+MB = 1024 * 1024
+
+
+class DownloadProgress:
+    """Octets reçus, débit et temps restant (affichage limité à un rafraîchissement par interval)"""
+
+    def __init__(self, total: Optional[int], done: int = 0, label: str = "", interval: float = 1.0):
+        self.total = total
+        self.done = done
+        self.label = label
+        self.interval = interval
+        self.received = 0  # Octets reçus pendant cette exécution (base du débit)
+        self.start = time.perf_counter()
+        self._last_print = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, nbytes: int):
+        with self._lock:
+            self.done += nbytes
+            self.received += nbytes
+            now = time.perf_counter()
+            if now - self._last_print >= self.interval:
+                self._last_print = now
+                print(f"\r{self.status(now)}", end="", flush=True)
+
+    def throughput(self, now: Optional[float] = None) -> float:
+        """Débit moyen en octets/s depuis le début de cette exécution"""
+        elapsed = (now or time.perf_counter()) - self.start
+        return self.received / elapsed if elapsed > 0 else 0.0
+
+    def status(self, now: Optional[float] = None) -> str:
+        rate = self.throughput(now)
+        if not self.total:
+            return f"📥 {self.label} {self.done / MB:.1f} Mo  {rate / MB:.1f} Mo/s"
+        eta = (self.total - self.done) / rate if rate else float("inf")
+        return (f"📥 {self.label} {100 * self.done / self.total:5.1f}%  "
+                f"{self.done / MB:.1f}/{self.total / MB:.1f} Mo  {rate / MB:.1f} Mo/s  ETA {eta:.0f}s")
+
+    def finish(self):
+        elapsed = time.perf_counter() - self.start
+        print(f"\r{self.status()}")
+        print(f"✅ {self.label}: {self.received / MB:.1f} Mo reçus en {elapsed:.1f}s")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(4 * BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def checksum_path(dest: Path) -> Path:
+    return dest.with_name(dest.name + ".sha256")
+
+
+def recorded_checksum(dest: Path) -> Optional[str]:
+    """Empreinte enregistrée après le dernier téléchargement réussi (format sha256sum)"""
+    path = checksum_path(dest)
+    return path.read_text(encoding="utf-8").split()[0] if path.exists() else None
+
+
+def probe(session: requests.Session, url: str, timeout: float) -> Dict:
+    """
+    Taille, support des Range et validateur (ETag / Last-Modified) de la ressource
+
+    Requête Range sur le premier octet plutôt que HEAD (souvent mal servi par les CDN) :
+    une réponse 206 avec Content-Range confirme le support des plages.
+    """
+    headers = {"Range": "bytes=0-0", **IDENTITY}
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            if total.isdigit():
+                return {"size": int(total), "ranges": True, "validator": validator}
+        length = response.headers.get("Content-Length")
+        return {"size": int(length) if length else None, "ranges": False, "validator": validator}
+
+
+def _preallocate(path: Path, size: int):
+    """Fichier de la taille finale (posix_fallocate : disque plein détecté dès le départ)"""
+    with open(path, "wb") as f:
+        f.truncate(size)
+        if size and hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    raise
+                # Système de fichiers sans fallocate : fichier creux, rempli par les plages
+
+
+def _load_state(state_path: Path) -> Optional[Dict]:
+    try:
+        return json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _save_state(state_path: Path, state: Dict):
+    tmp_path = state_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp_path, state_path)
+
+
+def _fetch_range(session: requests.Session, url: str, part_path: Path, start: int, end: int,
+                 retries: int, timeout: float, progress: DownloadProgress):
+    """Télécharge les octets [start, end] à leur position dans le fichier préalloué"""
+    expected = end - start + 1
+    for attempt in range(retries + 1):
+        written = 0
+        try:
+            headers = {"Range": f"bytes={start}-{end}", **IDENTITY}
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise requests.HTTPError(f"Plage ignorée par le serveur (HTTP {response.status_code})")
+                with open(part_path, "r+b") as f:  # Un descripteur par plage : écritures parallèles indépendantes
+                    f.seek(start)
+                    for block in response.iter_content(BLOCK_SIZE):
+                        block = block[:expected - written]  # Jamais au-delà de la plage
+                        f.write(block)
+                        written += len(block)
+                        progress.update(len(block))
+            if written != expected:
+                raise requests.ConnectionError(f"Plage incomplète : {written}/{expected} octets")
+            return
+        except requests.RequestException as e:
+            progress.update(-written)
+            if attempt == retries:
+                raise
+            print(f"\n⚠️  Plage {start}-{end} : {e} (nouvelle tentative {attempt + 1}/{retries})")
+            time.sleep(0.5 * 2 ** attempt)
+
+
+def _download_ranges(session: requests.Session, url: str, part_path: Path, state_path: Path, info: Dict,
+                     label: str, workers: int, chunk_size: int, retries: int, timeout: float):
+    size = info["size"]
+    chunks: List[Tuple[int, int]] = [(start, min(start + chunk_size, size) - 1)
+                                     for start in range(0, size, chunk_size)]
+    state = {"url": url, "size": size, "validator": info["validator"], "chunk_size": chunk_size, "done": []}
+
+    previous = _load_state(state_path)
+    if (previous and part_path.exists() and part_path.stat().st_size == size
+            and all(previous.get(key) == state[key] for key in ("url", "size", "validator", "chunk_size"))):
+        state["done"] = sorted(set(previous["done"]))
+        print(f"↩️  Reprise de {label}: {len(state['done'])}/{len(chunks)} plages déjà téléchargées")
+    else:
+        _preallocate(part_path, size)
+        _save_state(state_path, state)
+
+    done = set(state["done"])
+    pending = [i for i in range(len(chunks)) if i not in done]
+    progress = DownloadProgress(size, done=sum(chunks[i][1] - chunks[i][0] + 1 for i in done), label=label)
+    lock = threading.Lock()
+
+    def fetch(i: int):
+        _fetch_range(session, url, part_path, *chunks[i], retries, timeout, progress)
+        with lock:  # Plage enregistrée seulement une fois entièrement écrite
+            state["done"].append(i)
+            _save_state(state_path, state)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(fetch, i) for i in pending]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            for future in futures:  # Les plages en cours se terminent (et restent acquises pour la reprise)
+                future.cancel()
+            print()
+            raise
+    progress.finish()
+
+
+def _download_stream(session: requests.Session, url: str, part_path: Path, info: Dict,
+                     label: str, timeout: float):
+    print(f"⚠️  {label}: le serveur ne gère pas les requêtes Range, téléchargement séquentiel sans reprise")
+    progress = DownloadProgress(info["size"], label=label)
+    with session.get(url, headers=IDENTITY, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        with open(part_path, "wb") as f:
+            for block in response.iter_content(BLOCK_SIZE):
+                f.write(block)
+                progress.update(len(block))
+    progress.finish()
+
+
+def download_file(url: str, dest: Path, sha256: Optional[str] = None,
+                  workers: int = DOWNLOAD_CONFIG["workers"],
+                  chunk_size: int = DOWNLOAD_CONFIG["chunk_size"],
+                  retries: int = DOWNLOAD_CONFIG["retries"],
+                  timeout: float = DOWNLOAD_CONFIG["timeout_seconds"],
+                  session: Optional[requests.Session] = None) -> Path:
+    """
+    Télécharge url vers dest (ignoré si dest existe déjà avec la bonne empreinte)
+
+    Args:
+        sha256: Empreinte attendue ; sans elle, celle du dernier téléchargement
+            (<dest>.sha256) contrôle seulement un fichier déjà présent
+
+    Raises:
+        ValueError: sha256 du fichier téléchargé différent de l'empreinte attendue
+        requests.RequestException: Échec réseau après les nouvelles tentatives
+            (les plages terminées sont conservées pour la reprise)
+    """
+    dest = Path(dest)
+    expected = sha256 or recorded_checksum(dest)
+    if dest.exists():
+        if expected is None or file_sha256(dest) == expected:
+            print(f"✅ Déjà téléchargé: {dest}")
+            return dest
+        print(f"⚠️  Empreinte invalide, nouveau téléchargement: {dest}")
+        dest.unlink()
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part_path = dest.with_name(dest.name + ".part")
+    state_path = dest.with_name(dest.name + ".part.json")
+    session = session or requests.Session()
+
+    info = probe(session, url, timeout)
+    if info["ranges"]:
+        _download_ranges(session, url, part_path, state_path, info, dest.name, workers, chunk_size, retries, timeout)
+    else:
+        _download_stream(session, url, part_path, info, dest.name, timeout)
+
+    digest = file_sha256(part_path)
+    if sha256 and digest != sha256:
+        part_path.unlink()
+        state_path.unlink(missing_ok=True)
+        raise ValueError(f"sha256 invalide pour {url} : {digest} (attendu {sha256})")
+
+    os.replace(part_path, dest)
+    state_path.unlink(missing_ok=True)
+    checksum_path(dest).write_text(f"{digest}  {dest.name}\n", encoding="utf-8")
+    print(f"🔒 sha256 {digest}")
+    return dest
+
+
+def download_datasets(names: Optional[Iterable[str]] = None, dest_dir: Path = RAW_DATA_DIR, **options) -> Dict[str, Path]:
+    """Télécharge les jeux de données de DATA_URLS (tous par défaut) dans dest_dir"""
+    paths = {}
+    for name in names or DATA_URLS:
+        url = DATA_URLS[name]
+        dest = Path(dest_dir) / Path(urlparse(url).path).name
+        paths[name] = download_file(url, dest, sha256=DOWNLOAD_CONFIG["sha256"].get(name), **options)
+    return paths
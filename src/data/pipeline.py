@@ -0,0 +1,194 @@
+"""
+Pipeline d'entrée tf.data de l'entraînement (configuré par MODEL_CONFIG)
+
+Chaque source (shards, répertoire JPEG, archive zip) produit des images uint8
+décodées et redimensionnées, non batchées ; input_pipeline applique ensuite
+la même fin de chaîne :
+    cache (mémoire, fichier ou aucun) → shuffle → batch → float32 → prefetch
+
+- Le cache stocke des uint8 : 4× moins de mémoire que les batches float32
+- cache "auto" : en mémoire si les images décodées et le buffer de mélange
+  tiennent dans ram_budget_mb, sinon fichier sur disque
+- deterministic=False : map / interleave rendent les éléments dès qu'ils
+  sont prêts plutôt que dans l'ordre d'entrée
+- epoch_batches : batches d'une epoch reproductibles (reprise d'un
+  entraînement interrompu au milieu d'une epoch)
+- InputStallMonitor : temps d'attente du pipeline par epoch
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import tensorflow as tf
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from src.data.shards import CLASS_NAMES
+
+CACHE_STRATEGIES = ("memory", "disk", "none")
+
+
+def decoded_size_bytes(num_images: int, image_size: Tuple[int, int]) -> int:
+    """Taille des images décodées en uint8 (contenu d'un cache)"""
+    return num_images * image_size[0] * image_size[1] * 3
+
+
+def choose_cache(strategy: str, num_images: int, image_size: Tuple[int, int],
+                 ram_budget_mb: int, shuffle_buffer: int = 0) -> str:
+    """
+    Stratégie de cache effective ('auto' résolu selon le budget mémoire)
+
+    Le buffer de mélange est compté dans le budget : il garde shuffle_buffer
+    images décodées en mémoire, avec ou sans cache.
+    """
+    if strategy != "auto":
+        if strategy not in CACHE_STRATEGIES:
+            raise ValueError(f"Cache inconnu : {strategy} (attendu : auto, {', '.join(CACHE_STRATEGIES)})")
+        return strategy
+    needed = decoded_size_bytes(num_images + shuffle_buffer, image_size)
+    return "memory" if needed <= ram_budget_mb * 1024 * 1024 else "disk"
+
+
+def cache_path(cache_dir: Path, name: str) -> Path:
+    """
+    Préfixe des fichiers de cache tf.data de name (<version du contenu>_<source>_<split>)
+
+    Les caches d'autres versions du contenu et les verrous de name laissés par
+    une exécution interrompue sont supprimés : tf.data ne détecte ni l'un ni
+    l'autre. Les verrous des autres caches (autres workers) sont conservés.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    version = name.split("_")[0]
+    for path in cache_dir.iterdir():
+        stale_lock = path.name.startswith(f"{name}_") and path.name.endswith(".lockfile")
+        if path.is_file() and (not path.name.startswith(version) or stale_lock):
+            path.unlink()
+    return cache_dir / name
+
+
+def cache_images(dataset, cache: str = "none", cache_file: Optional[Path] = None):
+    """Cache des images décodées ('memory', 'disk' dans cache_file ou 'none')"""
+    if cache == "memory":
+        return dataset.cache()
+    if cache == "disk":
+        return dataset.cache(str(cache_file))
+    return dataset
+
+
+def batch_images(dataset, batch_size: int, shuffle_buffer: int = 0, seed: Optional[int] = None,
+                 reshuffle: bool = True):
+    """Mélange, batches float32 / int32 et prefetch"""
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=reshuffle)
+    dataset = dataset.batch(batch_size).map(
+        lambda images, labels: (tf.cast(images, tf.float32), tf.cast(labels, tf.int32)),
+        num_parallel_calls=tf.data.AUTOTUNE
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def input_pipeline(dataset, batch_size: int, cache: str = "none", cache_file: Optional[Path] = None,
+                   shuffle_buffer: int = 0, seed: Optional[int] = None):
+    """Fin de chaîne commune à toutes les sources (voir docstring du module)"""
+    return batch_images(cache_images(dataset, cache, cache_file), batch_size, shuffle_buffer, seed)
+
+
+def epoch_batches(images: Callable[[int], tf.data.Dataset], batch_size: int, shuffle_buffer: int = 0,
+                  seed: int = 0) -> Callable[[int], tf.data.Dataset]:
+    """
+    Batches d'entraînement de chaque epoch, identiques d'une exécution à l'autre
+
+    Args:
+        images: epoch -> images non batchées ; le même dataset caché pour
+            toutes les epochs, ou une source reconstruite avec la graine
+            seed + epoch sans cache
+    Returns:
+        epoch -> batches, mélangés avec la graine seed + epoch : une
+        exécution reprise à l'epoch e relit exactement les mêmes batches, à
+        condition que la source rende ses éléments dans un ordre fixe
+        (deterministic=True, imposé par CatDogTrainer quand les checkpoints
+        sont actifs)
+    """
+    def batches(epoch: int):
+        return batch_images(images(epoch), batch_size, shuffle_buffer, seed + epoch, reshuffle=False)
+    return batches
+
+
+def directory_images(data_path: Path, keys: Sequence[str], image_size: Tuple[int, int],
+                     num_parallel_calls: int = tf.data.AUTOTUNE, deterministic: bool = False):
+    """
+    Images d'un répertoire PetImages (clés du manifeste), décodées en parallèle
+
+    Même décodage que image_dataset_from_directory (tf.io + resize bilinéaire),
+    arrondi en uint8 pour le cache.
+    """
+    width, height = image_size
+    paths = [str(Path(data_path) / key) for key in keys]
+    labels = [CLASS_NAMES.index(key.split("/")[0]) for key in keys]
+
+    def decode(path, label):
+        image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        image = tf.image.resize(image, (height, width))
+        return tf.saturate_cast(tf.round(image), tf.uint8), label
+
+    dataset = tf.data.Dataset.from_tensor_slices((paths, tf.constant(labels, tf.int32)))
+    return dataset.map(decode, num_parallel_calls=num_parallel_calls, deterministic=deterministic)
+
+
+class InputStallMonitor(tf.keras.callbacks.Callback):
+    """
+    Temps passé par l'entraînement à attendre le pipeline d'entrée, par epoch
+
+    watch() horodate la livraison de chaque batch en fin de pipeline ; l'attente
+    d'un pas est la durée entre son début et la livraison de son batch (nulle
+    si le batch était déjà prêt dans le buffer de prefetch).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.history: List[Dict] = []  # Une entrée par epoch
+        self._lock = threading.Lock()
+        self._delivered: Optional[float] = None
+        self._epoch_start = self._step_start = self._last_step_end = 0.0
+        self._stall = 0.0
+        self._steps = 0
+
+    def _record_delivery(self):
+        with self._lock:
+            self._delivered = time.perf_counter()
+        return 0.0
+
+    def watch(self, dataset):
+        """Dataset identique, avec l'horodatage des batches livrés"""
+        def stamp(images, labels):
+            delivered = tf.py_function(self._record_delivery, [], tf.float64)
+            with tf.control_dependencies([delivered]):
+                return tf.identity(images), tf.identity(labels)
+        return dataset.map(stamp)
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = self._last_step_end = time.perf_counter()
+        self._stall = 0.0
+        self._steps = 0
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._step_start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._last_step_end = time.perf_counter()
+        with self._lock:
+            delivered = self._delivered
+        if delivered is not None and delivered > self._step_start:
+            self._stall += delivered - self._step_start
+        self._steps += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        train_seconds = self._last_step_end - self._epoch_start  # Hors validation
+        ratio = self._stall / train_seconds if train_seconds > 0 else 0.0
+        self.history.append({"epoch": epoch + 1, "steps": self._steps, "stall_seconds": round(self._stall, 3),
+                             "train_seconds": round(train_seconds, 3), "stall_ratio": round(ratio, 4)})
+        print(f"⏱️  Epoch {epoch + 1}: attente du pipeline d'entrée {self._stall:.1f}s "
+              f"sur {train_seconds:.1f}s d'entraînement ({ratio:.0%}, {self._steps} pas)")
@@ -1,50 +1,227 @@
+import hashlib
+import io
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
 from PIL import Image, ImageFile
 from pathlib import Path
+from typing import Dict
 import shutil
 import sys
 
 # Ajouter le répertoire config au path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from config.settings import RAW_DATA_DIR, TEMP_DIR
+from config.settings import RAW_DATA_DIR, TEMP_DIR, PREPROCESSING_CONFIG
+from src.data.zip_source import ZipImageArchive, read_image_bytes
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
-def clean_corrupted_images(data_path: Path) -> int:
-    """Nettoyage des images corrompues"""
-    num_skipped = 0
-    total_files = 0
+def validate_image_bytes(content: bytes, name: str) -> Dict:
+    """
+    Vérifie une image (exécuté dans un processus du pool)
     
+    Returns:
+        dict: sha256 du contenu, dimensions décodées, valid et reason (None si valide)
+    """
+    entry = {"sha256": hashlib.sha256(content).hexdigest(), "width": None, "height": None,
+             "valid": False, "reason": None}
+    try:
+        with Image.open(io.BytesIO(content)) as img:
+            img.verify()
+        
+        if Path(name).suffix.lower() in ['.jpg', '.jpeg'] and not (b"JFIF" in content[:20] or b"Exif" in content[:20]):
+            entry["reason"] = "JPEG invalide"
+            return entry
+        
+        with Image.open(io.BytesIO(content)) as img:  # verify() invalide l'objet : réouverture pour décoder
+            img.load()
+            entry["width"], entry["height"] = img.size
+        entry["valid"] = True
+    except Exception as e:
+        entry["reason"] = f"{type(e).__name__}: {e}"
+    return entry
+
+def validate_image(path: Path) -> Dict:
+    """Vérifie un fichier image (voir validate_image_bytes)"""
+    path = Path(path)
+    return validate_image_bytes(path.read_bytes(), path.name)
+
+def _validate_source_image(key: str, source) -> Dict:
+    return validate_image_bytes(read_image_bytes(source, key), key)
+
+def load_manifest(manifest_path: Path) -> Dict:
+    manifest_path = Path(manifest_path)
+    if not manifest_path.exists():
+        return {"files": {}, "quarantined": {}}
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+def save_manifest(manifest_path: Path, manifest: Dict):
+    """Écriture atomique (un entraînement interrompu ne laisse pas de manifeste tronqué)"""
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp_path, manifest_path)
+
+def quarantine_file(fpath: Path, data_path: Path, quarantine_dir: Path) -> Path:
+    """Déplace une image invalide hors du jeu de données (même arborescence Cat/Dog)"""
+    target = Path(quarantine_dir) / fpath.relative_to(data_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists() and os.path.samefile(fpath, target):
+        # Lien physique vers la copie déjà en quarantaine : rename serait sans effet (POSIX)
+        fpath.unlink()
+    else:
+        shutil.move(str(fpath), str(target))
+    return target
+
+def _source_stamps(source) -> Dict[str, Dict]:
+    """Empreinte de chaque image (clé relative 'Cat/0.jpg') pour détecter les changements"""
+    if isinstance(source, ZipImageArchive):
+        return {key: {"size": member["size"], "crc": member["crc"]} for key, member in source.index().items()}
+    stamps = {}
     for folder_name in ("Cat", "Dog"):
-        folder_path = data_path / folder_name
+        folder_path = source / folder_name
         if not folder_path.exists():
             continue
-            
-        files = list(folder_path.glob("*"))
-        total_files += len(files)
-        
-        for fpath in files:
-            try:
-                with Image.open(fpath) as img:
-                    img.verify()
-                
-                if fpath.suffix.lower() in ['.jpg', '.jpeg']:
-                    with open(fpath, 'rb') as f:
-                        content = f.read(20)
-                        if not (b"JFIF" in content or b"Exif" in content):
-                            raise Exception("JPEG invalide")
-                            
-            except Exception:
-                num_skipped += 1
-                fpath.unlink()
-                if num_skipped % 100 == 0:
-                    print(f"Nettoyage: {num_skipped} images supprimées")
-    
-    print(f"Nettoyage terminé: {num_skipped}/{total_files} images supprimées")
-    return num_skipped
-
-def setup_data_directory() -> Path:
-    """Configuration du répertoire de données"""
+        for fpath in folder_path.glob("*"):
+            stat = fpath.stat()
+            stamps[fpath.relative_to(source).as_posix()] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    return stamps
+
+def validate_dataset(data_path: Path,
+                     manifest_path: Path = PREPROCESSING_CONFIG["manifest_path"],
+                     quarantine_dir: Path = PREPROCESSING_CONFIG["quarantine_dir"],
+                     workers: int = PREPROCESSING_CONFIG["workers"]) -> Dict:
+    """
+    Validation incrémentale et parallèle des images de data_path
+    (répertoire PetImages ou ZipImageArchive)
+    
+    - Manifeste : une entrée par fichier (chemin relatif, taille, mtime ou CRC
+      du membre de l'archive, sha256, dimensions décodées, valid / reason)
+    - Seuls les fichiers nouveaux ou modifiés sont revérifiés, en parallèle
+      dans un pool de processus
+    - Les images invalides d'un répertoire sont déplacées dans quarantine_dir
+      (pas supprimées) ; celles d'une archive restent marquées invalides
+    
+    Returns:
+        dict: Compteurs (total, checked, reused, quarantined) et durée
+    """
+    start = time.perf_counter()
+    archive = isinstance(data_path, ZipImageArchive)
+    source = data_path if archive else Path(data_path)
+    manifest = load_manifest(manifest_path)
+    previous = manifest["files"]
+    
+    files, to_check = {}, []
+    for key, stamp in _source_stamps(source).items():
+        entry = previous.get(key) or manifest["quarantined"].get(key)  # Fichier invalide re-préparé
+        if entry and all(entry.get(field) == value for field, value in stamp.items()):
+            files[key] = entry
+        else:
+            files[key] = dict(stamp)
+            to_check.append(key)
+    
+    if to_check:
+        check = partial(_validate_source_image, source=source)
+        if workers > 1 and len(to_check) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(check, to_check, chunksize=64))
+        else:
+            results = [check(key) for key in to_check]
+        for key, result in zip(to_check, results):
+            files[key].update(result)
+    
+    quarantined = 0
+    for key, entry in list(files.items()):
+        if entry["valid"] or archive:  # Archive en lecture : les invalides restent exclus via le manifeste
+            continue
+        target = quarantine_file(source / key, source, quarantine_dir)
+        manifest["quarantined"][key] = {**files.pop(key), "quarantined_to": str(target)}
+        quarantined += 1
+    
+    manifest["files"] = files
+    manifest["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    save_manifest(manifest_path, manifest)
+    
+    summary = {
+        "total": len(files) + quarantined,
+        "checked": len(to_check),
+        "reused": len(files) + quarantined - len(to_check),
+        "quarantined": quarantined,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    print(f"Validation: {summary['checked']} images vérifiées, {summary['reused']} reprises du manifeste, "
+          f"{quarantined} mises en quarantaine ({summary['seconds']}s)")
+    return summary
+
+def clean_corrupted_images(data_path: Path) -> int:
+    """Nettoyage des images corrompues (mises en quarantaine, voir validate_dataset)"""
+    return validate_dataset(data_path)["quarantined"]
+
+# Systèmes de fichiers réseau : lire chaque image à chaque epoch coûte plus qu'une copie locale
+SLOW_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "fuse.sshfs", "fuse.s3fs", "fuse.gcsfuse"}
+
+def filesystem_type(path: Path) -> str:
+    """Type du système de fichiers contenant path (point de montage le plus long, /proc/mounts)"""
+    path = str(Path(path).resolve())
+    best, fs_type = "", "unknown"
+    try:
+        with open("/proc/mounts", encoding="utf-8") as mounts:
+            for line in mounts:
+                fields = line.split()
+                mount_point = fields[1]
+                if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) > len(best):
+                    best, fs_type = mount_point, fields[2]
+    except OSError:
+        pass
+    return fs_type
+
+def choose_staging_mode(source_path: Path, target_root: Path, mode: str = "auto") -> str:
+    """
+    Mode de préparation du répertoire de travail
+    
+    - hardlink : même système de fichiers, accessible en écriture (aucune copie, aucun espace disque)
+    - symlink : autre système de fichiers ou source en lecture seule
+    - copy : source sur un système de fichiers réseau (lent à relire à chaque epoch),
+      ou plateforme non POSIX (Windows : liens symboliques soumis à privilège)
+    """
+    if mode != "auto":
+        return mode
+    if not hasattr(os, "statvfs") or filesystem_type(source_path) in SLOW_FILESYSTEMS:
+        return "copy"
+    read_only = bool(os.statvfs(source_path).f_flag & os.ST_RDONLY)
+    if not read_only and os.stat(source_path).st_dev == os.stat(target_root).st_dev:
+        return "hardlink"
+    return "symlink"
+
+def stage_file(source: Path, target: Path, mode: str):
+    if mode == "hardlink":
+        os.link(source, target)
+    elif mode == "symlink":
+        os.symlink(source.resolve(), target)
+    else:
+        shutil.copy2(source, target)
+
+def staged_data_path() -> Path:
+    """Répertoire préparé par setup_data_directory, sans le modifier (workers autres que le chief)"""
+    target_path = TEMP_DIR / "PetImages"
+    return target_path if target_path.exists() else RAW_DATA_DIR / "PetImages"
+
+
+def setup_data_directory(mode: str = PREPROCESSING_CONFIG["staging_mode"],
+                         manifest_path: Path = PREPROCESSING_CONFIG["manifest_path"]) -> Path:
+    """
+    Configuration du répertoire de données
+    
+    Le répertoire de travail (TEMP_DIR/PetImages) reçoit des liens vers les images
+    source plutôt qu'une copie : la quarantaine de validate_dataset y déplace les
+    fichiers invalides sans jamais modifier RAW_DATA_DIR. Préparation incrémentale :
+    seuls les fichiers absents du répertoire de travail sont ajoutés, hors images
+    en quarantaine dans le manifeste (tant que leur source n'a pas changé).
+    """
     # Créer le répertoire temporaire
     TEMP_DIR.mkdir(parents=True, exist_ok=True)
     
@@ -52,8 +229,38 @@ def setup_data_directory() -> Path:
     source_path = RAW_DATA_DIR / "PetImages"
     target_path = TEMP_DIR / "PetImages"
     
-    if source_path.exists() and not target_path.exists():
-        shutil.copytree(source_path, target_path)
-        print(f"Données copiées vers {target_path}")
+    if not source_path.exists():
+        return target_path if target_path.exists() else source_path
+    
+    start = time.perf_counter()
+    mode = choose_staging_mode(source_path, TEMP_DIR, mode)
+    quarantined = load_manifest(manifest_path)["quarantined"]
+    staged = 0
+    for folder_name in ("Cat", "Dog"):
+        source_folder = source_path / folder_name
+        if not source_folder.exists():
+            continue
+        target_folder = target_path / folder_name
+        target_folder.mkdir(parents=True, exist_ok=True)
+        existing = set(os.listdir(target_folder))
+        
+        for entry in os.scandir(source_folder):
+            if not entry.is_file() or entry.name in existing:
+                continue
+            invalid = quarantined.get(f"{folder_name}/{entry.name}")
+            if invalid:
+                stat = entry.stat()
+                if (invalid.get("size"), invalid.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+            try:
+                stage_file(Path(entry.path), target_folder / entry.name, mode)
+            except OSError:
+                if mode != "hardlink":
+                    raise
+                mode = "symlink"  # Liens physiques refusés (EXDEV, EPERM...) : liens symboliques
+                stage_file(Path(entry.path), target_folder / entry.name, mode)
+            staged += 1
     
-    return target_path if target_path.exists() else source_path
\ No newline at end of file
+    print(f"Données préparées ({mode}): {staged} fichiers ajoutés à {target_path} "
+          f"en {time.perf_counter() - start:.2f}s")
+    return target_path
@@ -0,0 +1,195 @@
+"""
+Jeu d'entraînement prétraité en shards .npy
+
+Les JPEG sont décodés et redimensionnés une seule fois (même chaîne que
+CatDogPredictor : RGB puis resize) puis écrits en shards uint8 :
+    <shards_dir>/<version>/train_00000_images.npy   (N, H, W, 3) uint8
+    <shards_dir>/<version>/train_00000_labels.npy   (N,) uint8  (0 = Cat, 1 = Dog)
+    <shards_dir>/<version>/index.json
+
+La version est une empreinte du contenu (sha256 des images valides du manifeste
+de validation), de image_size et du découpage : les shards ne sont reconstruits
+que si l'une de ces entrées change. L'entraînement lit ensuite les shards via un
+pipeline tf.data parallèle (interleave, puis src/data/pipeline.py), sans décodage JPEG.
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from config.settings import MODEL_CONFIG, TRAINING_DATA_CONFIG, PREPROCESSING_CONFIG
+from src.data.zip_source import ZipImageArchive, decode_resized, read_image_bytes
+
+CLASS_NAMES = ["Cat", "Dog"]  # Ordre alphabétique, comme image_dataset_from_directory
+FORMAT_VERSION = 1
+
+
+def dataset_version(files: Dict[str, Dict], image_size: Tuple[int, int],
+                    validation_split: float, seed: int) -> str:
+    """Empreinte du contenu des images valides et des paramètres de prétraitement"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([FORMAT_VERSION, list(image_size), validation_split, seed]).encode())
+    for key in sorted(files):
+        if files[key].get("valid"):
+            digest.update(f"{key}:{files[key]['sha256']}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def load_resized(key: str, source, image_size: Tuple[int, int]) -> np.ndarray:
+    """Décodage et redimensionnement d'une image (exécuté dans un processus du pool)"""
+    return decode_resized(read_image_bytes(source, key), image_size)
+
+
+def split_samples(keys: List[str], validation_split: float, seed: int) -> Dict[str, List[str]]:
+    keys = sorted(keys)
+    random.Random(seed).shuffle(keys)
+    n_validation = int(math.ceil(len(keys) * validation_split))
+    return {"validation": keys[:n_validation], "train": keys[n_validation:]}
+
+
+def build_shards(data_path,
+                 manifest_path: Path = PREPROCESSING_CONFIG["manifest_path"],
+                 image_size: Tuple[int, int] = (128, 128),
+                 shards_dir: Path = TRAINING_DATA_CONFIG["shards_dir"],
+                 shard_size: int = TRAINING_DATA_CONFIG["shard_size"],
+                 validation_split: float = TRAINING_DATA_CONFIG["validation_split"],
+                 seed: int = TRAINING_DATA_CONFIG["seed"],
+                 workers: int = PREPROCESSING_CONFIG["workers"]) -> Path:
+    """
+    Construit (si besoin) les shards de la version courante du jeu de données
+
+    data_path est un répertoire PetImages ou une ZipImageArchive (lecture sans extraction).
+    Nécessite le manifeste écrit par validate_dataset (images valides et leur sha256).
+    Les versions précédentes sont supprimées après une construction réussie.
+
+    Returns:
+        Path: Chemin de index.json
+    """
+    from src.data.preprocessing import load_manifest
+
+    if not isinstance(data_path, ZipImageArchive):
+        data_path = Path(data_path)
+    files = {key: entry for key, entry in load_manifest(manifest_path)["files"].items()
+             if entry.get("valid") and key.split("/")[0] in CLASS_NAMES}
+    version = dataset_version(files, image_size, validation_split, seed)
+    output_dir = Path(shards_dir) / version
+    index_path = output_dir / "index.json"
+    if index_path.exists():
+        print(f"Shards à jour: {output_dir}")
+        return index_path
+
+    start = time.perf_counter()
+    tmp_dir = Path(shards_dir) / f".{version}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    index = {"version": version, "image_size": list(image_size), "class_names": CLASS_NAMES,
+             "splits": {}, "total": len(files)}
+    load = partial(load_resized, source=data_path, image_size=tuple(image_size))
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        for split, keys in split_samples(list(files), validation_split, seed).items():
+            shards = []
+            for shard_id, offset in enumerate(range(0, len(keys), shard_size)):
+                shard_keys = keys[offset:offset + shard_size]
+                images = np.stack(list(pool.map(load, shard_keys, chunksize=32)))
+                labels = np.array([CLASS_NAMES.index(key.split("/")[0]) for key in shard_keys], dtype=np.uint8)
+                name = f"{split}_{shard_id:05d}"
+                np.save(tmp_dir / f"{name}_images.npy", images)
+                np.save(tmp_dir / f"{name}_labels.npy", labels)
+                shards.append({"images": f"{name}_images.npy", "labels": f"{name}_labels.npy",
+                               "count": len(shard_keys)})
+            index["splits"][split] = shards
+
+    (tmp_dir / "index.json").write_text(json.dumps(index, indent=2), encoding="utf-8")
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    for old_version in Path(shards_dir).iterdir():
+        if old_version.is_dir() and old_version.name != version and not old_version.name.startswith("."):
+            shutil.rmtree(old_version, ignore_errors=True)
+
+    print(f"Shards construits: {len(files)} images → {output_dir} en {time.perf_counter() - start:.1f}s")
+    return index_path
+
+
+def sharded_images(index_path: Path, split: str, shuffle: bool = False,
+                   parallel_shards: int = TRAINING_DATA_CONFIG["parallel_shards"],
+                   deterministic: Optional[bool] = None, seed: Optional[int] = None,
+                   num_workers: int = 1, worker_index: int = 0):
+    """
+    Images uint8 d'un split ('train' ou 'validation'), non batchées
+
+    Chaque shard est chargé d'un bloc (np.load) par interleave parallèle ;
+    l'ordre des shards est mélangé à chaque epoch si shuffle.
+
+    Entraînement multi-workers : chaque worker lit un fichier sur num_workers,
+    ou une image sur num_workers s'il y a moins de fichiers que de workers
+    (voir worker_counts).
+    """
+    import tensorflow as tf
+
+    index_path = Path(index_path)
+    index = json.loads(index_path.read_text(encoding="utf-8"))
+    height, width = index["image_size"][1], index["image_size"][0]
+    shards = index["splits"][split]
+    by_file = len(shards) >= num_workers
+    if by_file:
+        shards = shards[worker_index::num_workers]
+    else:
+        shuffle, deterministic = False, True  # Même ordre sur tous les workers : parts disjointes
+    image_paths = [str(index_path.parent / shard["images"]) for shard in shards]
+    label_paths = [str(index_path.parent / shard["labels"]) for shard in shards]
+
+    def read_shard(image_path, label_path):
+        images, labels = tf.numpy_function(
+            lambda i, l: (np.load(i.decode()), np.load(l.decode())),
+            [image_path, label_path], (tf.uint8, tf.uint8)
+        )
+        images.set_shape([None, height, width, 3])
+        labels.set_shape([None])
+        return tf.data.Dataset.from_tensor_slices((images, labels))
+
+    dataset = tf.data.Dataset.from_tensor_slices((image_paths, label_paths))
+    if shuffle:
+        dataset = dataset.shuffle(len(shards), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.interleave(read_shard, cycle_length=max(1, parallel_shards),
+                                 num_parallel_calls=tf.data.AUTOTUNE,
+                                 deterministic=not shuffle if deterministic is None else deterministic)
+    return dataset if by_file else dataset.shard(num_workers, worker_index)
+
+
+def worker_counts(index_path: Path, split: str, num_workers: int) -> List[int]:
+    """Images lues par chaque worker dans sharded_images(..., num_workers=num_workers)"""
+    shards = json.loads(Path(index_path).read_text(encoding="utf-8"))["splits"][split]
+    if len(shards) >= num_workers:
+        return [sum(shard["count"] for shard in shards[i::num_workers]) for i in range(num_workers)]
+    total = sum(shard["count"] for shard in shards)
+    return [len(range(i, total, num_workers)) for i in range(num_workers)]
+
+
+def load_sharded_dataset(index_path: Path, split: str, batch_size: int, shuffle: bool = False,
+                         shuffle_buffer: int = MODEL_CONFIG["shuffle_buffer"],
+                         parallel_shards: int = TRAINING_DATA_CONFIG["parallel_shards"],
+                         seed: Optional[int] = None, cache: str = "none"):
+    """
+    Pipeline tf.data sur les shards d'un split ('train' ou 'validation')
+
+    Les batches sont convertis en float32 (entrée du modèle, Rescaling inclus) et
+    préchargés pendant que le GPU/CPU entraîne le batch précédent. Les shards sont
+    déjà des images décodées sur disque : seul le cache 'memory' a un intérêt.
+    """
+    from src.data.pipeline import input_pipeline
+
+    dataset = sharded_images(index_path, split, shuffle, parallel_shards, seed=seed)
+    return input_pipeline(dataset, batch_size, cache=cache, shuffle_buffer=shuffle_buffer if shuffle else 0, seed=seed)
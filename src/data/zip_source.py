@@ -0,0 +1,161 @@
+"""
+Lecture des images directement dans l'archive Kaggle (sans extraction)
+
+- Index des membres PetImages/Cat|Dog/* construit une fois et mis en cache à
+  côté de l'archive (<archive>.index.json, invalidé si l'archive change)
+- Lecture d'un membre par clé relative ('Cat/0.jpg', mêmes clés que le
+  manifeste de validation et les shards) ; chaque processus ouvre son propre
+  descripteur (l'objet se transmet à un ProcessPoolExecutor)
+- archive_images : générateur tf.data, décodage en parallèle dans un pool de
+  threads (le décodage JPEG de Pillow libère le GIL)
+
+Évite l'extraction (~800 Mo) puis la copie dans TEMP_DIR : l'archive est la
+seule copie des données sur disque.
+"""
+
+import io
+import json
+import os
+import random
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+CLASS_FOLDERS = ("Cat", "Dog")
+
+
+class ZipImageArchive:
+    """Source d'images : archive zip contenant <root>/Cat/* et <root>/Dog/*"""
+
+    def __init__(self, zip_path: Path, root: str = "PetImages"):
+        self.zip_path = Path(zip_path)
+        self.root = root
+        self.index_path = self.zip_path.with_name(self.zip_path.name + ".index.json")
+        self._index: Optional[Dict[str, Dict]] = None
+        self._local = threading.local()  # Un ZipFile par thread (et donc par processus)
+
+    def __getstate__(self):
+        return {"zip_path": self.zip_path, "root": self.root, "index_path": self.index_path,
+                "_index": self._index}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _zip(self) -> zipfile.ZipFile:
+        handle = getattr(self._local, "zip", None)
+        if handle is None:
+            handle = self._local.zip = zipfile.ZipFile(self.zip_path)
+        return handle
+
+    def _stamp(self) -> Dict:
+        stat = self.zip_path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def index(self) -> Dict[str, Dict]:
+        """
+        Clé relative → membre, taille et CRC (lu une fois dans le répertoire central)
+
+        La taille et le CRC servent d'empreinte au manifeste de validation.
+        """
+        if self._index is not None:
+            return self._index
+        stamp = self._stamp()
+        if self.index_path.exists():
+            cached = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if cached.get("archive") == stamp:
+                self._index = cached["members"]
+                return self._index
+
+        members = {}
+        prefix = f"{self.root}/" if self.root else ""
+        for info in self._zip().infolist():
+            if info.is_dir() or not info.filename.startswith(prefix):
+                continue
+            key = info.filename[len(prefix):]
+            if key.split("/")[0] in CLASS_FOLDERS and key.count("/") == 1:
+                members[key] = {"member": info.filename, "size": info.file_size, "crc": info.CRC}
+        self._index = members
+
+        try:
+            tmp_path = self.index_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"archive": stamp, "members": members}), encoding="utf-8")
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass  # Archive sur un support en lecture seule : index reconstruit à chaque lancement
+        return members
+
+    def keys(self) -> List[str]:
+        return sorted(self.index())
+
+    def read(self, key: str) -> bytes:
+        return self._zip().read(self.index()[key]["member"])
+
+
+def read_image_bytes(source, key: str) -> bytes:
+    """Contenu d'une image par clé relative, depuis un répertoire ou une archive"""
+    if isinstance(source, ZipImageArchive):
+        return source.read(key)
+    return (Path(source) / key).read_bytes()
+
+
+def decode_resized(content: bytes, image_size: Tuple[int, int]) -> np.ndarray:
+    """Même chaîne que CatDogPredictor.preprocess_image : RGB puis redimensionnement"""
+    with Image.open(io.BytesIO(content)) as image:
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        return np.asarray(image.resize(image_size), dtype=np.uint8)
+
+
+def archive_images(archive: ZipImageArchive, keys: Sequence[str], image_size: Tuple[int, int],
+                   shuffle: bool = False, seed: int = 1337, workers: int = 4):
+    """
+    Images uint8 lues directement dans l'archive (labels 0 = Cat, 1 = Dog), non batchées
+
+    Les membres sont lus et décodés par un pool de threads, dans l'ordre (mélangé
+    à chaque epoch si shuffle) ; seule une fenêtre de 4 × workers décodages est
+    gardée en avance.
+    """
+    import tensorflow as tf
+
+    keys = list(keys)
+    width, height = image_size
+    epoch = {"count": 0}
+
+    def load(key):  # Lecture (un ZipFile par thread) et décodage dans le pool
+        return decode_resized(archive.read(key), image_size)
+
+    def generate():
+        order = list(keys)
+        if shuffle:
+            random.Random(seed + epoch["count"]).shuffle(order)
+        epoch["count"] += 1
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            # Fenêtre bornée de décodages en avance (Executor.map soumettrait toute l'epoch d'un coup)
+            pending = deque()
+            for key in order:
+                pending.append((key, pool.submit(load, key)))
+                if len(pending) >= 4 * workers:
+                    done_key, future = pending.popleft()
+                    yield future.result(), CLASS_FOLDERS.index(done_key.split("/")[0])
+            for done_key, future in pending:
+                yield future.result(), CLASS_FOLDERS.index(done_key.split("/")[0])
+
+    return tf.data.Dataset.from_generator(
+        generate,
+        output_signature=(tf.TensorSpec((height, width, 3), tf.uint8), tf.TensorSpec((), tf.int32))
+    )
+
+
+def archive_dataset(archive: ZipImageArchive, keys: Sequence[str], image_size: Tuple[int, int],
+                    batch_size: int, shuffle: bool = False, seed: int = 1337, workers: int = 4):
+    """Dataset tf.data lu directement dans l'archive (batches float32, sans cache ni buffer de mélange)"""
+    from src.data.pipeline import input_pipeline
+
+    return input_pipeline(archive_images(archive, keys, image_size, shuffle, seed, workers), batch_size)
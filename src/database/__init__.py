@@ -9,9 +9,10 @@ Ce fichier __init__.py permet de :
 4. Améliorer l'auto-complétion des IDE
 """
 
-from .db_connector import Base, engine, get_db, get_db_session
-from .models import PredictionFeedback
+from .db_connector import Base, engine, get_db, get_read_db, get_db_session
+from .models import PredictionFeedback, PredictionHourlyRollup
 from .feedback_service import FeedbackService
+from .partition_manager import PartitionManager
 
 # Liste des symboles exportés publiquement
 # Permet de contrôler ce qui est importé avec "from src.database import *"
@@ -20,13 +21,16 @@ __all__ = [
     'Base',              # Base SQLAlchemy pour les modèles
     'engine',            # Moteur de connexion PostgreSQL
     'get_db',            # Dépendance FastAPI pour obtenir une session
+    'get_read_db',       # Dépendance FastAPI pour les lectures de reporting (réplica)
     'get_db_session',    # Fonction pour obtenir une session directement
     
     # Modèles
     'PredictionFeedback',  # Modèle de la table predictions_feedback
+    'PredictionHourlyRollup',  # Agrégats horaires des partitions expirées
     
     # Services
-    'FeedbackService'    # Service métier pour gérer les feedbacks
+    'FeedbackService',   # Service métier pour gérer les feedbacks
+    'PartitionManager'   # Création des partitions et rétention
 ]
 
 __version__ = '2.0.0'
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+Archive colonnaire (Parquet) des prédictions anciennes
+
+Remplace l'approche V1 (data/archive/monitoring_inference.csv) :
+- Archivage : avant la suppression d'une partition expirée, ses lignes sont
+  écrites dans des fichiers Parquet partitionnés par jour
+  (ARCHIVE_DIR/date=YYYY-MM-DD/<partition>.parquet), compressés, avec
+  statistiques min/max par row group
+- Requêtes : un dataset pyarrow (partitionnement hive) permet de répondre aux
+  questions longue période sans toucher la base de production ; les filtres
+  sur la date élaguent les dossiers et ceux sur created_at les row groups
+"""
+
+import os
+from datetime import date, datetime, time as dt_time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+from sqlalchemy.orm import Session
+
+import sys
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import ARCHIVE_CONFIG
+from .export_service import ExportService, PARQUET_AVAILABLE, DEFAULT_BATCH_SIZE
+
+if PARQUET_AVAILABLE:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from .export_service import PARQUET_SCHEMA, rows_to_arrow
+
+    ARCHIVE_PARTITIONING = ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+
+def _require_pyarrow():
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("Archive Parquet indisponible : installer pyarrow")
+
+
+class ArchiveService:
+    """Écriture et interrogation de l'archive Parquet de predictions_feedback"""
+
+    @staticmethod
+    def write_batches(batches: Iterable[Sequence[tuple]], file_stem: str,
+                      archive_dir: Optional[Path] = None) -> Dict[date, int]:
+        """
+        Écrit des lots de lignes (triées par created_at) dans un fichier Parquet par jour
+
+        Chaque fichier est d'abord écrit sous un nom temporaire puis renommé :
+        une archive interrompue ne laisse jamais de fichier partiel lisible.
+        Relancer l'archivage d'une même partition remplace ses fichiers.
+
+        Returns:
+            Dict {jour: nombre de lignes archivées}
+        """
+        _require_pyarrow()
+        archive_dir = Path(archive_dir or ARCHIVE_CONFIG["dir"])
+        counts: Dict[date, int] = {}
+        writer = None
+        current_day = None
+        tmp_path = final_path = None
+
+        def close_current():
+            if writer is not None:
+                writer.close()
+                os.replace(tmp_path, final_path)
+
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                table = rows_to_arrow(batch)
+                days = pc.cast(table.column("created_at"), pa.date32()).to_pylist()
+
+                # Découpage du lot en segments contigus de même jour
+                start = 0
+                for i in range(1, len(days) + 1):
+                    if i < len(days) and days[i] == days[start]:
+                        continue
+                    day = days[start]
+                    if day != current_day:
+                        close_current()
+                        day_dir = archive_dir / f"date={day.isoformat()}"
+                        day_dir.mkdir(parents=True, exist_ok=True)
+                        final_path = day_dir / f"{file_stem}.parquet"
+                        tmp_path = day_dir / f".{file_stem}.parquet.tmp"
+                        writer = pq.ParquetWriter(
+                            tmp_path, PARQUET_SCHEMA,
+                            compression=ARCHIVE_CONFIG["compression"],
+                            write_statistics=True
+                        )
+                        current_day = day
+                    writer.write_table(table.slice(start, i - start))
+                    counts[day] = counts.get(day, 0) + (i - start)
+                    start = i
+            close_current()
+        except Exception:
+            if writer is not None:
+                writer.close()
+                Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        return counts
+
+    @staticmethod
+    def archive_range(db: Session, start: datetime, end: datetime, file_stem: str,
+                      archive_dir: Optional[Path] = None) -> Dict[date, int]:
+        """Archive les lignes de [start, end) lues via un curseur côté serveur"""
+        batches = ExportService.iter_batches(db, batch_size=DEFAULT_BATCH_SIZE, start=start, end=end)
+        return ArchiveService.write_batches(batches, file_stem, archive_dir)
+
+    @staticmethod
+    def dataset(archive_dir: Optional[Path] = None):
+        """Dataset pyarrow de l'archive (None si l'archive est vide)"""
+        _require_pyarrow()
+        archive_dir = Path(archive_dir or ARCHIVE_CONFIG["dir"])
+        if not archive_dir.exists():
+            return None
+        return ds.dataset(archive_dir, format="parquet", partitioning=ARCHIVE_PARTITIONING,
+                          exclude_invalid_files=True)
+
+    @staticmethod
+    def scan(columns: Sequence[str], start: Optional[datetime] = None, end: Optional[datetime] = None,
+             extra_filter=None, archive_dir: Optional[Path] = None):
+        """
+        Lit les colonnes demandées sur [start, end) avec pushdown des prédicats
+
+        Returns:
+            pyarrow.Table (vide si aucune archive)
+        """
+        dataset = ArchiveService.dataset(archive_dir)
+        if dataset is None:
+            return PARQUET_SCHEMA.empty_table().select(list(columns))
+
+        expression = ds.field("created_at").is_valid()
+        if start is not None:
+            expression &= ds.field("date") >= start.date()  # Élagage des dossiers jour
+            expression &= ds.field("created_at") >= pa.scalar(start, pa.timestamp("us"))
+        if end is not None:
+            last_day = end.date() if end.time() != dt_time(0) else date.fromordinal(end.toordinal() - 1)
+            expression &= ds.field("date") <= last_day
+            expression &= ds.field("created_at") < pa.scalar(end, pa.timestamp("us"))
+        if extra_filter is not None:
+            expression &= extra_filter
+
+        return dataset.to_table(columns=list(columns), filter=expression)
+
+    @staticmethod
+    def get_kpi_inference_time(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                               archive_dir: Optional[Path] = None) -> Dict:
+        """
+        KPI du temps d'inférence sur l'archive (prédictions réussies)
+
+        Returns:
+            Dict avec somme, moyenne, min, max, p95 et nombre de prédictions
+        """
+        table = ArchiveService.scan(["inference_time_ms"], start, end,
+                                    extra_filter=ds.field("success") == True,
+                                    archive_dir=archive_dir)
+        times = table.column("inference_time_ms")
+        total = len(times)
+        if total == 0:
+            return {'sum_inference_time_ms': 0, 'avg_inference_time_ms': 0, 'min_inference_time_ms': 0,
+                    'max_inference_time_ms': 0, 'p95_inference_time_ms': 0, 'total_predictions': 0}
+
+        min_max = pc.min_max(times).as_py()
+        total_time = pc.sum(times).as_py()
+        return {
+            'sum_inference_time_ms': total_time,
+            'avg_inference_time_ms': round(total_time / total, 2),
+            'min_inference_time_ms': min_max['min'],
+            'max_inference_time_ms': min_max['max'],
+            'p95_inference_time_ms': round(pc.quantile(times, q=0.95).to_pylist()[0], 2),
+            'total_predictions': total
+        }
+
+    @staticmethod
+    def get_kpi_user_satisfaction(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                                  archive_dir: Optional[Path] = None) -> Dict:
+        """KPI de satisfaction utilisateur sur l'archive (feedbacks avec consentement RGPD)"""
+        table = ArchiveService.scan(["user_feedback"], start, end,
+                                    extra_filter=(ds.field("rgpd_consent") == True) & ds.field("user_feedback").is_valid(),
+                                    archive_dir=archive_dir)
+        feedbacks = table.column("user_feedback")
+        total = len(feedbacks)
+        positive = (pc.sum(feedbacks).as_py() or 0) if total else 0
+
+        return {
+            'satisfaction_rate': round(positive / total * 100, 2) if total else 0,
+            'positive_feedbacks': positive,
+            'negative_feedbacks': total - positive,
+            'total_feedbacks': total
+        }
@@ -2,20 +2,99 @@
 \c cats_dogs_db;
 
 -- Table pour stocker les métriques de prédictions avec feedback
+-- Partitionnée par mois sur created_at : la rétention se fait en supprimant
+-- des partitions entières (pas de DELETE massif ni de bloat de la table)
+-- Format compact : colonnes triées par alignement décroissant (8 → 4 → 2 → 1 octet
+-- → taille variable) pour éviter le padding, un seul score SMALLINT (proba chien en
+-- centièmes de %, proba chat = 100 - proba chien) et un code de résultat SMALLINT
 CREATE TABLE IF NOT EXISTS predictions_feedback (
-    id SERIAL PRIMARY KEY,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    id SERIAL,
     inference_time_ms INTEGER NOT NULL,
+    score_dog SMALLINT NOT NULL CHECK (score_dog >= 0 AND score_dog <= 10000),
+    result_code SMALLINT NOT NULL CHECK (result_code IN (0, 1, 2)),  -- 0=cat, 1=dog, 2=error
+    user_feedback SMALLINT NULL CHECK (user_feedback IN (0, 1)),
     success BOOLEAN NOT NULL,
-    prediction_result VARCHAR(10) NOT NULL CHECK (prediction_result IN ('cat', 'dog', 'error')),
-    proba_cat DECIMAL(5,2) NOT NULL CHECK (proba_cat >= 0 AND proba_cat <= 100),
-    proba_dog DECIMAL(5,2) NOT NULL CHECK (proba_dog >= 0 AND proba_dog <= 100),
     rgpd_consent BOOLEAN NOT NULL DEFAULT FALSE,
     filename VARCHAR(255) NULL,
-    user_feedback INTEGER NULL CHECK (user_feedback IN (0, 1)),
-    user_comment TEXT NULL
+    user_comment TEXT NULL,
+    PRIMARY KEY (id, created_at)  -- La clé de partitionnement doit faire partie de la clé primaire
+) PARTITION BY RANGE (created_at);
+
+-- Partition par défaut : filet de sécurité si une partition mensuelle manque
+CREATE TABLE IF NOT EXISTS predictions_feedback_default PARTITION OF predictions_feedback DEFAULT;
+
+-- Index pour améliorer les performances des requêtes (propagés à chaque partition)
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON predictions_feedback(created_at);
+CREATE INDEX IF NOT EXISTS idx_predictions_result ON predictions_feedback(result_code);
+
+-- Vue de compatibilité : anciens noms et types de colonnes (Grafana, requêtes ad hoc)
+CREATE OR REPLACE VIEW predictions_feedback_v1 AS
+SELECT
+    id,
+    created_at,
+    inference_time_ms,
+    success,
+    (CASE result_code WHEN 0 THEN 'cat' WHEN 1 THEN 'dog' ELSE 'error' END)::VARCHAR(10) AS prediction_result,
+    (CASE WHEN result_code = 2 THEN 0 ELSE 10000 - score_dog END / 100.0)::DECIMAL(5,2) AS proba_cat,
+    (score_dog / 100.0)::DECIMAL(5,2) AS proba_dog,
+    rgpd_consent,
+    filename,
+    user_feedback::INTEGER AS user_feedback,
+    user_comment
+FROM predictions_feedback;
+
+-- Agrégats horaires des partitions expirées (alimentés par la tâche de rétention)
+CREATE TABLE IF NOT EXISTS predictions_hourly_rollup (
+    bucket_start TIMESTAMP PRIMARY KEY,
+    total_predictions INTEGER NOT NULL,
+    successful_predictions INTEGER NOT NULL,
+    rgpd_consents INTEGER NOT NULL,
+    inference_time_sum_ms BIGINT NOT NULL,
+    inference_time_min_ms INTEGER NULL,
+    inference_time_max_ms INTEGER NULL,
+    inference_time_p50_ms REAL NULL,
+    inference_time_p95_ms REAL NULL,
+    inference_time_p99_ms REAL NULL,
+    feedback_total INTEGER NOT NULL,
+    feedback_positive INTEGER NOT NULL
 );
 
--- Index pour améliorer les performances des requêtes
-CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions_feedback(timestamp);
-CREATE INDEX IF NOT EXISTS idx_predictions_result ON predictions_feedback(prediction_result);
\ No newline at end of file
+-- Création des partitions mensuelles (mois courant + months_ahead mois à venir)
+-- Les lignes déjà tombées dans la partition par défaut pour un mois donné
+-- sont déplacées dans la nouvelle partition avant son rattachement.
+CREATE OR REPLACE FUNCTION create_predictions_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        part_name := format('predictions_feedback_%s', to_char(month_start, 'YYYY_MM'));
+
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE predictions_feedback INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                part_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM predictions_feedback_default '
+                'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                month_start, month_start + INTERVAL '1 month', part_name
+            );
+            EXECUTE format(
+                'ALTER TABLE predictions_feedback ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                part_name, month_start, month_start + INTERVAL '1 month'
+            );
+            created := created + 1;
+        END IF;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_predictions_partitions(3);
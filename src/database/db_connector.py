@@ -1,7 +1,11 @@
 import os
 import sys
+import threading
+import time
 from pathlib import Path
 from sqlalchemy import create_engine, text
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
 #from urllib.parse import quote_plus
 
@@ -10,19 +14,53 @@ ROOT_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
 # Import de la configuration
-from config.settings import DB_URL, DB_URL_MASKED
+from config.settings import DB_URL, DB_URL_MASKED, DB_REPLICA_URL, DB_REPLICA_CONFIG, DB_POOL_CONFIG
+from src.database.query_monitor import instrument_engine
 
 # Configuration encodage pour Windows
 if sys.platform.startswith('win'):
     os.environ['PYTHONIOENCODING'] = 'utf-8'
 
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool qui mesure le temps d'attente d'une connexion libre
+    
+    Chaque observateur de wait_observers est appelé avec (nom du pool, secondes
+    d'attente, timeout) après chaque obtention de connexion ou QueueTimeout.
+    Le nom du pool est celui passé à create_engine(pool_logging_name=...).
+    """
+    
+    wait_observers = []
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            self._notify_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self._notify_wait(time.perf_counter() - start, timed_out=False)
+        return connection
+    
+    def _notify_wait(self, seconds: float, timed_out: bool):
+        pool_name = getattr(self, 'logging_name', None) or 'default'
+        for observer in self.wait_observers:
+            observer(pool_name, seconds, timed_out)
+
+
 # Moteur SQLAlchemy
 engine = create_engine(
     DB_URL,
-    pool_pre_ping=True,  # Vérifier la connexion avant utilisation
+    poolclass=InstrumentedQueuePool,
+    pool_logging_name="primary",
+    **DB_POOL_CONFIG,  # Taille, débordement, timeout, recyclage, pre-ping (config/settings.py)
     echo=False  # True pour voir les requêtes SQL (à activer en développement)
 )
 
+instrument_engine(engine)  # Latence par requête et journal des requêtes lentes
+
 print(f"🔗 Configuration de connexion : {DB_URL_MASKED}")
 
 # Session factory
@@ -31,6 +69,112 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base pour les modèles ORM
 Base = declarative_base()
 
+
+class ReplicaRouter:
+    """
+    Routage des lectures de reporting vers un réplica, avec repli sur la base principale
+    
+    L'état du réplica (joignable, retard de réplication) est vérifié toutes les
+    check_interval_seconds par un thread d'arrière-plan ; read_engine ne fait
+    que lire le dernier état connu (aucune connexion pendant une requête). Le
+    réplica est écarté tant qu'il n'a pas été vérifié, s'il est injoignable ou
+    si son retard dépasse max_lag_seconds.
+    """
+    
+    # NULL sur une base qui n'est pas en recovery (ex : doublure locale) → retard nul
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_is_in_recovery() "
+        "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+        "ELSE 0 END"
+    )
+    
+    def __init__(self, primary_engine, replica_engine=None, max_lag_seconds: float = 30,
+                 check_interval_seconds: float = 10):
+        self.primary_engine = primary_engine
+        self.replica_engine = replica_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.replica_healthy = False  # Jusqu'à la première vérification
+        self.replica_lag_seconds = None
+        self.last_check = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+    
+    def start(self):
+        """Démarre la vérification périodique du réplica (première vérification immédiate, en arrière-plan)"""
+        with self._start_lock:
+            if self.replica_engine is None or self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="replica-lag-check", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.check_replica()
+            self._stop.wait(self.check_interval_seconds)
+    
+    def replica_lag(self) -> float:
+        """Retard de réplication en secondes (lève une exception si le réplica est injoignable)"""
+        with self.replica_engine.connect() as connection:
+            return float(connection.execute(self.LAG_QUERY).scalar() or 0)
+    
+    def check_replica(self) -> bool:
+        """Vérifie le réplica et met à jour son état"""
+        try:
+            self.replica_lag_seconds = self.replica_lag()
+            healthy = self.replica_lag_seconds <= self.max_lag_seconds
+            if not healthy:
+                print(f"⚠️  Réplica en retard ({self.replica_lag_seconds:.1f}s), lectures sur la base principale")
+        except Exception as e:
+            self.replica_lag_seconds = None
+            healthy = False
+            if self.replica_healthy or self.last_check is None:
+                print(f"⚠️  Réplica indisponible, lectures sur la base principale : {e}")
+        self.replica_healthy = healthy
+        self.last_check = time.monotonic()
+        return healthy
+    
+    def read_engine(self):
+        """Moteur à utiliser pour une lecture de reporting (dernier état connu, sans I/O)"""
+        if self.replica_engine is None:
+            return self.primary_engine
+        if self._thread is None:
+            self.start()  # Utilisation hors de l'API (scripts)
+        return self.replica_engine if self.replica_healthy else self.primary_engine
+
+
+# Moteur du réplica en lecture (optionnel)
+replica_engine = create_engine(
+    DB_REPLICA_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_logging_name="replica",
+    **DB_POOL_CONFIG,
+    connect_args={"connect_timeout": DB_REPLICA_CONFIG["connect_timeout"]},
+    echo=False
+) if DB_REPLICA_URL else None
+
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+    print(f"🔗 Réplica en lecture : {replica_engine.url.render_as_string(hide_password=True)}")
+
+router = ReplicaRouter(
+    engine,
+    replica_engine,
+    max_lag_seconds=DB_REPLICA_CONFIG["max_lag_seconds"],
+    check_interval_seconds=DB_REPLICA_CONFIG["check_interval_seconds"]
+)
+
+# Session factory des lectures (liée au moteur choisi à chaque session)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
 def get_db():
     """Dépendance pour obtenir une session de base de données (pour FastAPI)"""
     db = SessionLocal()
@@ -39,8 +183,22 @@ def get_db():
     finally:
         db.close()
 
-def get_db_session():
-    """Obtenir une session de base de données (utilisation directe)"""
+def get_read_db():
+    """Dépendance FastAPI pour les lectures de reporting (réplica si disponible)"""
+    db = ReadSessionLocal(bind=router.read_engine())
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_db_session(readonly: bool = False):
+    """Obtenir une session de base de données (utilisation directe)
+    
+    Args:
+        readonly: True pour une lecture de reporting (routée vers le réplica si disponible)
+    """
+    if readonly:
+        return ReadSessionLocal(bind=router.read_engine())
     return SessionLocal()
 
 def test_connection():
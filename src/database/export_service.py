@@ -0,0 +1,205 @@
+"""
+Export en flux de l'historique des prédictions (ré-entraînement, analyses hors ligne)
+
+Les lignes sont lues via un curseur côté serveur (stream_results / yield_per) par
+lots de taille fixe, puis sérialisées lot par lot en CSV, NDJSON ou Parquet :
+la mémoire utilisée reste constante quelle que soit la taille de l'export.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .models import PredictionFeedback
+from .query_monitor import track_queries
+
+# Format Parquet optionnel (pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Colonnes exportées (anciens noms, décodés depuis le format compact)
+EXPORT_COLUMNS = [
+    ("id", PredictionFeedback.id),
+    ("created_at", PredictionFeedback.created_at),
+    ("inference_time_ms", PredictionFeedback.inference_time_ms),
+    ("success", PredictionFeedback.success),
+    ("prediction_result", PredictionFeedback.prediction_result),
+    ("proba_cat", PredictionFeedback.proba_cat),
+    ("proba_dog", PredictionFeedback.proba_dog),
+    ("rgpd_consent", PredictionFeedback.rgpd_consent),
+    ("filename", PredictionFeedback.filename),
+    ("user_feedback", PredictionFeedback.user_feedback),
+    ("user_comment", PredictionFeedback.user_comment),
+]
+COLUMN_NAMES = [name for name, _ in EXPORT_COLUMNS]
+
+# Schéma Arrow des colonnes exportées (export Parquet et archive)
+if PARQUET_AVAILABLE:
+    PARQUET_SCHEMA = pa.schema([
+        ("id", pa.int32()),
+        ("created_at", pa.timestamp("us")),
+        ("inference_time_ms", pa.int32()),
+        ("success", pa.bool_()),
+        ("prediction_result", pa.string()),
+        ("proba_cat", pa.float32()),
+        ("proba_dog", pa.float32()),
+        ("rgpd_consent", pa.bool_()),
+        ("filename", pa.string()),
+        ("user_feedback", pa.int8()),
+        ("user_comment", pa.string()),
+    ])
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class _ChunkSink(io.RawIOBase):
+    """Fichier en écriture seule dont le contenu est vidé après chaque lot Parquet"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def rows_to_arrow(rows: Sequence[tuple]):
+    """Convertit un lot de tuples (ordre COLUMN_NAMES) en table Arrow"""
+    columns = list(zip(*rows))
+    return pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, PARQUET_SCHEMA)],
+        schema=PARQUET_SCHEMA
+    )
+
+
+@track_queries
+class ExportService:
+    """Service d'export en flux de predictions_feedback"""
+
+    @staticmethod
+    def build_query(
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        rgpd_consent: Optional[bool] = None,
+        has_feedback: Optional[bool] = None,
+        user_feedback: Optional[int] = None,
+    ):
+        """Requête filtrée, triée par (created_at, id) pour profiter de l'élagage des partitions"""
+        query = select(*[column.label(name) for name, column in EXPORT_COLUMNS])
+
+        if start is not None:
+            query = query.where(PredictionFeedback.created_at >= start)
+        if end is not None:
+            query = query.where(PredictionFeedback.created_at < end)
+        if rgpd_consent is not None:
+            query = query.where(PredictionFeedback.rgpd_consent == rgpd_consent)
+        if has_feedback is not None:
+            query = query.where(
+                PredictionFeedback.user_feedback.isnot(None) if has_feedback
+                else PredictionFeedback.user_feedback.is_(None)
+            )
+        if user_feedback is not None:
+            query = query.where(PredictionFeedback.user_feedback == user_feedback)
+
+        return query.order_by(PredictionFeedback.created_at, PredictionFeedback.id)
+
+    @staticmethod
+    def iter_batches(db: Session, batch_size: int = DEFAULT_BATCH_SIZE, **filters) -> Iterator[Sequence[tuple]]:
+        """
+        Lit les lignes par lots via un curseur côté serveur
+
+        Yields:
+            Listes d'au plus batch_size tuples, dans l'ordre de COLUMN_NAMES
+        """
+        result = db.execute(
+            ExportService.build_query(**filters).execution_options(yield_per=batch_size)
+        )
+        try:
+            for partition in result.partitions():
+                yield [tuple(row) for row in partition]
+        finally:
+            result.close()
+
+    @staticmethod
+    def stream_csv(batches: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+        """Sérialise les lots en CSV (en-tête inclus)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(COLUMN_NAMES)
+        for batch in batches:
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                for row in batch
+            )
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def stream_ndjson(batches: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+        """Sérialise les lots en NDJSON (un objet JSON par ligne)"""
+        for batch in batches:
+            lines = [
+                json.dumps(dict(zip(COLUMN_NAMES, row)), default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+                for row in batch
+            ]
+            if lines:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    @staticmethod
+    def stream_parquet(batches: Iterable[Sequence[tuple]]) -> Iterator[bytes]:
+        """Sérialise les lots en Parquet (un row group par lot, compression zstd)"""
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Export Parquet indisponible : installer pyarrow")
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, PARQUET_SCHEMA, compression="zstd")
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                writer.write_table(rows_to_arrow(batch))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()  # Pied de fichier Parquet (métadonnées)
+
+    @staticmethod
+    def stream(batches: Iterable[Sequence[tuple]], export_format: str) -> Iterator[bytes]:
+        """Sérialise les lots dans le format demandé ('csv', 'ndjson' ou 'parquet')"""
+        serializers = {
+            "csv": ExportService.stream_csv,
+            "ndjson": ExportService.stream_ndjson,
+            "parquet": ExportService.stream_parquet,
+        }
+        if export_format not in serializers:
+            raise ValueError(f"Format d'export inconnu : {export_format}")
+        return serializers[export_format](batches)
@@ -1,7 +1,9 @@
 from datetime import datetime
 from sqlalchemy.orm import Session
-from .models import PredictionFeedback # Import relatif ici car l'appel se fait à l'intérieur du module 
+from .models import PredictionFeedback, RESULT_CODES, SCORE_SCALE # Import relatif ici car l'appel se fait à l'intérieur du module 
+from .query_monitor import track_queries
 
+@track_queries
 class FeedbackService:
     """Service pour gérer les enregistrements de feedback"""
     
@@ -26,7 +28,7 @@ class FeedbackService:
             inference_time_ms: Temps d'inférence en millisecondes
             success: Succès de la prédiction
             prediction_result: Résultat ('cat' ou 'dog')
-            proba_cat: Probabilité classe chat (0-100)
+            proba_cat: Probabilité classe chat (0-100), non stockée (déduite de proba_dog)
             proba_dog: Probabilité classe chien (0-100)
             rgpd_consent: Consentement RGPD
             filename: Nom du fichier (si RGPD OK)
@@ -46,9 +48,8 @@ class FeedbackService:
         feedback = PredictionFeedback(
             inference_time_ms=inference_time_ms,
             success=success,
-            prediction_result=prediction_result,
-            proba_cat=round(proba_cat, 2),
-            proba_dog=round(proba_dog, 2),
+            result_code=RESULT_CODES[prediction_result],
+            score_dog=int(round(proba_dog * SCORE_SCALE)),  # 95.34 → 9534
             rgpd_consent=rgpd_consent,
             filename=filename,
             user_feedback=user_feedback,
@@ -0,0 +1,120 @@
+-- Migration : conversion de predictions_feedback en table partitionnée par mois
+-- A exécuter une seule fois sur une base créée avant le partitionnement :
+--   psql -h $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f 001_partition_predictions_feedback.sql
+-- Les partitions couvrant l'historique existant sont créées avant la recopie.
+
+BEGIN;
+
+ALTER TABLE predictions_feedback RENAME TO predictions_feedback_legacy;
+ALTER INDEX IF EXISTS idx_predictions_created_at RENAME TO idx_predictions_legacy_created_at;
+ALTER INDEX IF EXISTS idx_predictions_result RENAME TO idx_predictions_legacy_result;
+ALTER SEQUENCE IF EXISTS predictions_feedback_id_seq RENAME TO predictions_feedback_legacy_id_seq;
+
+CREATE TABLE predictions_feedback (
+    id SERIAL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    inference_time_ms INTEGER NOT NULL,
+    success BOOLEAN NOT NULL,
+    prediction_result VARCHAR(10) NOT NULL CHECK (prediction_result IN ('cat', 'dog', 'error')),
+    proba_cat DECIMAL(5,2) NOT NULL CHECK (proba_cat >= 0 AND proba_cat <= 100),
+    proba_dog DECIMAL(5,2) NOT NULL CHECK (proba_dog >= 0 AND proba_dog <= 100),
+    rgpd_consent BOOLEAN NOT NULL DEFAULT FALSE,
+    filename VARCHAR(255) NULL,
+    user_feedback INTEGER NULL CHECK (user_feedback IN (0, 1)),
+    user_comment TEXT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE predictions_feedback_default PARTITION OF predictions_feedback DEFAULT;
+CREATE INDEX idx_predictions_created_at ON predictions_feedback(created_at);
+CREATE INDEX idx_predictions_result ON predictions_feedback(prediction_result);
+
+-- Une partition par mois présent dans l'historique
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', COALESCE(created_at, CURRENT_TIMESTAMP))::DATE
+        FROM predictions_feedback_legacy
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF predictions_feedback FOR VALUES FROM (%L) TO (%L)',
+            format('predictions_feedback_%s', to_char(month_start, 'YYYY_MM')),
+            month_start, month_start + INTERVAL '1 month'
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO predictions_feedback (
+    id, created_at, inference_time_ms, success, prediction_result, proba_cat, proba_dog,
+    rgpd_consent, filename, user_feedback, user_comment
+)
+SELECT id, COALESCE(created_at, CURRENT_TIMESTAMP), inference_time_ms, success, prediction_result,
+       proba_cat, proba_dog, rgpd_consent, filename, user_feedback, user_comment
+FROM predictions_feedback_legacy;
+
+SELECT setval(
+    pg_get_serial_sequence('predictions_feedback', 'id'),
+    COALESCE((SELECT MAX(id) FROM predictions_feedback), 0) + 1,
+    false
+);
+
+DROP TABLE predictions_feedback_legacy;
+
+COMMIT;
+
+-- Agrégats horaires des partitions expirées (alimentés par la tâche de rétention)
+CREATE TABLE IF NOT EXISTS predictions_hourly_rollup (
+    bucket_start TIMESTAMP PRIMARY KEY,
+    total_predictions INTEGER NOT NULL,
+    successful_predictions INTEGER NOT NULL,
+    rgpd_consents INTEGER NOT NULL,
+    inference_time_sum_ms BIGINT NOT NULL,
+    inference_time_min_ms INTEGER NULL,
+    inference_time_max_ms INTEGER NULL,
+    inference_time_p50_ms REAL NULL,
+    inference_time_p95_ms REAL NULL,
+    inference_time_p99_ms REAL NULL,
+    feedback_total INTEGER NOT NULL,
+    feedback_positive INTEGER NOT NULL
+);
+
+-- Création des partitions mensuelles (mois courant + months_ahead mois à venir)
+-- Les lignes déjà tombées dans la partition par défaut pour un mois donné
+-- sont déplacées dans la nouvelle partition avant son rattachement.
+CREATE OR REPLACE FUNCTION create_predictions_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    part_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        part_name := format('predictions_feedback_%s', to_char(month_start, 'YYYY_MM'));
+
+        IF to_regclass(part_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE predictions_feedback INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                part_name
+            );
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM predictions_feedback_default '
+                'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                'INSERT INTO %I SELECT * FROM moved',
+                month_start, month_start + INTERVAL '1 month', part_name
+            );
+            EXECUTE format(
+                'ALTER TABLE predictions_feedback ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                part_name, month_start, month_start + INTERVAL '1 month'
+            );
+            created := created + 1;
+        END IF;
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_predictions_partitions(3);
@@ -0,0 +1,116 @@
+-- Migration : passage de predictions_feedback au format de stockage compact
+-- Prérequis : migration 001 (table partitionnée). A exécuter une seule fois :
+--   psql -h $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f 002_compact_predictions_feedback.sql
+--
+-- Tout se fait dans une seule transaction : l'ancienne table est verrouillée pendant
+-- la recopie (les écritures de l'API attendent), à lancer en fenêtre de maintenance.
+-- Les identifiants et la séquence sont conservés, l'API peut redémarrer directement
+-- sur le nouveau format.
+
+BEGIN;
+
+-- 1. Mise de côté de l'ancienne table et de ses partitions
+ALTER TABLE predictions_feedback RENAME TO predictions_feedback_wide;
+ALTER INDEX IF EXISTS idx_predictions_created_at RENAME TO idx_predictions_wide_created_at;
+ALTER INDEX IF EXISTS idx_predictions_result RENAME TO idx_predictions_wide_result;
+
+DO $$
+DECLARE
+    part_name TEXT;
+BEGIN
+    FOR part_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'predictions_feedback_wide'
+    LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I',
+                       part_name, replace(part_name, 'predictions_feedback_', 'predictions_feedback_wide_'));
+    END LOOP;
+END $$;
+
+-- 2. Nouvelle table compacte (même séquence d'identifiants)
+CREATE TABLE predictions_feedback (
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    id INTEGER NOT NULL DEFAULT nextval('predictions_feedback_id_seq'),
+    inference_time_ms INTEGER NOT NULL,
+    score_dog SMALLINT NOT NULL CHECK (score_dog >= 0 AND score_dog <= 10000),
+    result_code SMALLINT NOT NULL CHECK (result_code IN (0, 1, 2)),  -- 0=cat, 1=dog, 2=error
+    user_feedback SMALLINT NULL CHECK (user_feedback IN (0, 1)),
+    success BOOLEAN NOT NULL,
+    rgpd_consent BOOLEAN NOT NULL DEFAULT FALSE,
+    filename VARCHAR(255) NULL,
+    user_comment TEXT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+ALTER SEQUENCE predictions_feedback_id_seq OWNED BY predictions_feedback.id;
+
+CREATE TABLE predictions_feedback_default PARTITION OF predictions_feedback DEFAULT;
+CREATE INDEX idx_predictions_created_at ON predictions_feedback(created_at);
+CREATE INDEX idx_predictions_result ON predictions_feedback(result_code);
+
+-- 3. Partitions mensuelles puis backfill mois par mois (une partition source à la fois)
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', created_at)::DATE
+        FROM predictions_feedback_wide
+        ORDER BY 1
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF predictions_feedback FOR VALUES FROM (%L) TO (%L)',
+            format('predictions_feedback_%s', to_char(month_start, 'YYYY_MM')),
+            month_start, month_start + INTERVAL '1 month'
+        );
+
+        INSERT INTO predictions_feedback (
+            created_at, id, inference_time_ms, score_dog, result_code, user_feedback,
+            success, rgpd_consent, filename, user_comment
+        )
+        SELECT
+            created_at,
+            id,
+            inference_time_ms,
+            ROUND(proba_dog * 100)::SMALLINT,
+            CASE prediction_result WHEN 'cat' THEN 0 WHEN 'dog' THEN 1 ELSE 2 END,
+            user_feedback::SMALLINT,
+            success,
+            rgpd_consent,
+            filename,
+            user_comment
+        FROM predictions_feedback_wide
+        WHERE created_at >= month_start AND created_at < month_start + INTERVAL '1 month';
+
+        RAISE NOTICE 'Backfill % terminé', to_char(month_start, 'YYYY-MM');
+    END LOOP;
+END $$;
+
+-- 4. Suppression de l'ancienne table (la séquence appartient désormais à la nouvelle)
+DROP TABLE predictions_feedback_wide;
+
+-- 5. Vue de compatibilité : anciens noms et types de colonnes (Grafana, requêtes ad hoc)
+CREATE OR REPLACE VIEW predictions_feedback_v1 AS
+SELECT
+    id,
+    created_at,
+    inference_time_ms,
+    success,
+    (CASE result_code WHEN 0 THEN 'cat' WHEN 1 THEN 'dog' ELSE 'error' END)::VARCHAR(10) AS prediction_result,
+    (CASE WHEN result_code = 2 THEN 0 ELSE 10000 - score_dog END / 100.0)::DECIMAL(5,2) AS proba_cat,
+    (score_dog / 100.0)::DECIMAL(5,2) AS proba_dog,
+    rgpd_consent,
+    filename,
+    user_feedback::INTEGER AS user_feedback,
+    user_comment
+FROM predictions_feedback;
+
+-- 6. Partitions des mois à venir
+SELECT create_predictions_partitions(3);
+
+ANALYZE predictions_feedback;
+
+COMMIT;
@@ -5,10 +5,19 @@ Ce fichier définit les tables de la base de données sous forme de classes Pyth
 Chaque classe représente une table, chaque attribut représente une colonne.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DECIMAL, TIMESTAMP, Text, CheckConstraint
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, REAL, String, Boolean, TIMESTAMP, Text, CheckConstraint, PrimaryKeyConstraint, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 from .db_connector import Base
 
+# Codage compact du résultat de prédiction (colonne result_code, SMALLINT)
+RESULT_CODES = {'cat': 0, 'dog': 1, 'error': 2}
+RESULT_LABELS = {code: label for label, code in RESULT_CODES.items()}
+
+# Échelle du score : probabilité chien stockée en centièmes de pourcent (0..10000),
+# soit exactement la précision de l'ancien DECIMAL(5,2)
+SCORE_SCALE = 100
+
 class PredictionFeedback(Base):
     """
     Modèle pour stocker les prédictions avec feedback utilisateur
@@ -19,44 +28,130 @@ class PredictionFeedback(Base):
     - Les métriques de performance (temps d'inférence, succès)
     - Les résultats de prédiction (cat/dog, probabilités)
     - Les données utilisateur si consentement RGPD (nom fichier, feedback, commentaire)
+    
+    La table est partitionnée par mois sur created_at (voir create_table.sql),
+    d'où la clé primaire composite (id, created_at).
+    
+    Format de stockage compact : un seul score (proba chien en SMALLINT, la proba
+    chat vaut 100 - proba chien), un code de résultat SMALLINT, et des colonnes
+    triées par alignement décroissant (8 → 4 → 2 → 1 octet → taille variable)
+    pour éviter tout octet de padding. Les anciens noms de colonnes restent
+    disponibles en lecture (propriétés hybrides ci-dessous et vue SQL
+    predictions_feedback_v1).
     """
     
     __tablename__ = 'predictions_feedback'
     
-    # === Colonnes principales ===
-    id = Column(Integer, primary_key=True, autoincrement=True)  # Identifiant unique
-    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())  # Date de création de l'enregistrement
+    # === Colonnes alignées sur 8 octets ===
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp())  # Date de création (clé de partitionnement)
+    
+    # === Colonnes alignées sur 4 octets ===
+    id = Column(Integer, autoincrement=True)  # Identifiant unique
     inference_time_ms = Column(Integer, nullable=False)  # Temps d'inférence en millisecondes
-    success = Column(Boolean, nullable=False)  # True si prédiction réussie, False si erreur
     
-    # === Résultats de prédiction ===
-    prediction_result = Column(String(10), nullable=False)  # 'cat' ou 'dog' (ou 'error' en cas d'échec)
-    proba_cat = Column(DECIMAL(5, 2), nullable=False)  # Probabilité chat (0.00 à 100.00)
-    proba_dog = Column(DECIMAL(5, 2), nullable=False)  # Probabilité chien (0.00 à 100.00)
+    # === Colonnes sur 2 octets ===
+    score_dog = Column(SmallInteger, nullable=False)  # Probabilité chien en centièmes de % (0 à 10000)
+    result_code = Column(SmallInteger, nullable=False)  # 0=cat, 1=dog, 2=error (voir RESULT_CODES)
+    user_feedback = Column(SmallInteger, nullable=True)  # Satisfaction : 1=satisfait, 0=pas satisfait, NULL=non renseigné
     
-    # === Données RGPD et feedback utilisateur ===
+    # === Colonnes sur 1 octet ===
+    success = Column(Boolean, nullable=False)  # True si prédiction réussie, False si erreur
     rgpd_consent = Column(Boolean, nullable=False, default=False)  # Consentement RGPD de l'utilisateur
+    
+    # === Colonnes de taille variable (NULL sans consentement : aucun octet stocké) ===
     filename = Column(String(255), nullable=True)  # Nom du fichier (NULL si pas de consentement)
-    user_feedback = Column(Integer, nullable=True)  # Satisfaction : 1=satisfait, 0=pas satisfait, NULL=non renseigné
     user_comment = Column(Text, nullable=True)  # Commentaire libre de l'utilisateur
     
     # === Contraintes de validation ===
     # CheckConstraint permet de valider les données au niveau de la base de données
     __table_args__ = (
-        # Le résultat doit être 'cat', 'dog' ou 'error'
-        CheckConstraint("prediction_result IN ('cat', 'dog', 'error')", name='check_prediction_result'),
+        # La clé de partitionnement doit faire partie de la clé primaire
+        PrimaryKeyConstraint('id', 'created_at'),
+        
+        # Le résultat doit être 0 (cat), 1 (dog) ou 2 (error)
+        CheckConstraint('result_code IN (0, 1, 2)', name='check_result_code'),
         
-        # Les probabilités doivent être entre 0 et 100
-        CheckConstraint('proba_cat >= 0 AND proba_cat <= 100', name='check_proba_cat'),
-        CheckConstraint('proba_dog >= 0 AND proba_dog <= 100', name='check_proba_dog'),
+        # Le score doit être entre 0 et 100.00 %
+        CheckConstraint('score_dog >= 0 AND score_dog <= 10000', name='check_score_dog'),
         
         # Le feedback utilisateur doit être 0, 1 ou NULL
         CheckConstraint('user_feedback IS NULL OR user_feedback IN (0, 1)', name='check_user_feedback'),
+        
+        # Partitionnement mensuel (les partitions sont créées par create_predictions_partitions)
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
     
+    # === Colonnes de compatibilité (lecture seule, utilisables en Python et en SQL) ===
+    @hybrid_property
+    def prediction_result(self):
+        """'cat', 'dog' ou 'error'"""
+        return RESULT_LABELS.get(self.result_code)
+    
+    @prediction_result.expression
+    def prediction_result(cls):
+        return case(RESULT_LABELS, value=cls.result_code)
+    
+    @hybrid_property
+    def proba_dog(self):
+        """Probabilité chien (0.00 à 100.00)"""
+        return self.score_dog / SCORE_SCALE
+    
+    @proba_dog.expression
+    def proba_dog(cls):
+        return cls.score_dog / float(SCORE_SCALE)
+    
+    @hybrid_property
+    def proba_cat(self):
+        """Probabilité chat (0.00 à 100.00), 0 pour une prédiction en erreur"""
+        if self.result_code == RESULT_CODES['error']:
+            return 0.0
+        return (SCORE_SCALE * 100 - self.score_dog) / SCORE_SCALE
+    
+    @proba_cat.expression
+    def proba_cat(cls):
+        return case(
+            (cls.result_code == RESULT_CODES['error'], 0),
+            else_=SCORE_SCALE * 100 - cls.score_dog
+        ) / float(SCORE_SCALE)
+    
     def __repr__(self):
         """
         Représentation textuelle de l'objet (utile pour le débogage)
         Exemple : <PredictionFeedback(id=1, result=cat, rgpd=True)>
         """
-        return f"<PredictionFeedback(id={self.id}, result={self.prediction_result}, rgpd={self.rgpd_consent})>"
\ No newline at end of file
+        return f"<PredictionFeedback(id={self.id}, result={self.prediction_result}, rgpd={self.rgpd_consent})>"
+
+
+class PredictionHourlyRollup(Base):
+    """
+    Agrégats horaires des prédictions dont la partition a expiré
+    
+    Table : predictions_hourly_rollup
+    
+    Alimentée par la tâche de rétention (partition_manager.apply_retention)
+    juste avant la suppression d'une partition mensuelle. Les statistiques de
+    temps d'inférence ne portent que sur les prédictions réussies, comme les KPI
+    du dashboard.
+    """
+    
+    __tablename__ = 'predictions_hourly_rollup'
+    
+    bucket_start = Column(TIMESTAMP, primary_key=True)  # Début de l'heure agrégée
+    total_predictions = Column(Integer, nullable=False)
+    successful_predictions = Column(Integer, nullable=False)
+    rgpd_consents = Column(Integer, nullable=False)
+    
+    # === Temps d'inférence (prédictions réussies) ===
+    inference_time_sum_ms = Column(BigInteger, nullable=False)  # Somme, pour recalculer des moyennes pondérées
+    inference_time_min_ms = Column(Integer, nullable=True)
+    inference_time_max_ms = Column(Integer, nullable=True)
+    inference_time_p50_ms = Column(REAL, nullable=True)
+    inference_time_p95_ms = Column(REAL, nullable=True)
+    inference_time_p99_ms = Column(REAL, nullable=True)
+    
+    # === Feedback utilisateur (avec consentement RGPD) ===
+    feedback_total = Column(Integer, nullable=False)
+    feedback_positive = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<PredictionHourlyRollup(bucket={self.bucket_start}, total={self.total_predictions})>"
@@ -0,0 +1,267 @@
+"""
+Gestion des partitions mensuelles de predictions_feedback
+
+- Création à l'avance des partitions des mois à venir, au démarrage de l'API
+  puis toutes les check_interval_hours (FuturePartitionScheduler) et par
+  scripts/manage_partitions.py (service partition_maintenance de docker-compose)
+- Rétention : les partitions plus anciennes que retention_months sont d'abord
+  archivées en Parquet (si ARCHIVE_CONFIG["enabled"]), agrégées par heure dans
+  predictions_hourly_rollup, puis détachées et supprimées (agrégation et
+  suppression dans la même transaction, aucune donnée n'est perdue en cas d'échec)
+"""
+
+import re
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import sys
+from pathlib import Path
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import PARTITION_CONFIG, ARCHIVE_CONFIG
+from .archive_service import ArchiveService
+from .export_service import PARQUET_AVAILABLE
+from .query_monitor import track_queries
+
+PARENT_TABLE = 'predictions_feedback'
+PARTITION_NAME_PATTERN = re.compile(rf'^{PARENT_TABLE}_(\d{{4}})_(\d{{2}})$')
+
+# Agrégation horaire d'une partition (le nom de partition est validé par PARTITION_NAME_PATTERN)
+# ON CONFLICT : une partition ré-agrégée après un échec de suppression remplace ses propres buckets
+ROLLUP_SQL = """
+INSERT INTO predictions_hourly_rollup (
+    bucket_start, total_predictions, successful_predictions, rgpd_consents,
+    inference_time_sum_ms, inference_time_min_ms, inference_time_max_ms,
+    inference_time_p50_ms, inference_time_p95_ms, inference_time_p99_ms,
+    feedback_total, feedback_positive
+)
+SELECT
+    date_trunc('hour', created_at) AS bucket_start,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE success),
+    COUNT(*) FILTER (WHERE rgpd_consent),
+    COALESCE(SUM(inference_time_ms) FILTER (WHERE success), 0),
+    MIN(inference_time_ms) FILTER (WHERE success),
+    MAX(inference_time_ms) FILTER (WHERE success),
+    percentile_cont(0.50) WITHIN GROUP (ORDER BY inference_time_ms) FILTER (WHERE success),
+    percentile_cont(0.95) WITHIN GROUP (ORDER BY inference_time_ms) FILTER (WHERE success),
+    percentile_cont(0.99) WITHIN GROUP (ORDER BY inference_time_ms) FILTER (WHERE success),
+    COUNT(*) FILTER (WHERE rgpd_consent AND user_feedback IS NOT NULL),
+    COUNT(*) FILTER (WHERE rgpd_consent AND user_feedback = 1)
+FROM "{partition}"
+GROUP BY 1
+ON CONFLICT (bucket_start) DO UPDATE SET
+    total_predictions = EXCLUDED.total_predictions,
+    successful_predictions = EXCLUDED.successful_predictions,
+    rgpd_consents = EXCLUDED.rgpd_consents,
+    inference_time_sum_ms = EXCLUDED.inference_time_sum_ms,
+    inference_time_min_ms = EXCLUDED.inference_time_min_ms,
+    inference_time_max_ms = EXCLUDED.inference_time_max_ms,
+    inference_time_p50_ms = EXCLUDED.inference_time_p50_ms,
+    inference_time_p95_ms = EXCLUDED.inference_time_p95_ms,
+    inference_time_p99_ms = EXCLUDED.inference_time_p99_ms,
+    feedback_total = EXCLUDED.feedback_total,
+    feedback_positive = EXCLUDED.feedback_positive
+"""
+
+
+def _add_months(month_start: date, months: int) -> date:
+    """Décale un premier jour de mois de N mois (N peut être négatif)"""
+    index = month_start.year * 12 + (month_start.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_month(partition: str) -> date:
+    """Premier jour du mois couvert par une partition predictions_feedback_YYYY_MM"""
+    match = PARTITION_NAME_PATTERN.match(partition)
+    if not match:
+        raise ValueError(f"Nom de partition invalide : {partition}")
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+@track_queries
+class PartitionManager:
+    """Service de maintenance des partitions de predictions_feedback"""
+
+    @staticmethod
+    def ensure_future_partitions(db: Session, months_ahead: Optional[int] = None) -> int:
+        """
+        Crée les partitions du mois courant et des months_ahead mois suivants
+
+        Returns:
+            int: Nombre de partitions créées
+        """
+        if months_ahead is None:
+            months_ahead = PARTITION_CONFIG["months_ahead"]
+
+        created = db.execute(
+            text("SELECT create_predictions_partitions(:months_ahead)"),
+            {"months_ahead": months_ahead}
+        ).scalar()
+        db.commit()
+        return int(created or 0)
+
+    @staticmethod
+    def list_partitions(db: Session) -> List[Tuple[str, date]]:
+        """
+        Liste les partitions mensuelles existantes
+
+        Returns:
+            Liste de (nom de partition, premier jour du mois) triée par date
+        """
+        rows = db.execute(text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = :parent
+        """), {"parent": PARENT_TABLE}).fetchall()
+
+        partitions = [(name, partition_month(name)) for (name,) in rows
+                      if PARTITION_NAME_PATTERN.match(name)]  # La partition par défaut n'est jamais concernée
+        return sorted(partitions, key=lambda p: p[1])
+
+    @staticmethod
+    def expired_partitions(db: Session, retention_months: Optional[int] = None,
+                           today: Optional[date] = None) -> List[str]:
+        """
+        Partitions entièrement antérieures à la fenêtre de rétention
+
+        Avec retention_months=6 en juillet, les partitions jusqu'à décembre
+        inclus sont expirées (janvier → juillet sont conservés).
+        """
+        if retention_months is None:
+            retention_months = PARTITION_CONFIG["retention_months"]
+        today = today or date.today()
+        cutoff = _add_months(today.replace(day=1), -retention_months)
+
+        return [name for name, month_start in PartitionManager.list_partitions(db)
+                if month_start < cutoff]
+
+    @staticmethod
+    def rollup_and_drop_partition(db: Session, partition: str) -> int:
+        """
+        Agrège une partition par heure puis la détache et la supprime
+
+        Les deux étapes sont faites dans une même transaction : si la
+        suppression échoue, l'agrégation est annulée elle aussi.
+
+        Returns:
+            int: Nombre de buckets horaires écrits
+        """
+        if not PARTITION_NAME_PATTERN.match(partition):
+            raise ValueError(f"Nom de partition invalide : {partition}")
+
+        try:
+            buckets = db.execute(text(ROLLUP_SQL.format(partition=partition))).rowcount
+            db.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{partition}"'))
+            db.execute(text(f'DROP TABLE "{partition}"'))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return buckets
+
+    @staticmethod
+    def archive_partition(db: Session, partition: str) -> int:
+        """
+        Archive le contenu d'une partition en Parquet (un fichier par jour)
+
+        Returns:
+            int: Nombre de lignes archivées
+        """
+        month_start = partition_month(partition)
+        month_end = _add_months(month_start, 1)
+        counts = ArchiveService.archive_range(
+            db,
+            start=datetime.combine(month_start, datetime.min.time()),
+            end=datetime.combine(month_end, datetime.min.time()),
+            file_stem=partition
+        )
+        db.commit()  # Fin de la transaction de lecture du curseur serveur
+        return sum(counts.values())
+
+    @staticmethod
+    def apply_retention(db: Session, retention_months: Optional[int] = None) -> Dict[str, int]:
+        """
+        Tâche de rétention complète : archivage Parquet, agrégation et suppression
+        des partitions expirées
+
+        Sans archive Parquet possible (pyarrow absent), aucune partition n'est
+        supprimée tant que l'archivage n'est pas désactivé (ARCHIVE_ENABLED=false)
+
+        Returns:
+            Dict {nom de partition: nombre de buckets horaires écrits}
+        """
+        archive = ARCHIVE_CONFIG["enabled"]
+        expired = PartitionManager.expired_partitions(db, retention_months)
+        if expired and archive and not PARQUET_AVAILABLE:
+            raise RuntimeError("Archive Parquet indisponible : installer pyarrow (ou ARCHIVE_ENABLED=false "
+                               f"pour supprimer sans archive) ; {len(expired)} partition(s) conservée(s)")
+
+        results = {}
+        for partition in expired:
+            if archive:
+                archived = PartitionManager.archive_partition(db, partition)
+                print(f"📦 Partition {partition} archivée ({archived} lignes)")
+            results[partition] = PartitionManager.rollup_and_drop_partition(db, partition)
+            print(f"🗜️  Partition {partition} agrégée ({results[partition]} heures) puis supprimée")
+        return results
+
+
+class FuturePartitionScheduler:
+    """
+    Création périodique des partitions à venir (thread d'arrière-plan de l'API)
+
+    Sans elle, une fois les months_ahead mois écoulés, toutes les insertions
+    tomberaient dans la partition par défaut, jamais concernée par la rétention.
+    La création est idempotente : plusieurs workers peuvent la lancer.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], interval_seconds: float,
+                 months_ahead: Optional[int] = None):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.months_ahead = months_ahead
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Démarre la création périodique (première exécution immédiate, en arrière-plan)"""
+        if self._thread is not None or self.interval_seconds <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval_seconds)
+
+    def run_once(self) -> Optional[int]:
+        """Crée les partitions manquantes ; None si la base est indisponible (nouvel essai à l'intervalle suivant)"""
+        db = None
+        try:
+            db = self.session_factory()
+            created = PartitionManager.ensure_future_partitions(db, self.months_ahead)
+        except Exception as e:
+            print(f"⚠️  Création des partitions à venir impossible : {e}")
+            return None
+        finally:
+            if db is not None:
+                db.close()
+        if created:
+            print(f"🗓️  {created} partition(s) predictions_feedback créée(s) à l'avance")
+        return created
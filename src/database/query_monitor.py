@@ -0,0 +1,213 @@
+"""
+Instrumentation des requêtes SQL (événements SQLAlchemy before/after_cursor_execute)
+
+- Latence de chaque requête, identifiée par une empreinte normalisée du SQL
+  (littéraux et listes de paramètres remplacés par '?') et par la méthode de
+  service appelante (FeedbackService.get_statistics, DashboardService...)
+- Journal borné des requêtes plus lentes que slow_query_ms, consultable via
+  GET /api/admin/slow-queries ; les paramètres ne sont jamais conservés (RGPD)
+- Échantillonnage optionnel d'EXPLAIN ANALYZE sur les SELECT lents (PostgreSQL)
+
+La latence est transmise aux fonctions de QUERY_OBSERVERS (métriques Prometheus
+enregistrées par setup_prometheus) : sans Prometheus, seul le journal est tenu.
+"""
+
+import functools
+import hashlib
+import inspect
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import sys
+from pathlib import Path
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from sqlalchemy import event
+
+from config.settings import QUERY_MONITOR_CONFIG
+
+# Méthode de service en cours d'exécution (label 'caller' des métriques)
+_current_caller: ContextVar[str] = ContextVar("query_caller", default="unknown")
+
+# Fonctions (empreinte, appelant, secondes) appelées après chaque requête
+QUERY_OBSERVERS: List[Callable[[str, str, float], None]] = []
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE)
+
+
+def normalize_statement(statement: str) -> str:
+    """SQL normalisé : littéraux et paramètres remplacés par '?', listes IN réduites"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """
+    Empreinte courte et stable d'une requête, utilisable comme label Prometheus
+
+    Exemple : 'SELECT predictions_feedback 3f9a1c2e'
+    """
+    normalized = normalize_statement(statement)
+    verb = normalized.split(" ", 1)[0].upper() if normalized else "?"
+    table = _TABLE.search(normalized)
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:8]
+    return f"{verb} {table.group(1) if table else '-'} {digest}"
+
+
+def track_queries(cls):
+    """
+    Décorateur de classe de service : chaque méthode statique définit l'appelant
+    des requêtes qu'elle exécute ('Classe.méthode')
+
+    Les méthodes génératrices (ex : ExportService.iter_batches) sont prises en
+    compte pendant toute leur itération.
+    """
+    for name, attribute in list(vars(cls).items()):
+        if not isinstance(attribute, staticmethod) or name.startswith("_"):
+            continue
+        function = attribute.__func__
+        caller = f"{cls.__name__}.{name}"
+
+        if inspect.isgeneratorfunction(function):
+            # L'appelant est défini à chaque étape : l'itération peut se faire
+            # dans un autre contexte (threadpool d'une StreamingResponse)
+            def wrapper(*args, _function=function, _caller=caller, **kwargs):
+                generator = _function(*args, **kwargs)
+                try:
+                    while True:
+                        token = _current_caller.set(_caller)
+                        try:
+                            item = next(generator)
+                        except StopIteration as stop:
+                            return stop.value
+                        finally:
+                            _current_caller.reset(token)
+                        yield item
+                finally:
+                    generator.close()
+        else:
+            def wrapper(*args, _function=function, _caller=caller, **kwargs):
+                token = _current_caller.set(_caller)
+                try:
+                    return _function(*args, **kwargs)
+                finally:
+                    _current_caller.reset(token)
+
+        setattr(cls, name, staticmethod(functools.wraps(function)(wrapper)))
+    return cls
+
+
+class SlowQueryLog:
+    """Journal borné (thread-safe) des dernières requêtes lentes"""
+
+    def __init__(self, maxlen: int):
+        self._entries = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict]:
+        """Requêtes lentes, de la plus récente à la plus ancienne"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(QUERY_MONITOR_CONFIG["slow_log_size"])
+
+
+def _explain_analyze(cursor, statement: str, parameters) -> Optional[str]:
+    """
+    Plan d'exécution réel d'un SELECT (ré-exécution sur un curseur DBAPI dédié)
+
+    EXPLAIN ANALYZE exécute la requête : il tourne dans un savepoint toujours
+    annulé (une transaction annulée si la connexion est en autocommit), si
+    bien qu'un échec (timeout, annulation) n'interrompt pas la transaction de
+    l'appelant et que rien de ce qu'il exécute n'est conservé.
+    """
+    connection = cursor.connection
+    if getattr(connection, "autocommit", False):
+        begin, undo = ["BEGIN"], ["ROLLBACK"]
+    else:
+        begin = ["SAVEPOINT query_monitor_explain"]
+        undo = ["ROLLBACK TO SAVEPOINT query_monitor_explain", "RELEASE SAVEPOINT query_monitor_explain"]
+    try:
+        explain_cursor = connection.cursor()
+        try:
+            for command in begin:
+                explain_cursor.execute(command)
+            try:
+                explain_cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+                return "\n".join(row[0] for row in explain_cursor.fetchall())
+            finally:
+                for command in undo:
+                    explain_cursor.execute(command)
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return f"EXPLAIN indisponible : {e}"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    query_id = fingerprint(statement)
+    caller = _current_caller.get()
+
+    for observer in QUERY_OBSERVERS:
+        observer(query_id, caller, elapsed)
+
+    duration_ms = elapsed * 1000
+    if duration_ms < QUERY_MONITOR_CONFIG["slow_query_ms"]:
+        return
+
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "duration_ms": round(duration_ms, 2),
+        "fingerprint": query_id,
+        "caller": caller,
+        "statement": normalize_statement(statement),
+        "explain": None,
+    }
+    # Pas de WITH : une CTE peut modifier des données (INSERT ... RETURNING)
+    is_select = statement.lstrip().upper().startswith("SELECT")
+    if (is_select and not executemany and conn.dialect.name == "postgresql"
+            and random.random() < QUERY_MONITOR_CONFIG["explain_sample_rate"]):
+        entry["explain"] = _explain_analyze(cursor, statement, parameters)
+    slow_query_log.record(entry)
+
+
+def instrument_engine(engine):
+    """Active la mesure des requêtes d'un moteur SQLAlchemy"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,85 @@
+"""
+Entraînement multi-workers par parallélisme de données (tf.distribute)
+
+Le cluster est décrit par TF_CONFIG (ou construit par tf_config_from_hosts à
+partir des options de scripts/train.py). Chaque worker lit sa part des images,
+calcule les gradients de ses batches locaux et les moyenne avec les autres
+(all-reduce) : tous les workers gardent des poids identiques.
+
+- Batch global = batch_size × nombre de replicas (un batch local par worker)
+- Tous les workers font le même nombre de pas par epoch (le plus petit shard
+  le fixe) : un worker en avance bloquerait les collectives des autres
+- Seul le chief écrit (checkpoints, modèle final, référence de dérive)
+
+L'entraînement lui-même passe par training_loop.fit_loop (Keras 3 ne sait
+pas exécuter model.fit sous MultiWorkerMirroredStrategy).
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import tensorflow as tf
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+COLLECTIVES = {
+    "auto": tf.distribute.experimental.CommunicationImplementation.AUTO,
+    "ring": tf.distribute.experimental.CommunicationImplementation.RING,
+    "nccl": tf.distribute.experimental.CommunicationImplementation.NCCL,
+}
+
+
+def cluster_info(tf_config: Optional[str] = None) -> Dict:
+    """
+    Position de ce processus dans le cluster TF_CONFIG
+
+    Returns:
+        {"workers": nombre de workers, "index": rang global (0 pour le chief),
+         "chief": ce worker écrit les fichiers}
+    """
+    raw = os.environ.get("TF_CONFIG", "") if tf_config is None else tf_config
+    config = json.loads(raw) if raw else {}
+    cluster, task = config.get("cluster", {}), config.get("task", {})
+    chiefs, workers = cluster.get("chief", []), cluster.get("worker", [])
+    task_type, task_index = task.get("type", "worker"), int(task.get("index", 0))
+    if task_type not in ("chief", "worker"):
+        raise ValueError(f"Rôle TF_CONFIG non supporté : {task_type} (attendu : chief ou worker)")
+
+    index = task_index + len(chiefs) if task_type == "worker" else task_index
+    chief = task_type == "chief" or (not chiefs and task_index == 0)
+    return {"workers": max(1, len(chiefs) + len(workers)), "index": index, "chief": chief}
+
+
+def tf_config_from_hosts(hosts: List[str], task_index: int) -> str:
+    """TF_CONFIG d'un cluster de workers host:port (le worker 0 est le chief)"""
+    if not 0 <= task_index < len(hosts):
+        raise ValueError(f"task_index {task_index} hors du cluster ({len(hosts)} workers)")
+    return json.dumps({"cluster": {"worker": list(hosts)}, "task": {"type": "worker", "index": task_index}})
+
+
+def create_strategy(communication: str = "auto"):
+    """
+    MultiWorkerMirroredStrategy si TF_CONFIG décrit plusieurs workers, sinon None
+
+    À appeler au début du programme, avant toute opération TensorFlow : la
+    stratégie démarre le serveur gRPC du worker et attend les autres.
+    """
+    if cluster_info()["workers"] < 2:
+        return None
+    if communication not in COLLECTIVES:
+        raise ValueError(f"Collectives inconnues : {communication} (attendu : {', '.join(COLLECTIVES)})")
+    options = tf.distribute.experimental.CommunicationOptions(implementation=COLLECTIVES[communication])
+    return tf.distribute.MultiWorkerMirroredStrategy(communication_options=options)
+
+
+def barrier(strategy):
+    """Attente de tous les workers (all-reduce d'une constante)"""
+    tf.function(lambda: strategy.reduce("SUM", strategy.run(lambda: tf.constant(1.0)), axis=None))()
+
+
+def equal_steps(counts: List[int], batch_size: int) -> int:
+    """Pas par epoch communs à tous les workers (le plus petit shard fixe le nombre)"""
+    return max(1, min(counts) // batch_size)
@@ -4,10 +4,12 @@ import tensorflow as tf
 import numpy as np
 from PIL import Image
 import io
+from typing import Optional
 
 # Ajouter les chemins nécessaires
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from config.settings import MODEL_CONFIG, API_CONFIG
+from src.utils.stage_timer import StageTimer
 
 class CatDogPredictor:
     def __init__(self):
@@ -28,26 +30,44 @@ class CatDogPredictor:
             print(f"Erreur de chargement du modèle: {e}")
             self.model = None
     
-    def preprocess_image(self, image_data: bytes):
-        """Préprocessing de l'image"""
-        image = Image.open(io.BytesIO(image_data))
+    def preprocess_image(self, image_data: bytes, timer: Optional[StageTimer] = None,
+                         info: Optional[dict] = None):
+        """
+        Préprocessing de l'image (étapes 'decode' et 'resize' si un timer est fourni)
         
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        info, si fourni, reçoit les caractéristiques de l'image d'origine
+        (width, height, mode, format) pour les statistiques d'entrée.
+        """
+        timer = timer or StageTimer()
         
-        image = image.resize(self.image_size)
-        img_array = np.array(image)
-        img_array = np.expand_dims(img_array, axis=0)
+        with timer.stage("decode"):
+            image = Image.open(io.BytesIO(image_data))
+            image.load()  # Image.open est paresseux : le décodage a lieu ici
+            if info is not None:
+                info.update(width=image.width, height=image.height, mode=image.mode, format=image.format)
+            
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+        
+        with timer.stage("resize"):
+            image = image.resize(self.image_size)
+            img_array = np.array(image)
+            img_array = np.expand_dims(img_array, axis=0)
         
         return img_array
     
-    def predict(self, image_data: bytes):
-        """Prédiction"""
+    def predict(self, image_data: bytes, timer: Optional[StageTimer] = None):
+        """Prédiction (étapes 'decode', 'resize' et 'inference' si un timer est fourni)"""
         if self.model is None:
             raise ValueError("Modèle non chargé")
         
-        processed_image = self.preprocess_image(image_data)
-        prediction = self.model.predict(processed_image, verbose=0)
+        timer = timer or StageTimer()
+        image_info = {}
+        processed_image = self.preprocess_image(image_data, timer, image_info)
+        with timer.stage("inference"):
+            # predict_on_batch : pas de tf.data ni de callbacks recréés à chaque appel
+            # (model.predict coûte ~100 ms de plus par image et fait croître la mémoire)
+            prediction = self.model.predict_on_batch(processed_image)
         score = float(prediction[0][0])
         
         if score > 0.5:
@@ -64,7 +84,9 @@ class CatDogPredictor:
                 "cat": 1 - score,
                 "dog": score
             },
-            "raw_score": score
+            "raw_score": score,
+            # Image d'origine et tableau redimensionné (statistiques d'entrée, sans nouveau décodage)
+            "image": {**image_info, "pixels": processed_image[0]}
         }
     
     def is_loaded(self):
@@ -1,3 +1,6 @@
+import contextlib
+import math
+import os
 import sys
 from pathlib import Path
 import tensorflow as tf
@@ -5,100 +8,322 @@ from keras import layers, models
 
 # Ajouter les chemins nécessaires
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from config.settings import MODEL_CONFIG, MODELS_DIR
-from src.data.preprocessing import clean_corrupted_images, setup_data_directory
+from config.settings import (
+    MODEL_CONFIG, MODELS_DIR, DRIFT_CONFIG, IMAGE_STATS_CONFIG, TRAINING_DATA_CONFIG, PREPROCESSING_CONFIG,
+    DISTRIBUTED_CONFIG, CHECKPOINT_CONFIG
+)
+from src.data.preprocessing import clean_corrupted_images, load_manifest, setup_data_directory, staged_data_path
+from src.data.pipeline import (
+    InputStallMonitor, batch_images, cache_images, cache_path, choose_cache, directory_images, epoch_batches
+)
+from src.data.shards import (
+    CLASS_NAMES, build_shards, dataset_version, sharded_images, split_samples, worker_counts
+)
+from src.data.zip_source import ZipImageArchive, archive_images
+from src.monitoring.drift_monitor import save_reference, score_reference
+from src.monitoring.image_stats import reference_from_directory
+from src.models.distributed import barrier, cluster_info, create_strategy, equal_steps
+from src.models.training_loop import TrainingCheckpoint, fit_loop
 
 class CatDogTrainer:
     def __init__(self):
         self.config = MODEL_CONFIG
         self.models_dir = MODELS_DIR
         self.models_dir.mkdir(parents=True, exist_ok=True)
+        # Multi-workers si TF_CONFIG décrit un cluster (créée avant toute opération TensorFlow)
+        self.cluster = cluster_info()
+        self.strategy = create_strategy(DISTRIBUTED_CONFIG["communication"])
         
     def prepare_data(self):
-        """Préparation des données"""
-        # Configuration du répertoire de données
-        data_path = setup_data_directory()
-        
-        # Nettoyage
-        clean_corrupted_images(data_path)
-        
-        # Création des datasets
-        train_ds, val_ds = tf.keras.utils.image_dataset_from_directory(
-            data_path,
-            validation_split=0.2,
-            subset="both",
-            seed=1337,
-            image_size=self.config["image_size"],
-            batch_size=self.config["batch_size"],
-        )
+        """
+        Préparation des données
+        
+        En multi-workers, le chief prépare les données (staging, validation,
+        shards) pendant que les autres l'attendent, puis chaque worker lit sa
+        part des images, répétée à l'infini : self.steps donne les pas par
+        epoch communs à tous les workers.
+        """
+        chief = self.cluster["chief"]
+        if TRAINING_DATA_CONFIG["source"] == "archive":
+            # Lecture directe dans le zip téléchargé (ni extraction ni copie)
+            data_path = ZipImageArchive(TRAINING_DATA_CONFIG["archive_path"])
+        elif chief:
+            # Configuration du répertoire de données
+            data_path = setup_data_directory()
+        else:
+            data_path = staged_data_path()
+        self.data_path = data_path
+        
+        index_path = None
+        if chief:
+            # Nettoyage
+            clean_corrupted_images(data_path)
+            if TRAINING_DATA_CONFIG["format"] == "shards":
+                # Shards prétraités (reconstruits seulement si les images ou image_size changent)
+                index_path = build_shards(data_path, image_size=self.config["image_size"])
+        if self.strategy is not None:
+            barrier(self.strategy)  # Manifeste et shards du chief prêts
         
-        # Optimisations
-        AUTOTUNE = tf.data.AUTOTUNE
-        train_ds = train_ds.cache().shuffle(1000).prefetch(buffer_size=AUTOTUNE)
-        val_ds = val_ds.cache().prefetch(buffer_size=AUTOTUNE)
+        # Images valides du manifeste, même découpage que les shards
+        files = {key: entry for key, entry in load_manifest(PREPROCESSING_CONFIG["manifest_path"])["files"].items()
+                 if entry.get("valid") and key.split("/")[0] in CLASS_NAMES}
+        splits = split_samples(list(files), TRAINING_DATA_CONFIG["validation_split"], TRAINING_DATA_CONFIG["seed"])
+        image_size = self.config["image_size"]
+        cache = choose_cache(self.config["cache"], len(files), image_size,
+                             self.config["ram_budget_mb"], self.config["shuffle_buffer"])
+        # Reprise au milieu d'une epoch : les batches doivent être rejoués à l'identique,
+        # map / interleave rendent alors les éléments dans l'ordre d'entrée
+        deterministic = self.config["deterministic"] or CHECKPOINT_CONFIG["every_steps"] > 0
         
+        # Part des images de ce worker (toutes hors multi-workers)
+        num_workers, worker_index = self.cluster["workers"], self.cluster["index"]
+        seed = TRAINING_DATA_CONFIG["seed"]
+        if TRAINING_DATA_CONFIG["format"] == "shards":
+            if index_path is None:  # Shards déjà construits par le chief
+                index_path = build_shards(data_path, image_size=image_size)
+            source = "shards"
+            cache = "none" if cache == "disk" else cache  # Les shards sont déjà un cache disque des images décodées
+            counts = {split: worker_counts(index_path, split, num_workers) for split in splits}
+            
+            def images(split, seed):
+                return sharded_images(index_path, split, shuffle=split == "train",
+                                      deterministic=deterministic, seed=seed,
+                                      num_workers=num_workers, worker_index=worker_index)
+        else:
+            counts = {split: [len(keys[i::num_workers]) for i in range(num_workers)] for split, keys in splits.items()}
+            splits = {split: keys[worker_index::num_workers] for split, keys in splits.items()}
+            if isinstance(data_path, ZipImageArchive):
+                source = "archive"
+                workers = self.config["num_parallel_calls"] if self.config["num_parallel_calls"] > 0 else os.cpu_count() or 1
+                
+                def images(split, seed):
+                    return archive_images(data_path, splits[split], image_size, shuffle=split == "train",
+                                          seed=seed, workers=workers)
+            else:
+                source = "directory"
+                
+                def images(split, seed):
+                    return directory_images(data_path, splits[split], image_size, self.config["num_parallel_calls"],
+                                            deterministic)
+        
+        version = dataset_version(files, image_size, TRAINING_DATA_CONFIG["validation_split"], seed)
+        self.dataset_version = version
+        suffix = f"_w{worker_index}" if num_workers > 1 else ""
+        cached = {
+            split: cache_images(
+                images(split, seed), cache,
+                cache_file=cache_path(self.config["cache_dir"], f"{version}_{source}_{split}{suffix}") if cache == "disk" else None
+            )
+            for split in splits
+        }
+        batch_size, shuffle_buffer = self.config["batch_size"], self.config["shuffle_buffer"]
+        train_ds = batch_images(cached["train"], batch_size, shuffle_buffer, seed)
+        val_ds = batch_images(cached["validation"], batch_size)
+        # Batches de chaque epoch reproductibles (reprise au milieu d'une epoch) ;
+        # sans cache, la source est reconstruite avec la graine de l'epoch
+        train_epoch = epoch_batches(
+            (lambda epoch: cached["train"]) if cache != "none" else (lambda epoch: images("train", seed + epoch)),
+            batch_size, shuffle_buffer, seed
+        )
+        if num_workers > 1:
+            # Même nombre de pas sur tous les workers, quelle que soit la taille de leur part
+            self.steps = {split: equal_steps(counts[split], batch_size) for split in splits}
+            train_ds, val_ds = train_ds.repeat(), val_ds.repeat()
+            self.train_epoch = lambda epoch: train_epoch(epoch).repeat()
+        else:
+            self.steps = {split: math.ceil(counts[split][0] / batch_size) for split in splits}
+            self.train_epoch = train_epoch
+        print(f"Pipeline d'entrée: source={source}, cache={cache}, shuffle_buffer={shuffle_buffer}, "
+              f"deterministic={deterministic}")
+        if num_workers > 1:
+            print(f"Worker {worker_index + 1}/{num_workers}: {counts['train'][worker_index]} images d'entraînement, "
+                  f"{self.steps['train']} pas par epoch")
         return train_ds, val_ds
     
-    def create_model(self):
-        """Création du modèle"""
-        data_augmentation = tf.keras.Sequential([
+    def create_augmentation(self):
+        return tf.keras.Sequential([
             layers.RandomFlip("horizontal"),
             layers.RandomRotation(0.1),
             layers.RandomZoom(0.1),
-        ])
+        ], name="data_augmentation")
+    
+    def create_model(self, precision=None, jit_compile=None, augmentation=True, learning_rate=None):
+        """
+        Création du modèle
+        
+        Args:
+            precision: Politique Keras des couches de calcul ('float32', 'mixed_bfloat16',
+                'mixed_float16') ; la sigmoïde finale reste en float32 (perte stable)
+            jit_compile: Pas d'entraînement compilé par XLA
+            augmentation: Couches d'augmentation dans le modèle ; leurs opérations
+                aléatoires ne sont pas compilables par XLA, elles passent alors dans
+                le pipeline tf.data (augment_dataset)
+            learning_rate: Taux d'apprentissage (MODEL_CONFIG par défaut)
+        """
+        precision = precision or self.config["precision"]
+        jit_compile = self.config["jit_compile"] if jit_compile is None else jit_compile
         
         inputs = tf.keras.Input(shape=self.config["image_size"] + (3,))
         x = layers.Rescaling(1.0/255)(inputs)
-        x = data_augmentation(x)
+        if augmentation:
+            x = self.create_augmentation()(x)
+        
+        x = layers.Conv2D(32, 3, activation='relu', dtype=precision, name="conv_1")(x)
+        x = layers.MaxPooling2D(dtype=precision)(x)
+        x = layers.Conv2D(64, 3, activation='relu', dtype=precision, name="conv_2")(x)
+        x = layers.MaxPooling2D(dtype=precision)(x)
+        x = layers.Conv2D(128, 3, activation='relu', dtype=precision, name="conv_3")(x)
+        x = layers.MaxPooling2D(dtype=precision)(x)
         
-        x = layers.Conv2D(32, 3, activation='relu')(x)
-        x = layers.MaxPooling2D()(x)
-        x = layers.Conv2D(64, 3, activation='relu')(x)
-        x = layers.MaxPooling2D()(x)
-        x = layers.Conv2D(128, 3, activation='relu')(x)
-        x = layers.MaxPooling2D()(x)
+        x = layers.GlobalAveragePooling2D(dtype=precision)(x)
+        x = layers.Dropout(0.5, dtype=precision)(x)
+        x = layers.Dense(1, dtype=precision, name="logits")(x)
+        outputs = layers.Activation('sigmoid', dtype='float32', name="score")(x)
         
-        x = layers.GlobalAveragePooling2D()(x)
-        x = layers.Dropout(0.5)(x)
-        outputs = layers.Dense(1, activation='sigmoid')(x)
+        optimizer = tf.keras.optimizers.Adam(learning_rate=learning_rate or self.config["learning_rate"])
+        if precision == "mixed_float16":
+            optimizer = tf.keras.mixed_precision.LossScaleOptimizer(optimizer)  # Gradients float16 : mise à l'échelle de la perte
         
         model = tf.keras.Model(inputs, outputs)
         model.compile(
-            optimizer=tf.keras.optimizers.Adam(learning_rate=self.config["learning_rate"]),
+            optimizer=optimizer,
             loss='binary_crossentropy',
-            metrics=['accuracy']
+            metrics=['accuracy'],
+            jit_compile=jit_compile
         )
         
         return model
     
-    def train(self):
-        """Entraînement du modèle"""
+    def augment_dataset(self, dataset):
+        """Augmentation dans le pipeline tf.data (modèle compilé par XLA)"""
+        augmentation = self.create_augmentation()
+        dataset = dataset.map(
+            lambda images, labels: (augmentation(images, training=True), labels),
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=self.config["deterministic"]
+        )
+        return dataset.prefetch(tf.data.AUTOTUNE)
+    
+    def export_model(self, model):
+        """
+        Copie float32 du modèle entraîné, pour le service
+        
+        Les poids d'un modèle en précision mixte sont déjà stockés en float32 ;
+        seules les politiques de calcul changent (inférence bfloat16 très lente
+        sur les CPU sans AMX / AVX512-BF16 de l'API). En multi-workers, la copie
+        est créée hors de strategy.scope() : ses variables ne sont plus répliquées.
+        """
+        if self.strategy is None and model.get_layer("conv_1").dtype_policy.name == "float32":
+            return model
+        exported = self.create_model(precision="float32", jit_compile=False)
+        for layer in model.layers:
+            if layer.weights:
+                exported.get_layer(layer.name).set_weights(layer.get_weights())
+        return exported
+    
+    def train(self, resume=True):
+        """
+        Entraînement du modèle
+        
+        Args:
+            resume: Reprendre depuis le dernier état sauvegardé (CHECKPOINT_CONFIG) ;
+                False le supprime et repart de zéro
+        """
         train_ds, val_ds = self.prepare_data()
-        model = self.create_model()
+        train_epoch = self.train_epoch
+        distributed = self.strategy is not None
+        chief = self.cluster["chief"]
+        jit_compile = self.config["jit_compile"] and not distributed  # Pas de XLA sous MultiWorkerMirroredStrategy
+        
+        # Batch global : un batch local par replica ; taux d'apprentissage mis à l'échelle (règle linéaire)
+        replicas = self.strategy.num_replicas_in_sync if distributed else 1
+        self.global_batch_size = self.config["batch_size"] * replicas
+        learning_rate = self.config["learning_rate"] * (replicas if DISTRIBUTED_CONFIG["scale_learning_rate"] else 1)
+        with self.strategy.scope() if distributed else contextlib.nullcontext():
+            model = self.create_model(jit_compile=jit_compile, augmentation=not jit_compile, learning_rate=learning_rate)
+        if jit_compile:
+            # Augmentation hors du modèle : son état aléatoire n'est pas repris après interruption
+            train_ds = self.augment_dataset(train_ds)
+            train_epoch = lambda epoch: self.augment_dataset(self.train_epoch(epoch))
+        print(f"Mode d'entraînement: precision={self.config['precision']}, jit_compile={jit_compile}, "
+              f"replicas={replicas}, batch global={self.global_batch_size}, learning_rate={learning_rate:g}")
         
         model_path = self.models_dir / "cats_dogs_model.keras"
         
-        callbacks = [
-            tf.keras.callbacks.ModelCheckpoint(
+        stall_monitor = InputStallMonitor()
+        self.input_stalls = stall_monitor.history
+        
+        callbacks = [stall_monitor]
+        if chief:  # Un seul écrivain du modèle
+            callbacks.append(tf.keras.callbacks.ModelCheckpoint(
                 model_path,
                 save_best_only=True,
                 monitor='val_accuracy',
+                mode='max',
                 verbose=1
-            ),
-            tf.keras.callbacks.EarlyStopping(
-                monitor='val_accuracy',
-                patience=3,
-                restore_best_weights=True
-            ),
-        ]
-        
-        history = model.fit(
-            train_ds,
-            epochs=self.config["epochs"],
-            callbacks=callbacks,
-            validation_data=val_ds,
-            verbose=1
-        )
+            ))
+        callbacks.append(tf.keras.callbacks.EarlyStopping(
+            monitor='val_accuracy',
+            mode='max',
+            patience=3,
+            restore_best_weights=True
+        ))
         
+        every_steps = CHECKPOINT_CONFIG["every_steps"]
+        if distributed or every_steps > 0:
+            checkpoint = None
+            if every_steps > 0:
+                # Un répertoire par version des données et batch global : la position sauvegardée n'a de sens que pour eux
+                checkpoint = TrainingCheckpoint(
+                    CHECKPOINT_CONFIG["dir"] / f"{self.dataset_version}_b{self.global_batch_size}",
+                    every_steps, CHECKPOINT_CONFIG["keep"], chief=chief, worker_index=self.cluster["index"]
+                )
+                if not resume:
+                    checkpoint.clear()
+                    if distributed:
+                        barrier(self.strategy)
+            history = fit_loop(
+                model, lambda epoch: stall_monitor.watch(train_epoch(epoch)), val_ds,
+                epochs=self.config["epochs"],
+                steps_per_epoch=self.steps["train"],
+                validation_steps=self.steps["validation"],
+                strategy=self.strategy,
+                callbacks=callbacks,
+                checkpoint=checkpoint,
+                verbose=1 if chief else 0
+            )
+        else:
+            history = model.fit(
+                stall_monitor.watch(train_ds),
+                epochs=self.config["epochs"],
+                callbacks=callbacks,
+                validation_data=val_ds,
+                verbose=1
+            )
+        
+        if not chief:
+            return model, history
+        if distributed or self.config["precision"] != "float32":
+            model = self.export_model(model)
+            model.save(model_path)
         print(f"Modèle sauvegardé: {model_path}")
-        return model, history
\ No newline at end of file
+        if distributed:
+            val_ds = val_ds.take(self.steps["validation"])  # Part de validation du chief (répétée à l'infini)
+        self.save_drift_reference(model, val_ds)
+        return model, history
+    
+    def save_drift_reference(self, model, val_ds):
+        """
+        Référence de dérive : distribution des scores du modèle retenu sur la
+        validation et statistiques d'un échantillon des images d'entraînement
+        """
+        scores = model.predict(val_ds, verbose=0).ravel()
+        features = score_reference(scores, DRIFT_CONFIG["score_bins"])
+        features.update(reference_from_directory(
+            self.data_path,
+            self.config["image_size"],
+            sample_size=IMAGE_STATS_CONFIG["reference_sample_size"]
+        ))
+        reference_path = save_reference(DRIFT_CONFIG["reference_path"], features)
+        print(f"Référence de dérive sauvegardée: {reference_path} ({len(scores)} scores)")
+        return reference_path
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Boucle d'entraînement explicite, avec reprise après interruption
+
+fit_loop remplace model.fit (mêmes callbacks, même History) :
+- en multi-workers : Keras 3 ne sait pas exécuter model.fit sous
+  MultiWorkerMirroredStrategy (la réduction des logs scalaires échoue)
+- avec TrainingCheckpoint : l'état complet est sauvegardé tous les
+  every_steps pas, et un entraînement relancé reprend au pas suivant
+
+État sauvegardé :
+- variables du modèle, dont l'état des générateurs aléatoires Keras
+  (augmentation, dropout), et de l'optimiseur (moments, itérations)
+- epoch et pas dans l'epoch : position dans les données. Les batches d'une
+  epoch sont reproductibles (pipeline.epoch_batches) ; la reprise relit les
+  batches déjà vus de l'epoch sans entraîner
+- sommes de perte / exactitude de l'epoch en cours, historique et état des
+  callbacks de suivi (meilleure val_accuracy, patience d'EarlyStopping et
+  poids de la meilleure epoch, restaurés par EarlyStopping en fin d'entraînement)
+"""
+
+import json
+import re
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import tensorflow as tf
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+MONITOR_STATE = ("best", "wait", "best_epoch")  # Attributs de ModelCheckpoint / EarlyStopping
+STATE_DIR_PATTERN = re.compile(r"[0-9a-f]+_b\d+")  # <version des données>_b<batch global>
+
+
+class TrainingCheckpoint:
+    """
+    Checkpoints de l'état d'entraînement dans directory (un par version des données)
+
+    Seuls les keep derniers sont conservés, les checkpoints voisins (autres
+    versions des données : répertoires <version>_b<batch> contenant un fichier
+    checkpoint) sont supprimés, et clear() efface tout à la fin de
+    l'entraînement. Les autres répertoires voisins ne sont jamais touchés. En multi-workers, tous les workers participent à la
+    sauvegarde mais seul le chief écrit dans directory.
+    """
+
+    def __init__(self, directory: Path, every_steps: int, keep: int = 3,
+                 chief: bool = True, worker_index: int = 0):
+        if every_steps < 1:
+            raise ValueError(f"every_steps doit être positif : {every_steps}")
+        self.directory = Path(directory)
+        self.every_steps = every_steps
+        self.keep = keep
+        self.chief = chief
+        self._write_dir = self.directory if chief else self.directory / f".worker_{worker_index}"
+        self._checkpoint = None
+        self._manager = None
+        self._progress = None
+        self._best_weights = None
+        if chief and self.directory.parent.exists():
+            for path in self.directory.parent.iterdir():
+                if (path != self.directory and path.is_dir() and STATE_DIR_PATTERN.fullmatch(path.name)
+                        and (path / "checkpoint").is_file()):
+                    shutil.rmtree(path)
+
+    def restore(self, model) -> Optional[Dict]:
+        """
+        Restaure le dernier checkpoint dans model (optimiseur construit)
+
+        Returns:
+            Progression sauvegardée par save, None sans checkpoint
+        """
+        self._progress = tf.Variable("{}", dtype=tf.string, trainable=False)
+        # Copie des poids de la meilleure epoch (EarlyStopping.best_weights, même ordre que model.get_weights())
+        self._best_weights = [tf.Variable(tf.zeros(weight.shape, weight.dtype), trainable=False)
+                              for weight in model.weights]
+        self._checkpoint = tf.train.Checkpoint(
+            model=list(model.variables), optimizer=list(model.optimizer.variables), progress=self._progress,
+            best_weights=list(self._best_weights)
+        )
+        self._manager = tf.train.CheckpointManager(
+            self._checkpoint, str(self._write_dir), max_to_keep=self.keep if self.chief else 1
+        )
+        latest = tf.train.latest_checkpoint(str(self.directory))
+        if latest is None:
+            return None
+        self._checkpoint.restore(latest).assert_existing_objects_matched()
+        return json.loads(self._progress.numpy().decode("utf-8"))
+
+    def save(self, progress: Dict, global_step: int, best_weights=None):
+        """Sauvegarde l'état du modèle, progress (JSON) et best_weights sous le numéro global_step"""
+        if best_weights is not None:
+            for variable, value in zip(self._best_weights, best_weights):
+                variable.assign(value)
+        self._progress.assign(json.dumps(progress))
+        self._manager.save(checkpoint_number=global_step)
+        if not self.chief:
+            shutil.rmtree(self._write_dir, ignore_errors=True)
+
+    def best_weights(self):
+        """Poids de la meilleure epoch restaurés (valide si progress["best_weights"])"""
+        return [variable.numpy() for variable in self._best_weights]
+
+    def clear(self):
+        """Entraînement terminé : le prochain repartira de zéro"""
+        if self.chief:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def monitor_state(callbacks) -> Dict:
+    """Meilleure valeur et patience des callbacks de suivi, par classe"""
+    state = {}
+    for callback in callbacks:
+        values = {name: getattr(callback, name) for name in MONITOR_STATE if getattr(callback, name, None) is not None}
+        if values:
+            state[type(callback).__name__] = {name: float(value) for name, value in values.items()}
+    return state
+
+
+def best_weights(callbacks):
+    """Poids de la meilleure epoch retenus par EarlyStopping(restore_best_weights=True), None sinon"""
+    return next((callback.best_weights for callback in callbacks
+                 if getattr(callback, "best_weights", None) is not None), None)
+
+
+def restore_monitor_state(callbacks, state: Dict, weights=None):
+    """Inverse de monitor_state et best_weights (après on_train_begin, qui les réinitialise)"""
+    for callback in callbacks:
+        for name, value in state.get(type(callback).__name__, {}).items():
+            setattr(callback, name, int(value) if name != "best" else value)
+        if weights is not None and getattr(callback, "restore_best_weights", False):
+            callback.best_weights = weights
+
+
+def fit_loop(model, train_epoch: Callable[[int], tf.data.Dataset], val_ds, epochs: int, steps_per_epoch: int,
+             validation_steps: int, strategy=None, callbacks=None,
+             checkpoint: Optional[TrainingCheckpoint] = None, verbose: int = 1):
+    """
+    Équivalent de model.fit, sous strategy (stratégie par défaut si None)
+
+    Args:
+        model: Modèle compilé (dans strategy.scope()), perte binaire sur une sortie sigmoïde
+        train_epoch: epoch -> batches locaux de ce worker pour cette epoch
+        val_ds: Batches de validation locaux, relus depuis le début à chaque epoch
+        steps_per_epoch, validation_steps: Identiques sur tous les workers
+        callbacks: Callbacks Keras (ModelCheckpoint à ne passer qu'au chief)
+        checkpoint: Sauvegarde périodique et reprise de l'état complet
+
+    Returns:
+        History, comme model.fit (loss, accuracy, val_loss, val_accuracy)
+    """
+    strategy = strategy or tf.distribute.get_strategy()
+    callbacks = list(callbacks or [])
+    optimizer = model.optimizer
+    with strategy.scope():
+        optimizer.build(model.trainable_variables)  # Variables créées hors de strategy.run
+
+    def distribute(dataset):
+        return iter(strategy.distribute_datasets_from_function(lambda context: dataset.prefetch(tf.data.AUTOTUNE)))
+
+    def totals(labels, scores):
+        """Pertes du batch local et sommes (perte, bonnes réponses, images)"""
+        losses = tf.keras.losses.binary_crossentropy(tf.cast(labels[:, None], tf.float32), scores)
+        correct = tf.equal(tf.cast(scores[:, 0] > 0.5, labels.dtype), labels)
+        return losses, tf.stack([tf.reduce_sum(losses), tf.reduce_sum(tf.cast(correct, tf.float32)),
+                                 tf.cast(tf.size(labels), tf.float32)])
+
+    def replica_train_step(images, labels):
+        with tf.GradientTape() as tape:
+            scores = model(images, training=True)
+            losses, sums = totals(labels, scores)
+            # Moyenne sur le batch global (local × replicas) : la somme des gradients des replicas est le gradient moyen
+            loss = tf.nn.compute_average_loss(losses)
+            scaled_loss = optimizer.scale_loss(loss)
+        gradients = tape.gradient(scaled_loss, model.trainable_variables)
+        optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+        return sums
+
+    if getattr(model, "jit_compile", False):
+        replica_train_step = tf.function(replica_train_step, jit_compile=True)
+
+    def replica_test_step(images, labels):
+        return totals(labels, model(images, training=False))[1]
+
+    @tf.function
+    def train_step(iterator):
+        return strategy.reduce("SUM", strategy.run(replica_train_step, args=next(iterator)), axis=None)
+
+    @tf.function
+    def test_step(iterator):
+        return strategy.reduce("SUM", strategy.run(replica_test_step, args=next(iterator)), axis=None)
+
+    def logs_from(sums, prefix=""):
+        loss, correct, count = sums
+        return {f"{prefix}loss": loss / count, f"{prefix}accuracy": correct / count}
+
+    callback_list = tf.keras.callbacks.CallbackList(
+        callbacks, add_history=True, add_progbar=verbose > 0, model=model,
+        verbose=verbose, epochs=epochs, steps=steps_per_epoch
+    )
+    model.stop_training = False
+    callback_list.on_train_begin()
+
+    start_epoch, start_step, sums = 0, 0, np.zeros(3)
+    progress = checkpoint.restore(model) if checkpoint else None
+    if progress:
+        start_epoch, start_step, sums = progress["epoch"], progress["step"], np.array(progress["sums"])
+        model.history.history, model.history.epoch = progress["history"], list(range(start_epoch))
+        restore_monitor_state(callbacks, progress["monitors"],
+                              checkpoint.best_weights() if progress.get("best_weights") else None)
+        print(f"🔁 Reprise de l'entraînement: epoch {start_epoch + 1}, pas {start_step}/{steps_per_epoch}")
+
+    def save(epoch, step, sums):
+        weights = best_weights(callbacks)
+        progress = {"epoch": epoch, "step": step, "sums": sums.tolist(), "history": model.history.history,
+                    "monitors": monitor_state(callbacks), "best_weights": weights is not None}
+        checkpoint.save(progress, global_step=epoch * steps_per_epoch + step, best_weights=weights)
+
+    logs = {}
+    for epoch in range(start_epoch, epochs):
+        callback_list.on_epoch_begin(epoch)
+        first_step = start_step if epoch == start_epoch else 0
+        if epoch != start_epoch:
+            sums = np.zeros(3)
+        elif first_step:
+            logs = logs_from(sums)  # Reprise éventuellement après le dernier pas de l'epoch
+        train_iterator = distribute(train_epoch(epoch).skip(first_step))
+        for step in range(first_step, steps_per_epoch):
+            callback_list.on_train_batch_begin(step)
+            sums += train_step(train_iterator).numpy()
+            logs = logs_from(sums)
+            callback_list.on_train_batch_end(step, logs)
+            if checkpoint and (epoch * steps_per_epoch + step + 1) % checkpoint.every_steps == 0:
+                save(epoch, step + 1, sums)
+
+        val_iterator = distribute(val_ds)
+        val_sums = np.zeros(3)
+        for _ in range(validation_steps):
+            val_sums += test_step(val_iterator).numpy()
+        logs.update(logs_from(val_sums, prefix="val_"))
+        callback_list.on_epoch_end(epoch, logs)
+        if model.stop_training:  # EarlyStopping : mêmes logs, même décision sur tous les workers
+            break
+        if checkpoint:
+            save(epoch + 1, 0, np.zeros(3))
+    callback_list.on_train_end(logs)
+    if checkpoint:
+        checkpoint.clear()
+    return model.history
@@ -6,6 +6,13 @@ Ce service récupère les données de PostgreSQL et génère :
 - Courbe temporelle des temps d'inférence
 - KPI du taux de satisfaction utilisateur
 - Scatter plot de la satisfaction dans le temps
+
+Les partitions expirées de predictions_feedback sont remplacées par des agrégats
+horaires (predictions_hourly_rollup) : les KPI et la courbe combinent ces agrégats
+pour l'historique ancien et les lignes brutes pour la période récente.
+Les questions sur une période arbitraire (get_long_range_kpis, exposé par
+GET /api/statistics/long-range) interrogent l'archive Parquet locale pour les
+partitions supprimées au lieu de PostgreSQL.
 """
 
 from sqlalchemy.orm import Session
@@ -20,8 +27,12 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ROOT_DIR))
 
-from src.database.models import PredictionFeedback
+from src.database.models import PredictionFeedback, PredictionHourlyRollup
+from src.database.archive_service import ArchiveService
+from src.database.export_service import PARQUET_AVAILABLE
+from src.database.query_monitor import track_queries
 
+@track_queries
 class DashboardService:
     """Service pour générer les données et graphiques du dashboard"""
     
@@ -33,8 +44,9 @@ class DashboardService:
         Returns:
             Dict avec temps moyen, min, max, et nombre de prédictions
         """
+        # Période récente : partitions brutes
         result = db.query(
-            func.avg(PredictionFeedback.inference_time_ms).label('avg_time'),
+            func.sum(PredictionFeedback.inference_time_ms).label('sum_time'),
             func.min(PredictionFeedback.inference_time_ms).label('min_time'),
             func.max(PredictionFeedback.inference_time_ms).label('max_time'),
             func.count(PredictionFeedback.id).label('total_predictions')
@@ -42,11 +54,24 @@ class DashboardService:
             PredictionFeedback.success == True
         ).first()
         
+        # Historique ancien : agrégats horaires des partitions supprimées
+        rollup = db.query(
+            func.sum(PredictionHourlyRollup.inference_time_sum_ms).label('sum_time'),
+            func.min(PredictionHourlyRollup.inference_time_min_ms).label('min_time'),
+            func.max(PredictionHourlyRollup.inference_time_max_ms).label('max_time'),
+            func.sum(PredictionHourlyRollup.successful_predictions).label('total_predictions')
+        ).first()
+        
+        total = int(result.total_predictions or 0) + int(rollup.total_predictions or 0)
+        sum_time = float(result.sum_time or 0) + float(rollup.sum_time or 0)
+        min_times = [t for t in (result.min_time, rollup.min_time) if t is not None]
+        max_times = [t for t in (result.max_time, rollup.max_time) if t is not None]
+        
         return {
-            'avg_inference_time_ms': round(float(result.avg_time), 2) if result.avg_time else 0,
-            'min_inference_time_ms': int(result.min_time) if result.min_time else 0,
-            'max_inference_time_ms': int(result.max_time) if result.max_time else 0,
-            'total_predictions': int(result.total_predictions) if result.total_predictions else 0
+            'avg_inference_time_ms': round(sum_time / total, 2) if total else 0,
+            'min_inference_time_ms': int(min(min_times)) if min_times else 0,
+            'max_inference_time_ms': int(max(max_times)) if max_times else 0,
+            'total_predictions': total
         }
     
     @staticmethod
@@ -69,6 +94,14 @@ class DashboardService:
             PredictionFeedback.rgpd_consent == True
         ).scalar() or 0
         
+        # Ajout des feedbacks agrégés des partitions supprimées
+        rollup = db.query(
+            func.sum(PredictionHourlyRollup.feedback_total).label('total'),
+            func.sum(PredictionHourlyRollup.feedback_positive).label('positive')
+        ).first()
+        total_feedbacks += int(rollup.total or 0)
+        positive_feedbacks += int(rollup.positive or 0)
+        
         # Calcul du taux de satisfaction
         satisfaction_rate = round((positive_feedbacks / total_feedbacks * 100), 2) if total_feedbacks > 0 else 0
         
@@ -97,12 +130,24 @@ class DashboardService:
             PredictionFeedback.created_at
         ).all()
         
-        if not predictions:
+        # Historique ancien : un point par heure (moyenne horaire)
+        rollups = db.query(
+            PredictionHourlyRollup.bucket_start,
+            PredictionHourlyRollup.inference_time_sum_ms,
+            PredictionHourlyRollup.successful_predictions
+        ).filter(
+            PredictionHourlyRollup.successful_predictions > 0
+        ).order_by(
+            PredictionHourlyRollup.bucket_start
+        ).all()
+        
+        if not predictions and not rollups:
             return "<p>Aucune donnée disponible</p>"
         
-        # Préparation des données
-        timestamps = [p.created_at for p in predictions]
-        inference_times = [p.inference_time_ms for p in predictions]
+        # Préparation des données (les agrégats précèdent toujours les lignes brutes)
+        timestamps = [r.bucket_start for r in rollups] + [p.created_at for p in predictions]
+        inference_times = [r.inference_time_sum_ms / r.successful_predictions for r in rollups] \
+            + [p.inference_time_ms for p in predictions]
         
         # Création du graphique
         fig = go.Figure()
@@ -117,8 +162,10 @@ class DashboardService:
             marker=dict(size=6)
         ))
         
-        # Ligne de moyenne
-        avg_time = sum(inference_times) / len(inference_times)
+        # Ligne de moyenne (pondérée par le nombre de prédictions de chaque point)
+        total_time = sum(r.inference_time_sum_ms for r in rollups) + sum(p.inference_time_ms for p in predictions)
+        total_count = sum(r.successful_predictions for r in rollups) + len(predictions)
+        avg_time = total_time / total_count
         fig.add_trace(go.Scatter(
             x=[timestamps[0], timestamps[-1]],
             y=[avg_time, avg_time],
@@ -246,6 +293,71 @@ class DashboardService:
                 
         return fig.to_html(full_html=False, include_plotlyjs='cdn')
     
+    @staticmethod
+    def get_long_range_kpis(db: Session, start: datetime, end: datetime) -> Dict:
+        """
+        KPI sur une période arbitraire [start, end)
+        
+        Les partitions supprimées sont lues depuis l'archive Parquet (pushdown des
+        filtres, aucune charge sur la base) et les partitions conservées depuis
+        PostgreSQL (élagage des partitions par created_at). Les deux sources sont
+        disjointes : une partition archivée est supprimée de la base.
+        
+        Returns:
+            Dict avec KPI temps d'inférence et KPI satisfaction sur la période
+        """
+        recent = db.query(
+            func.sum(PredictionFeedback.inference_time_ms).label('sum_time'),
+            func.min(PredictionFeedback.inference_time_ms).label('min_time'),
+            func.max(PredictionFeedback.inference_time_ms).label('max_time'),
+            func.count(PredictionFeedback.id).label('total_predictions')
+        ).filter(
+            PredictionFeedback.success == True,
+            PredictionFeedback.created_at >= start,
+            PredictionFeedback.created_at < end
+        ).first()
+        
+        feedback_total, feedback_positive = db.query(
+            func.count(PredictionFeedback.user_feedback),
+            func.coalesce(func.sum(PredictionFeedback.user_feedback), 0)
+        ).filter(
+            PredictionFeedback.rgpd_consent == True,
+            PredictionFeedback.created_at >= start,
+            PredictionFeedback.created_at < end
+        ).first()
+        
+        if PARQUET_AVAILABLE:
+            archived = ArchiveService.get_kpi_inference_time(start, end)
+            archived_satisfaction = ArchiveService.get_kpi_user_satisfaction(start, end)
+        else:
+            archived = {'sum_inference_time_ms': 0, 'total_predictions': 0}
+            archived_satisfaction = {'positive_feedbacks': 0, 'total_feedbacks': 0}
+        
+        total = int(recent.total_predictions or 0) + archived['total_predictions']
+        sum_time = float(recent.sum_time or 0) + archived['sum_inference_time_ms']
+        min_times = [t for t in (recent.min_time, archived.get('min_inference_time_ms')) if t is not None]
+        max_times = [t for t in (recent.max_time, archived.get('max_inference_time_ms')) if t is not None]
+        
+        total_feedbacks = int(feedback_total or 0) + archived_satisfaction['total_feedbacks']
+        positive_feedbacks = int(feedback_positive or 0) + archived_satisfaction['positive_feedbacks']
+        
+        return {
+            'start': start,
+            'end': end,
+            'kpi_inference': {
+                'avg_inference_time_ms': round(sum_time / total, 2) if total else 0,
+                'min_inference_time_ms': int(min(min_times)) if min_times else 0,
+                'max_inference_time_ms': int(max(max_times)) if max_times else 0,
+                'total_predictions': total
+            },
+            'kpi_satisfaction': {
+                'satisfaction_rate': round(positive_feedbacks / total_feedbacks * 100, 2) if total_feedbacks else 0,
+                'positive_feedbacks': positive_feedbacks,
+                'negative_feedbacks': total_feedbacks - positive_feedbacks,
+                'total_feedbacks': total_feedbacks
+            }
+        }
+    
     @staticmethod
     def get_dashboard_data(db: Session) -> Dict:
         """
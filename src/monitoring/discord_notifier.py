@@ -1,46 +1,147 @@
+"""
+Notifications Discord (webhook) envoyées en arrière-plan
+
+send_alert n'effectue aucun appel réseau : l'alerte est placée dans une file
+bornée, consommée par un thread dédié. Appeler send_alert depuis un handler
+(ex : /health pendant une panne de la base) ne bloque donc jamais la boucle asyncio.
+
+- Déduplication / coalescence : une seule alerte par clé (titre par défaut)
+  et par fenêtre coalesce_seconds ; les occurrences supprimées sont comptées
+  et signalées dans l'alerte suivante de même clé
+- Token bucket : débit moyen rate_per_second, rafale burst
+- Timeout HTTP, retry avec backoff exponentiel ; une réponse 429 est retentée
+  après le retry_after indiqué par Discord
+- Compteurs de livraison (stats), exportés par Prometheus via observers
+"""
 
 import os
+import queue
+import threading
+import time
 import requests
+from collections import Counter
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
+import sys
 ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
 
 load_dotenv(ROOT_DIR / '.env')
+
+from config.settings import DISCORD_CONFIG
+
+DELIVERY_OUTCOMES = ("sent", "failed", "dropped", "coalesced", "retried", "rate_limited")
+
+
+class TokenBucket:
+    """Limiteur de débit : rate jetons par seconde, capacité burst"""
+    
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self._clock = clock
+        self._updated = clock()
+    
+    def wait_time(self) -> float:
+        """Secondes à attendre avant qu'un jeton soit disponible (0 si disponible)"""
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+    
+    def acquire(self, stop_event: threading.Event) -> bool:
+        """Attend puis consomme un jeton (False si stop_event est levé pendant l'attente)"""
+        while True:
+            delay = self.wait_time()
+            if delay == 0:
+                self.tokens -= 1
+                return True
+            if stop_event.wait(delay):
+                return False
+
+
 class DiscordNotifier:
     """
     Envoie des notifications Discord pour événements critiques
     """
     
-    def __init__(self):
-        self.webhook_url = os.getenv('DISCORD_WEBHOOK_URL')
-        
+    colors = {
+        "info": 3447003,      # Bleu (#3498db) - informations générales
+        "warning": 16776960,  # Jaune (#ffff00) - attention requise
+        "error": 15158332,    # Rouge (#e74c3c) - dysfonctionnement
+        "critical": 10038562  # Rouge foncé (#992d22) - incident majeur
+    }
+    
+    def __init__(self, webhook_url: Optional[str] = None, config: Optional[Dict] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.webhook_url = webhook_url or os.getenv('DISCORD_WEBHOOK_URL')
         self.enabled = bool(self.webhook_url)
         
+        self.config = {**DISCORD_CONFIG, **(config or {})}
+        self.stats = Counter({outcome: 0 for outcome in DELIVERY_OUTCOMES})
+        self.observers: List[Callable[[str], None]] = []  # Appelés à chaque issue de livraison (Prometheus)
+        self._clock = clock
+        self._queue = queue.Queue(maxsize=self.config["queue_size"])
+        self._bucket = TokenBucket(self.config["rate_per_second"], self.config["burst"], clock)
+        self._last_sent: Dict[str, float] = {}      # Clé → instant de la dernière alerte acceptée
+        self._suppressed: Dict[str, int] = Counter()  # Clé → occurrences coalescées depuis
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self._session = requests.Session()
+    
+    def _record(self, outcome: str):
+        self.stats[outcome] += 1
+        for observer in self.observers:
+            try:
+                observer(outcome)
+            except Exception as e:
+                print(f"⚠️  Discord delivery observer failed: {e}")
+    
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+    
     def send_alert(self, 
                    title: str, 
                    message: str, 
                    level: str = "info",
-                   metrics: Optional[dict] = None):
+                   metrics: Optional[dict] = None,
+                   key: Optional[str] = None) -> bool:
         """
-        Envoie une alerte Discord enrichie (embed)
+        Met en file une alerte Discord enrichie (embed), sans appel réseau
+        
+        Returns:
+            bool: True si l'alerte est mise en file, False si elle est coalescée,
+            abandonnée (file pleine) ou si Discord est désactivé
         """
         if not self.enabled:
-            return 
-        colors = {
-            "info": 3447003,      # Bleu (#3498db) - informations générales
-            "warning": 16776960,  # Jaune (#ffff00) - attention requise
-            "error": 15158332,    # Rouge (#e74c3c) - dysfonctionnement
-            "critical": 10038562  # Rouge foncé (#992d22) - incident majeur
-        }
+            return False
+        
+        key = key or title
+        now = self._clock()
+        with self._lock:
+            last_sent = self._last_sent.get(key)
+            if last_sent is not None and now - last_sent < self.config["coalesce_seconds"]:
+                self._suppressed[key] += 1
+                self._record("coalesced")
+                return False
+            suppressed = self._suppressed.pop(key, 0)
+            self._last_sent[key] = now
+        
+        metrics = dict(metrics or {})
+        if suppressed:
+            metrics["Coalesced"] = f"{suppressed} similar alert(s) suppressed"
+        
         embed = {
             "title": f"🚨 {title}",
             
             "description": message,
             
-            "color": colors.get(level, 3447003),
+            "color": self.colors.get(level, 3447003),
             
             "timestamp": datetime.utcnow().isoformat(),
             
@@ -52,11 +153,11 @@ class DiscordNotifier:
         if metrics:
             embed["fields"] = [
                 {
-                    "name": key,           # Nom de la métrique
+                    "name": name,          # Nom de la métrique
                     "value": str(value),   # Valeur (converti en string)
                     "inline": True         # Affichage côte à côte (max 3 par ligne)
                 }
-                for key, value in metrics.items()
+                for name, value in metrics.items()
             ]
         payload = {
             "username": "MLOps Bot",
@@ -64,13 +165,101 @@ class DiscordNotifier:
             "embeds": [embed]
         }
         
+        self._ensure_worker()
         try:
-            response = requests.post(self.webhook_url, json=payload)
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            with self._lock:
+                # Alerte non envoyée : la suivante de cette clé passe, avec les occurrences supprimées
+                if self._last_sent.get(key) == now:
+                    if last_sent is None:
+                        del self._last_sent[key]
+                    else:
+                        self._last_sent[key] = last_sent
+                self._suppressed[key] += suppressed
+            self._record("dropped")
+            print(f"⚠️  Discord queue full, alert dropped: {title}")
+            return False
+        return True
+    
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stop.clear()
+                self._worker = threading.Thread(target=self._run, name="discord-notifier", daemon=True)
+                self._worker.start()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                payload = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._deliver(payload)
+            finally:
+                self._queue.task_done()
+    
+    def _deliver(self, payload: dict) -> bool:
+        """Envoi avec timeout, retry et backoff (respect du retry_after des 429)"""
+        for attempt in range(self.config["max_retries"] + 1):
+            if not self._bucket.acquire(self._stop):
+                return False
+            if attempt:
+                self._record("retried")
             
-            response.raise_for_status()
+            delay = self.config["backoff_seconds"] * 2 ** attempt
+            try:
+                response = self._session.post(self.webhook_url, json=payload,
+                                              timeout=self.config["timeout_seconds"])
+                if response.status_code == 429:
+                    self._record("rate_limited")
+                    delay = self._retry_after(response, delay)
+                else:
+                    response.raise_for_status()
+                    self._record("sent")
+                    return True
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code < 500:
+                    print(f"❌ Failed to send Discord alert: {e}")  # 4xx : inutile de réessayer
+                    break
+            except requests.RequestException as e:
+                print(f"⚠️  Discord alert attempt {attempt + 1} failed: {e}")
             
-        except Exception as e:
-            print(f"❌ Failed to send Discord alert: {e}")
+            if attempt < self.config["max_retries"] and self._stop.wait(delay):
+                return False
+        
+        self._record("failed")
+        return False
+    
+    @staticmethod
+    def _retry_after(response, default: float) -> float:
+        """Délai demandé par Discord (corps JSON retry_after ou en-tête Retry-After, en secondes)"""
+        try:
+            return float(response.json()["retry_after"])
+        except (ValueError, KeyError, TypeError):
+            pass
+        try:
+            return float(response.headers.get("Retry-After", default))
+        except (TypeError, ValueError):
+            return default
+    
+    def flush(self, timeout: float = 10) -> bool:
+        """Attend la livraison des alertes en file (True si la file est vide avant timeout)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def close(self):
+        """Arrête le thread d'envoi (les alertes encore en file sont abandonnées)"""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=5)
+            self._worker = None
+        self._session.close()
 
 notifier = DiscordNotifier()
 
@@ -106,11 +295,76 @@ def alert_high_latency(latency_ms: float, threshold: float = 2000):
             }
         )
 
+def alert_latency_slo_breach(quantile: float, latency_ms: float, threshold_ms: float, requests_count: int):
+    """
+    Alerte si un quantile de latence (p95, p99) dépasse son SLO sur la fenêtre glissante
+    """
+    label = f"p{round(quantile * 100)}"
+    notifier.send_alert(
+        title=f"Latency SLO Breach ({label})",
+        message=f"{label} latency is {latency_ms:.0f}ms over the last window (SLO: {threshold_ms:.0f}ms)",
+        level="error",  # Error car une partie des utilisateurs est impactée
+        metrics={
+            label: f"{latency_ms:.0f}ms",
+            "SLO": f"{threshold_ms:.0f}ms",
+            "Requests": requests_count
+        }
+    )
+
+def alert_latency_slo_recovered(quantile: float, latency_ms: float, threshold_ms: float, requests_count: int):
+    """
+    Notification de retour sous le SLO (après hystérésis)
+    """
+    label = f"p{round(quantile * 100)}"
+    notifier.send_alert(
+        title=f"Latency SLO Recovered ({label})",
+        message=f"{label} latency back to {latency_ms:.0f}ms (SLO: {threshold_ms:.0f}ms)",
+        level="info",
+        metrics={
+            label: f"{latency_ms:.0f}ms",
+            "SLO": f"{threshold_ms:.0f}ms",
+            "Requests": requests_count
+        }
+    )
+
+def _drift_metrics(statistics: dict, thresholds: dict, samples: int) -> dict:
+    metrics = {
+        name.upper(): f"{value:.3f}" + (f" (threshold: {thresholds[name]:g})" if name in thresholds else "")
+        for name, value in statistics.items() if value is not None
+    }
+    metrics["Samples"] = samples
+    return metrics
+
+def alert_prediction_drift(feature: str, statistics: dict, thresholds: dict, samples: int):
+    """
+    Alerte si la distribution d'une feature s'écarte de la référence de validation
+    """
+    notifier.send_alert(
+        key=f"drift:{feature}",
+        title=f"Prediction Drift Detected ({feature})",
+        message=f"Distribution of '{feature}' over the last window diverges from the validation reference",
+        level="warning",  # Warning : la qualité du modèle peut se dégrader sans erreur visible
+        metrics=_drift_metrics(statistics, thresholds, samples)
+    )
+
+def alert_prediction_drift_recovered(feature: str, statistics: dict, thresholds: dict, samples: int):
+    """
+    Notification de retour à une distribution proche de la référence (après hystérésis)
+    """
+    notifier.send_alert(
+        key=f"drift_recovered:{feature}",
+        title=f"Prediction Drift Recovered ({feature})",
+        message=f"Distribution of '{feature}' is back close to the validation reference",
+        level="info",
+        metrics=_drift_metrics(statistics, thresholds, samples)
+    )
+
 def alert_database_disconnected():
     """
     Alerte si la base de données PostgreSQL est déconnectée
     """
     notifier.send_alert(
+        key="database_disconnected",  # Une alerte par fenêtre, même si chaque /health échoue
         title="Database Connection Lost",
         message="PostgreSQL database is unreachable. All feedback storage is currently disabled.",
         level="critical",  # Critical car perte de fonctionnalité majeure
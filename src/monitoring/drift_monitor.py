@@ -0,0 +1,302 @@
+"""
+Détection de dérive des prédictions en ligne
+
+- Référence : histogrammes calculés par CatDogTrainer sur le jeu de validation
+  (score brut du modèle, répartition des classes prédites), sauvegardés en JSON
+  à côté du modèle
+- Fenêtre glissante : anneau de vecteurs de comptage par tranche de temps
+  (mémoire fixe : slices × bins entiers), mise à jour O(1) par requête
+- Statistiques (NumPy vectorisé) entre la fenêtre et la référence :
+  PSI (Population Stability Index), KL(fenêtre ‖ référence) et KS (écart
+  maximal des fonctions de répartition, features ordonnées uniquement)
+- Alerte au franchissement d'un seuil, fin d'alerte sous seuil × (1 - hystérésis)
+
+Repères usuels du PSI : < 0,1 stable, 0,1-0,25 dérive modérée, > 0,25 dérive forte.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import sys
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import DRIFT_CONFIG
+
+CLASS_LABELS = ["Cat", "Dog"]  # Ordre de CatDogPredictor : score > 0.5 → Dog
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📐 RÉFÉRENCE - Histogrammes calculés à l'entraînement
+# ═══════════════════════════════════════════════════════════════════════════
+
+def numeric_histogram(values, edges: Sequence[float]) -> Dict:
+    """Histogramme d'une feature continue (valeurs hors bornes ramenées aux bins extrêmes)"""
+    edges = np.asarray(edges, dtype=float)
+    clipped = np.clip(np.asarray(values, dtype=float), edges[0], edges[-1])
+    counts, _ = np.histogram(clipped, bins=edges)
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+def categorical_histogram(values, labels: Sequence[str]) -> Dict:
+    """Histogramme d'une feature catégorielle (valeurs inconnues ignorées, ou comptées dans 'other')"""
+    index = {label: i for i, label in enumerate(labels)}
+    other = index.get("other")
+    codes = np.array([index.get(value, other if other is not None else -1) for value in values], dtype=int)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    return {"labels": list(labels), "counts": counts.tolist()}
+
+
+def score_reference(scores, bins: int = 20) -> Dict[str, Dict]:
+    """Références du score brut et de la classe prédite à partir des scores de validation"""
+    scores = np.asarray(scores, dtype=float).ravel()
+    predicted = np.where(scores > 0.5, CLASS_LABELS[1], CLASS_LABELS[0])
+    return {
+        "raw_score": numeric_histogram(scores, np.linspace(0, 1, bins + 1)),
+        "predicted_class": categorical_histogram(predicted, CLASS_LABELS),
+    }
+
+
+def save_reference(path: Path, features: Dict[str, Dict]) -> Path:
+    """
+    Ajoute ou remplace des features dans le fichier de référence (écriture atomique)
+
+    Les features déjà présentes et non fournies sont conservées.
+    """
+    path = Path(path)
+    reference = load_reference(path) or {"features": {}}
+    reference["features"].update(features)
+    reference["created_at"] = datetime.now().isoformat(timespec="seconds")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(reference, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_reference(path: Path) -> Optional[Dict]:
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📊 STATISTIQUES - PSI, KL, KS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def drift_statistics(reference_counts, current_counts, ordered: bool = True,
+                     epsilon: float = 1e-4) -> Dict[str, Optional[float]]:
+    """
+    Compare deux histogrammes de mêmes bins
+
+    Les proportions nulles sont remplacées par epsilon (PSI et KL restent finis
+    quand un bin est vide d'un côté). KS n'a de sens que pour des bins ordonnés.
+    """
+    reference = np.asarray(reference_counts, dtype=float)
+    current = np.asarray(current_counts, dtype=float)
+    p = reference / reference.sum()
+    q = current / current.sum()
+
+    p_smoothed = np.maximum(p, epsilon)
+    q_smoothed = np.maximum(q, epsilon)
+    p_smoothed /= p_smoothed.sum()
+    q_smoothed /= q_smoothed.sum()
+    log_ratio = np.log(q_smoothed / p_smoothed)
+
+    return {
+        "psi": float(np.sum((q_smoothed - p_smoothed) * log_ratio)),
+        "kl": float(np.sum(q_smoothed * log_ratio)),
+        "ks": float(np.max(np.abs(np.cumsum(q) - np.cumsum(p)))) if ordered else None,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🪟 FENÊTRE GLISSANTE - Comptages par tranche de temps
+# ═══════════════════════════════════════════════════════════════════════════
+
+class SlidingCounts:
+    """Comptages par bin sur les window_seconds dernières secondes (anneau de slices vecteurs)"""
+
+    def __init__(self, n_bins: int, window_seconds: float = 3600, slices: int = 12,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self.slice_seconds = window_seconds / slices
+        self._clock = clock
+        self._counts = np.zeros((slices, n_bins), dtype=np.int64)
+        self._slice_ids = np.full(slices, -1, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def add(self, index: int):
+        slice_id = int(self._clock() // self.slice_seconds)
+        slot = slice_id % len(self._slice_ids)
+        with self._lock:
+            if self._slice_ids[slot] != slice_id:  # Tranche expirée : réutilisée
+                self._counts[slot] = 0
+                self._slice_ids[slot] = slice_id
+            self._counts[slot, index] += 1
+
+    def counts(self) -> np.ndarray:
+        """Comptages cumulés des tranches encore dans la fenêtre"""
+        oldest = int(self._clock() // self.slice_seconds) - len(self._slice_ids) + 1
+        with self._lock:
+            return self._counts[self._slice_ids >= oldest].sum(axis=0)
+
+
+class FeatureWindow:
+    """Feature suivie : bins de la référence, comptages de référence et fenêtre glissante"""
+
+    def __init__(self, name: str, reference: Dict, window_seconds: float, slices: int,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.edges = reference.get("edges")
+        self.labels = reference.get("labels")
+        self.ordered = self.edges is not None
+        self.reference_counts = np.asarray(reference["counts"], dtype=float)
+        self.window = SlidingCounts(len(self.reference_counts), window_seconds, slices, clock)
+        if self.labels is not None:
+            self._label_index = {label: i for i, label in enumerate(self.labels)}
+            self._other_index = self._label_index.get("other")
+
+    def index(self, value) -> Optional[int]:
+        if self.edges is not None:
+            # Bins de la référence en nombre fixe : recherche O(log bins)
+            i = bisect.bisect_right(self.edges, value) - 1
+            return min(max(i, 0), len(self.reference_counts) - 1)
+        return self._label_index.get(value, self._other_index)
+
+    def add(self, value):
+        i = self.index(value)
+        if i is not None:
+            self.window.add(i)
+
+    def proportions(self) -> Dict[str, float]:
+        """Répartition de la fenêtre par label (features catégorielles)"""
+        counts = self.window.counts()
+        total = counts.sum()
+        return {label: float(count / total) if total else 0.0
+                for label, count in zip(self.labels or [], counts)}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🚨 MONITEUR - Évaluation périodique et alertes
+# ═══════════════════════════════════════════════════════════════════════════
+
+class DriftMonitor:
+    """
+    Suivi de la dérive des features présentes dans la référence
+
+    Les callbacks on_drift / on_recover reçoivent (feature, statistiques,
+    seuils, nombre d'observations de la fenêtre). L'évaluation se fait au plus
+    une fois toutes les evaluation_interval_seconds, et seulement avec
+    min_samples observations dans la fenêtre.
+    """
+
+    STATISTICS = ("psi", "kl", "ks")
+
+    def __init__(self, reference: Optional[Dict], thresholds: Dict[str, float],
+                 window_seconds: float = 3600, slices: int = 12, min_samples: int = 200,
+                 hysteresis: float = 0.2, evaluation_interval_seconds: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        self.thresholds = {name: value for name, value in thresholds.items() if value and value > 0}
+        self.min_samples = min_samples
+        self.hysteresis = hysteresis
+        self.evaluation_interval_seconds = evaluation_interval_seconds
+        self.features: Dict[str, FeatureWindow] = {
+            name: FeatureWindow(name, feature_reference, window_seconds, slices, clock)
+            for name, feature_reference in ((reference or {}).get("features") or {}).items()
+        }
+        self.drifted: Dict[str, bool] = {name: False for name in self.features}
+        self.statistics: Dict[str, Dict] = {name: {} for name in self.features}
+        self.on_drift: List[Callable] = []
+        self.on_recover: List[Callable] = []
+        self._clock = clock
+        self._last_evaluation = None
+        self._evaluation_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.features)
+
+    def observe(self, values: Dict):
+        """Enregistre les valeurs d'une requête (features inconnues ignorées) puis réévalue si besoin"""
+        for name, value in values.items():
+            feature = self.features.get(name)
+            if feature is not None:
+                feature.add(value)
+        if not self.features:
+            return
+        now = self._clock()
+        if self._last_evaluation is not None and now - self._last_evaluation < self.evaluation_interval_seconds:
+            return
+        if self._evaluation_lock.acquire(blocking=False):  # Une seule évaluation à la fois
+            try:
+                self._last_evaluation = now
+                self.evaluate()
+            finally:
+                self._evaluation_lock.release()
+
+    def evaluate(self):
+        for name, feature in self.features.items():
+            counts = feature.window.counts()
+            samples = int(counts.sum())
+            if samples < self.min_samples:
+                continue
+            statistics = drift_statistics(feature.reference_counts, counts, feature.ordered)
+            self.statistics[name] = {**statistics, "samples": samples}
+
+            measured = {s: statistics[s] for s in self.thresholds if statistics.get(s) is not None}
+            if not self.drifted[name] and any(measured[s] > self.thresholds[s] for s in measured):
+                self.drifted[name] = True
+                callbacks = self.on_drift
+            elif self.drifted[name] and all(measured[s] < self.thresholds[s] * (1 - self.hysteresis)
+                                             for s in measured):
+                self.drifted[name] = False
+                callbacks = self.on_recover
+            else:
+                continue
+            for callback in callbacks:
+                try:
+                    callback(name, statistics, self.thresholds, samples)
+                except Exception as e:
+                    print(f"⚠️  Drift callback failed: {e}")
+
+    def snapshot(self) -> Dict:
+        """Dernières statistiques et état de dérive par feature"""
+        return {
+            name: {
+                **{s: (round(v, 4) if v is not None else None)
+                   for s, v in self.statistics[name].items() if s in self.STATISTICS},
+                "samples": self.statistics[name].get("samples", 0),
+                "drifted": self.drifted[name],
+            }
+            for name in self.features
+        }
+
+
+def create_drift_monitor(reference_path: Path = DRIFT_CONFIG["reference_path"]) -> DriftMonitor:
+    reference = load_reference(reference_path)
+    if reference is None:
+        print(f"ℹ️  No drift reference at {reference_path}: drift monitoring disabled")
+    return DriftMonitor(
+        reference,
+        thresholds={"psi": DRIFT_CONFIG["psi_threshold"], "kl": DRIFT_CONFIG["kl_threshold"],
+                    "ks": DRIFT_CONFIG["ks_threshold"]},
+        window_seconds=DRIFT_CONFIG["window_seconds"],
+        slices=DRIFT_CONFIG["slices"],
+        min_samples=DRIFT_CONFIG["min_samples"],
+        hysteresis=DRIFT_CONFIG["hysteresis"],
+        evaluation_interval_seconds=DRIFT_CONFIG["evaluation_interval_seconds"],
+    )
+
+
+drift_monitor = create_drift_monitor()
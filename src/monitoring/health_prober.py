@@ -0,0 +1,109 @@
+"""
+Sonde de santé en arrière-plan (base de données et modèle)
+
+Un thread vérifie la base (SELECT 1) et l'état du modèle toutes les
+interval_seconds et garde le dernier état connu avec ses horodatages :
+/health répond depuis la mémoire, sans aller-retour PostgreSQL, même quand
+HEALTHCHECK Docker, Prometheus et load balancers l'interrogent en continu.
+Pendant une panne, seul le thread de sonde attend le timeout de connexion.
+
+Callbacks :
+- on_check(db_connected) après chaque vérification (gauge Prometheus)
+- on_db_down() au passage connecté → déconnecté (alerte Discord)
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+
+class HealthProber:
+    """Vérification périodique de la base et du modèle, état consultable sans I/O"""
+
+    def __init__(self, engine, model_loaded: Callable[[], bool], interval_seconds: float = 10):
+        self.engine = engine
+        self.model_loaded = model_loaded
+        self.interval_seconds = interval_seconds
+        self.on_check: List[Callable[[bool], None]] = []
+        self.on_db_down: List[Callable[[], None]] = []
+
+        self._state: Dict = {
+            "db_connected": None,  # None : aucune vérification encore effectuée
+            "db_error": None,
+            "db_latency_ms": None,
+            "model_loaded": None,
+            "checked_at": None,
+            "last_success_at": None,
+            "last_failure_at": None,
+        }
+        self._checked_monotonic: Optional[float] = None
+        self._check_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Démarre la sonde (première vérification immédiate, en arrière-plan)"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval_seconds)
+
+    def check(self) -> Dict:
+        """Vérification immédiate (sonde périodique ou /health?deep=true)"""
+        with self._check_lock:
+            start = time.perf_counter()
+            error = None
+            try:
+                with self.engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+            except Exception as e:
+                error = str(e).splitlines()[0] if str(e) else type(e).__name__
+            latency_ms = round((time.perf_counter() - start) * 1000, 2)
+
+            now = datetime.now().isoformat(timespec="seconds")
+            was_connected = self._state["db_connected"]
+            connected = error is None
+            self._state.update({
+                "db_connected": connected,
+                "db_error": error,
+                "db_latency_ms": latency_ms,
+                "model_loaded": self.model_loaded(),
+                "checked_at": now,
+            })
+            self._state["last_success_at" if connected else "last_failure_at"] = now
+            self._checked_monotonic = time.monotonic()
+
+        self._notify(connected, went_down=not connected and was_connected is not False)
+        return self.status()
+
+    def _notify(self, connected: bool, went_down: bool):
+        callbacks = [lambda cb=cb: cb(connected) for cb in self.on_check]
+        if went_down:
+            callbacks += list(self.on_db_down)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️  Health prober callback failed: {e}")
+
+    def status(self) -> Dict:
+        """Dernier état connu (aucune I/O)"""
+        state = dict(self._state)
+        state["age_seconds"] = (round(time.monotonic() - self._checked_monotonic, 1)
+                                if self._checked_monotonic is not None else None)
+        return state
@@ -0,0 +1,147 @@
+"""
+Statistiques des images reçues, pour détecter une dérive des entrées
+
+Calculées sur le tableau déjà décodé et redimensionné par CatDogPredictor
+(image_size, 128×128 par défaut) : aucun décodage supplémentaire.
+
+- brightness : luminance moyenne (0-255)
+- contrast : écart-type de la luminance
+- saturation : écart moyen entre canaux max et min (≈ 0 pour une image en
+  niveaux de gris enregistrée en RGB)
+- aspect_ratio : largeur / hauteur de l'image d'origine
+- channel_mode, image_format : mode PIL et format d'encodage d'origine
+
+Coût : ~0,1 ms en 128×128 ; au-delà de budget_ms (moyenne glissante),
+les pixels sont sous-échantillonnés (pas ×2, jusqu'à max_stride).
+La référence est calculée par CatDogTrainer sur les images d'entraînement
+avec les mêmes fonctions, puis suivie par le DriftMonitor.
+"""
+
+import io
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+import sys
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import IMAGE_STATS_CONFIG
+from src.data.zip_source import ZipImageArchive
+from src.monitoring.drift_monitor import categorical_histogram, numeric_histogram
+
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)  # ITU-R BT.601
+
+NUMERIC_EDGES = {
+    "brightness": np.linspace(0, 255, 17),
+    "contrast": np.linspace(0, 128, 17),
+    "saturation": np.linspace(0, 128, 17),
+    "aspect_ratio": np.geomspace(0.25, 4, 17),  # Symétrique autour de 1 (portrait / paysage)
+}
+CATEGORICAL_LABELS = {
+    "channel_mode": ["RGB", "L", "RGBA", "P", "CMYK", "other"],
+    "image_format": ["JPEG", "PNG", "WEBP", "GIF", "BMP", "other"],
+}
+
+
+def compute_image_features(pixels: np.ndarray, width: int, height: int, mode: str,
+                           image_format: Optional[str], stride: int = 1) -> Dict:
+    """Features d'une image à partir de son tableau RGB redimensionné (H, W, 3) uint8"""
+    sample = pixels[::stride, ::stride].astype(np.float32)
+    luma = sample @ LUMA_WEIGHTS
+    red, green, blue = sample[..., 0], sample[..., 1], sample[..., 2]
+    # np.maximum entre canaux : une réduction max(axis=2) sur 3 valeurs est ~50× plus lente
+    spread = np.maximum(np.maximum(red, green), blue) - np.minimum(np.minimum(red, green), blue)
+    return {
+        "brightness": float(luma.mean()),
+        "contrast": float(luma.std()),
+        "saturation": float(spread.mean()),
+        "aspect_ratio": width / height if height else 1.0,
+        "channel_mode": mode,
+        "image_format": image_format or "other",
+    }
+
+
+class ImageStatsExtractor:
+    """Extraction par requête avec budget de temps (sous-échantillonnage adaptatif)"""
+
+    def __init__(self, budget_ms: float = 1.0, max_stride: int = 8):
+        self.budget_ms = budget_ms
+        self.max_stride = max_stride
+        self.stride = 1
+        self.average_ms: Optional[float] = None  # Moyenne glissante exponentielle du coût
+        self.over_budget = 0
+
+    def extract(self, image: Dict) -> Dict:
+        """
+        Args:
+            image: Métadonnées de CatDogPredictor.predict (pixels, width, height, mode, format)
+        """
+        start = time.perf_counter()
+        features = compute_image_features(image["pixels"], image["width"], image["height"],
+                                          image["mode"], image["format"], self.stride)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.average_ms = elapsed_ms if self.average_ms is None else 0.9 * self.average_ms + 0.1 * elapsed_ms
+        if elapsed_ms > self.budget_ms:
+            self.over_budget += 1
+        if self.average_ms > self.budget_ms and self.stride < self.max_stride:
+            self.stride *= 2
+            self.average_ms = None
+            print(f"⚠️  Image stats over budget ({elapsed_ms:.2f}ms > {self.budget_ms}ms): pixel stride → {self.stride}")
+        return features
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📐 RÉFÉRENCE - Images d'entraînement
+# ═══════════════════════════════════════════════════════════════════════════
+
+def features_from_file(path, image_size: Tuple[int, int]) -> Dict:
+    """Même chaîne que CatDogPredictor.preprocess_image : RGB puis redimensionnement"""
+    with Image.open(path) as image:  # Chemin ou objet fichier (membre d'une archive)
+        width, height = image.size
+        mode, image_format = image.mode, image.format
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        pixels = np.array(image.resize(image_size))
+    return compute_image_features(pixels, width, height, mode, image_format)
+
+
+def image_reference(features: List[Dict]) -> Dict[str, Dict]:
+    """Histogrammes de référence de chaque feature image"""
+    reference = {name: numeric_histogram([f[name] for f in features], edges)
+                 for name, edges in NUMERIC_EDGES.items()}
+    reference.update({name: categorical_histogram([f[name] for f in features], labels)
+                      for name, labels in CATEGORICAL_LABELS.items()})
+    return reference
+
+
+def reference_from_directory(data_path, image_size: Tuple[int, int],
+                             sample_size: int = 2000, seed: int = 1337) -> Dict[str, Dict]:
+    """
+    Référence calculée sur un échantillon aléatoire des images de data_path
+    (répertoire ou ZipImageArchive ; images illisibles ignorées)
+    """
+    if isinstance(data_path, ZipImageArchive):
+        files = data_path.keys()
+        open_image = lambda key: io.BytesIO(data_path.read(key))
+    else:
+        files = sorted(path for path in Path(data_path).rglob("*") if path.is_file())
+        open_image = lambda path: path
+    random.Random(seed).shuffle(files)
+    features = []
+    for path in files:
+        if len(features) >= sample_size:
+            break
+        try:
+            features.append(features_from_file(open_image(path), image_size))
+        except Exception:
+            continue
+    return image_reference(features)
+
+
+image_stats_extractor = ImageStatsExtractor(IMAGE_STATS_CONFIG["budget_ms"], IMAGE_STATS_CONFIG["max_stride"])
@@ -0,0 +1,212 @@
+"""
+Quantiles de latence en continu et alerte SLO dans le processus
+
+- DDSketch : histogramme à buckets logarithmiques, erreur relative bornée
+  (1 % par défaut) sur chaque quantile, mémoire fixe (max_bins buckets),
+  fusionnable
+- Fenêtre glissante : anneau de sketches par tranche de temps, fusionnés à la
+  lecture (les tranches expirées sont réinitialisées)
+- SLO : p95/p99 comparés à des seuils ; une alerte est émise au franchissement,
+  la fin d'alerte seulement quand le quantile repasse sous seuil × (1 - hystérésis)
+
+Contrairement à la moyenne (règle Prometheus actuelle), les quantiles révèlent
+une régression qui ne touche qu'une partie des requêtes.
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import sys
+from pathlib import Path
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import LATENCY_SLO_CONFIG
+
+
+class DDSketch:
+    """Sketch de quantiles à erreur relative bornée (valeurs positives)"""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0  # Valeurs <= 0
+        self.count = 0
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Milieu (au sens de l'erreur relative) du bucket ]gamma^(k-1), gamma^k]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float):
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += 1
+
+    def _collapse(self):
+        """Fusionne les plus petits buckets : la précision n'est perdue que sur les valeurs basses"""
+        keys = sorted(self.bins)
+        overflow = keys[:len(keys) - self.max_bins + 1]
+        merged = sum(self.bins.pop(key) for key in overflow)
+        target = keys[len(overflow)]
+        self.bins[target] = self.bins.get(target, 0) + merged
+
+    def merge(self, other: "DDSketch"):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantile q (0 à 1) à relative_accuracy près, None si le sketch est vide"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        cumulated = self.zero_count
+        for key in sorted(self.bins):
+            cumulated += self.bins[key]
+            if cumulated > rank:
+                return self._value(key)
+        return self._value(max(self.bins))
+
+
+class SlidingWindowQuantiles:
+    """Quantiles sur les window_seconds dernières secondes (anneau de slices sketches)"""
+
+    def __init__(self, window_seconds: float = 300, slices: int = 10,
+                 relative_accuracy: float = 0.01, clock: Callable[[], float] = time.monotonic):
+        self.window_seconds = window_seconds
+        self.slice_seconds = window_seconds / slices
+        self.relative_accuracy = relative_accuracy
+        self._clock = clock
+        self._sketches = [DDSketch(relative_accuracy) for _ in range(slices)]
+        self._slice_ids = [None] * slices
+        self._lock = threading.Lock()
+
+    def _current(self) -> DDSketch:
+        slice_id = int(self._clock() // self.slice_seconds)
+        index = slice_id % len(self._sketches)
+        if self._slice_ids[index] != slice_id:  # Tranche expirée : réutilisée
+            self._sketches[index] = DDSketch(self.relative_accuracy)
+            self._slice_ids[index] = slice_id
+        return self._sketches[index]
+
+    def add(self, value: float):
+        with self._lock:
+            self._current().add(value)
+
+    def merged(self) -> DDSketch:
+        """Sketch fusionné des tranches encore dans la fenêtre"""
+        oldest = int(self._clock() // self.slice_seconds) - len(self._sketches) + 1
+        merged = DDSketch(self.relative_accuracy)
+        with self._lock:
+            for slice_id, sketch in zip(self._slice_ids, self._sketches):
+                if slice_id is not None and slice_id >= oldest:
+                    merged.merge(sketch)
+        return merged
+
+    def quantiles(self, qs: Sequence[float]) -> Dict[float, Optional[float]]:
+        merged = self.merged()
+        return {q: merged.quantile(q) for q in qs}
+
+
+class LatencySLOMonitor:
+    """
+    Suivi des quantiles de latence et détection des dépassements de SLO
+
+    Les callbacks on_breach / on_recover reçoivent (quantile, valeur ms, seuil ms,
+    nombre de requêtes dans la fenêtre). L'évaluation se fait au plus une fois
+    toutes les evaluation_interval_seconds, et seulement avec min_samples requêtes.
+    """
+
+    REPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, slos: Dict[float, float], window_seconds: float = 300, slices: int = 10,
+                 relative_accuracy: float = 0.01, hysteresis: float = 0.2, min_samples: int = 50,
+                 evaluation_interval_seconds: float = 5, clock: Callable[[], float] = time.monotonic):
+        self.slos = slos
+        self.hysteresis = hysteresis
+        self.min_samples = min_samples
+        self.evaluation_interval_seconds = evaluation_interval_seconds
+        self.window = SlidingWindowQuantiles(window_seconds, slices, relative_accuracy, clock)
+        self.breached: Dict[float, bool] = {q: False for q in slos}
+        self.on_breach: List[Callable] = []
+        self.on_recover: List[Callable] = []
+        self._clock = clock
+        self._last_evaluation = None
+        self._evaluation_lock = threading.Lock()
+
+    def observe(self, latency_ms: float):
+        """Enregistre une latence puis réévalue les SLO si l'intervalle est écoulé"""
+        self.window.add(latency_ms)
+        now = self._clock()
+        if self._last_evaluation is not None and now - self._last_evaluation < self.evaluation_interval_seconds:
+            return
+        if self._evaluation_lock.acquire(blocking=False):  # Une seule évaluation à la fois
+            try:
+                self._last_evaluation = now
+                self.evaluate()
+            finally:
+                self._evaluation_lock.release()
+
+    def evaluate(self):
+        merged = self.window.merged()
+        if merged.count < self.min_samples:
+            return
+        for q, threshold_ms in self.slos.items():
+            value = merged.quantile(q)
+            if not self.breached[q] and value > threshold_ms:
+                self.breached[q] = True
+                callbacks = self.on_breach
+            elif self.breached[q] and value < threshold_ms * (1 - self.hysteresis):
+                self.breached[q] = False
+                callbacks = self.on_recover
+            else:
+                continue
+            for callback in callbacks:
+                try:
+                    callback(q, value, threshold_ms, merged.count)
+                except Exception as e:
+                    print(f"⚠️  Latency SLO callback failed: {e}")
+
+    def snapshot(self) -> Dict:
+        """Quantiles courants de la fenêtre et état des SLO (pour /health)"""
+        merged = self.window.merged()
+        snapshot = {
+            f"p{round(q * 100)}_ms": round(value, 1) if value is not None else None
+            for q, value in ((q, merged.quantile(q)) for q in self.REPORTED_QUANTILES)
+        }
+        snapshot.update({
+            "count": merged.count,
+            "window_seconds": self.window.window_seconds,
+            "slo_ms": {f"p{round(q * 100)}": threshold for q, threshold in self.slos.items()},
+            "slo_breached": {f"p{round(q * 100)}": breached for q, breached in self.breached.items()},
+        })
+        return snapshot
+
+
+latency_monitor = LatencySLOMonitor(
+    slos={0.95: LATENCY_SLO_CONFIG["p95_ms"], 0.99: LATENCY_SLO_CONFIG["p99_ms"]},
+    window_seconds=LATENCY_SLO_CONFIG["window_seconds"],
+    slices=LATENCY_SLO_CONFIG["slices"],
+    relative_accuracy=LATENCY_SLO_CONFIG["relative_accuracy"],
+    hysteresis=LATENCY_SLO_CONFIG["hysteresis"],
+    min_samples=LATENCY_SLO_CONFIG["min_samples"],
+    evaluation_interval_seconds=LATENCY_SLO_CONFIG["evaluation_interval_seconds"]
+)
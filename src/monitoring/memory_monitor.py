@@ -0,0 +1,132 @@
+"""
+Comptabilité mémoire du processus API
+
+- RSS courant et pic (Linux : /proc/self/statm et getrusage)
+- Tas Python : snapshots tracemalloc à la demande, top N des lignes dont
+  l'allocation a le plus augmenté depuis le snapshot précédent
+- Allocateur TensorFlow (courant et pic par device), si TensorFlow est chargé
+
+tracemalloc n'est activé qu'à la demande (surcoût mémoire et CPU notable),
+via GET /api/admin/memory/tracemalloc, et peut être arrêté par le même endpoint.
+Le RSS courant est déjà exporté par le collecteur process de prometheus_client
+(process_resident_memory_bytes) ; les autres valeurs sont des gauges cv_memory_*.
+"""
+
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Dict, List, Optional
+
+try:
+    import resource  # Absent sous Windows
+except ImportError:
+    resource = None
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """RSS courant et pic du processus, en octets (None si indisponible)"""
+    rss = None
+    try:
+        with open("/proc/self/statm") as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    peak = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if sys.platform == "darwin" else 1024  # Ko sous Linux, octets sous macOS
+
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def tensorflow_memory(devices=("CPU:0", "GPU:0")) -> Dict[str, Dict[str, int]]:
+    """
+    Statistiques de l'allocateur TensorFlow par device ({} si TensorFlow n'est pas chargé)
+
+    TensorFlow n'est jamais importé ici : seul un processus qui l'utilise déjà
+    (chargement du modèle) est interrogé.
+    """
+    tf = sys.modules.get("tensorflow")
+    if tf is None:
+        return {}
+
+    stats = {}
+    for device in devices:
+        try:
+            info = tf.config.experimental.get_memory_info(device)
+        except (ValueError, RuntimeError):
+            continue  # Device absent ou allocateur sans statistiques
+        stats[device] = {"current_bytes": info["current"], "peak_bytes": info["peak"]}
+    return stats
+
+
+def python_heap() -> Dict:
+    """Mémoire suivie par tracemalloc (valeurs nulles si le suivi est inactif)"""
+    current, peak = tracemalloc.get_traced_memory()
+    return {"tracing": tracemalloc.is_tracing(), "traced_bytes": current, "traced_peak_bytes": peak}
+
+
+class HeapSnapshots:
+    """Snapshots tracemalloc successifs et différences entre eux"""
+
+    # Allocations internes de tracemalloc et de ce module, sans intérêt pour le diagnostic
+    FILTERS = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+
+    def __init__(self):
+        self._previous = None
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = 1):
+        """Active le suivi (frames : profondeur de pile enregistrée par allocation)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        """Désactive le suivi et libère les traces"""
+        with self._lock:
+            self._previous = None
+            tracemalloc.stop()
+
+    def diff(self, top_n: int = 20) -> Optional[List[Dict]]:
+        """
+        Top N des lignes dont l'allocation a le plus augmenté depuis l'appel précédent
+
+        Returns:
+            None au premier appel (suivi démarré, snapshot de référence pris)
+        """
+        with self._lock:
+            self.start()
+            snapshot = tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+            previous, self._previous = self._previous, snapshot
+            if previous is None:
+                return None
+
+            stats = snapshot.compare_to(previous, "lineno")
+            return [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_bytes": stat.size,
+                    "size_diff_bytes": stat.size_diff,
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:top_n]
+            ]
+
+
+heap_snapshots = HeapSnapshots()
+
+
+def memory_summary() -> Dict:
+    """Vue d'ensemble : processus, tas Python, allocateur TensorFlow"""
+    return {
+        "process": process_memory(),
+        "python_heap": python_heap(),
+        "tensorflow": tensorflow_memory(),
+    }
@@ -0,0 +1,177 @@
+"""
+Profilage statistique du processus en cours (échantillonnage des piles de tous les threads)
+
+Un thread dédié relève à intervalle régulier la pile Python de chaque thread
+(sys._current_frames) et compte les piles identiques. Le résultat est au format
+« collapsed stacks » (une ligne 'thread;frame;frame;... nombre'), lisible par
+flamegraph.pl, speedscope ou inferno.
+
+- Capture à la demande : GET /api/admin/profile?seconds=N (une seule à la fois)
+- Mode continu (PROFILER_CONFIG["continuous"]) : échantillonnage à basse fréquence,
+  un fichier par fenêtre dans PROFILER_CONFIG["dir"], rotation des plus anciens
+
+💡 COÛT BORNÉ
+Aucun hook de traçage n'est installé (contrairement à cProfile) : les threads
+profilés ne sont pas ralentis, seul le thread d'échantillonnage consomme du CPU
+(quelques dizaines de µs par thread et par échantillon, mesuré et renvoyé dans
+l'en-tête X-Profile-Overhead). Durée et fréquence sont plafonnées par la
+configuration. Le code natif (TensorFlow, PIL) apparaît sous la frame Python
+qui l'appelle.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import PROFILER_CONFIG
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Échantillonneur de piles : agrège les piles de tous les threads sauf le sien"""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0  # Temps passé à échantillonner (surcoût)
+        self._ident = None
+
+    def sample_once(self):
+        """Relève la pile courante de chaque thread"""
+        start = time.perf_counter()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == self._ident:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+        self.sampling_seconds += time.perf_counter() - start
+
+    def run(self, duration_seconds: float, stop_event: Optional[threading.Event] = None):
+        """Échantillonne pendant duration_seconds (ou jusqu'à stop_event)"""
+        self._ident = threading.get_ident()
+        stop_event = stop_event or threading.Event()
+        deadline = time.monotonic() + duration_seconds
+        while not stop_event.is_set() and time.monotonic() < deadline:
+            self.sample_once()
+            stop_event.wait(self.interval_seconds)
+
+    def collapsed(self) -> str:
+        """Piles au format collapsed (les plus fréquentes en premier)"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def reset(self):
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+
+    def stats(self, elapsed_seconds: float) -> Dict:
+        """Nombre d'échantillons et surcoût (fraction d'un cœur)"""
+        return {
+            "samples": self.samples,
+            "overhead": round(self.sampling_seconds / elapsed_seconds, 4) if elapsed_seconds else 0.0,
+        }
+
+
+# Une seule capture à la demande à la fois (le surcoût reste celui d'un échantillonneur)
+_profile_lock = threading.Lock()
+
+
+def profile(seconds: float, interval_ms: Optional[float] = None):
+    """
+    Capture bloquante (à appeler hors de la boucle asyncio)
+
+    Returns:
+        (texte collapsed, stats) ou None si une capture est déjà en cours
+    """
+    interval_ms = max(interval_ms or PROFILER_CONFIG["interval_ms"], PROFILER_CONFIG["min_interval_ms"])
+    seconds = min(seconds, PROFILER_CONFIG["max_seconds"])
+
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        sampler = StackSampler(interval_ms / 1000)
+        start = time.perf_counter()
+        sampler.run(seconds)
+        return sampler.collapsed(), sampler.stats(time.perf_counter() - start)
+    finally:
+        _profile_lock.release()
+
+
+class ContinuousProfiler:
+    """
+    Profilage continu à basse fréquence avec rotation des fichiers
+
+    Toutes les window_seconds, les piles de la fenêtre écoulée sont écrites dans
+    profile-YYYYmmdd-HHMMSS-<pid>.collapsed ; seuls les keep fichiers les plus
+    récents de chaque worker (pid) sont conservés.
+    """
+
+    def __init__(self, output_dir: Path, interval_ms: float, window_seconds: float, keep: int):
+        self.output_dir = Path(output_dir)
+        self.window_seconds = window_seconds
+        self.keep = max(1, keep)
+        self.sampler = StackSampler(interval_ms / 1000)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="continuous-profiler", daemon=True)
+        self._thread.start()
+        print(f"🔥 Profilage continu actif ({self.output_dir})")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sampler.run(self.window_seconds, self._stop)
+            self.flush()
+
+    def flush(self) -> Optional[Path]:
+        """Écrit la fenêtre en cours puis applique la rotation"""
+        if not self.sampler.samples:
+            return None
+        path = self.output_dir / f"profile-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.collapsed"  # Un fichier par worker
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(self.sampler.collapsed(), encoding="utf-8")
+        os.replace(tmp_path, path)
+        self.sampler.reset()
+
+        for old_profile in sorted(self.output_dir.glob(f"profile-*-{os.getpid()}.collapsed"))[:-self.keep]:
+            old_profile.unlink(missing_ok=True)
+        return path
+
+
+continuous_profiler = ContinuousProfiler(
+    PROFILER_CONFIG["dir"],
+    interval_ms=PROFILER_CONFIG["continuous_interval_ms"],
+    window_seconds=PROFILER_CONFIG["continuous_window_seconds"],
+    keep=PROFILER_CONFIG["continuous_keep"]
+)
@@ -1,10 +1,28 @@
 
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
+from prometheus_client import multiprocess
 from prometheus_fastapi_instrumentator import Instrumentator
 import os
+import threading
+from pathlib import Path
+
+import sys
+ROOT_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from config.settings import PROMETHEUS_CONFIG
+
+# Mode multiprocess (API_WORKERS > 1, variable posée par scripts/run_api.py avant
+# l'import de prometheus_client) : chaque worker écrit ses valeurs dans des fichiers
+# mmap de PROMETHEUS_MULTIPROC_DIR, /metrics les agrège (Instrumentator).
+# Le multiprocess_mode des Gauges indique comment combiner les workers ; il est
+# ignoré en mono-processus.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
 database_status = Gauge(
     'cv_database_connected',
-    'Database connection status (1=connected, 0=disconnected)'
+    'Database connection status (1=connected, 0=disconnected)',
+    multiprocess_mode='livemin'  # 0 dès qu'un worker vivant perd la base
 )
 def setup_prometheus(app):
     """
@@ -29,11 +47,124 @@ def setup_prometheus(app):
     """
     if os.getenv('ENABLE_PROMETHEUS', 'false').lower() == 'true':
         Instrumentator().instrument(app).expose(app, endpoint="/metrics")
-        print("✅ Prometheus metrics enabled at /metrics")
+        
+        from src.database.db_connector import engine, replica_engine
+        from src.database.query_monitor import QUERY_OBSERVERS
+        instrument_db_pool(engine, "primary")
+        if replica_engine is not None:
+            instrument_db_pool(replica_engine, "replica")
+        if track_db_query not in QUERY_OBSERVERS:
+            QUERY_OBSERVERS.append(track_db_query)
+        instrument_memory()
+        instrument_latency_slo()
+        instrument_drift()
+        instrument_discord()
+        
+        if MULTIPROCESS:
+            cleanup_dead_workers()
+            gauge_refresher.start()
+            print(f"✅ Prometheus metrics enabled at /metrics (multiprocess: {os.environ['PROMETHEUS_MULTIPROC_DIR']})")
+        else:
+            print("✅ Prometheus metrics enabled at /metrics")
     else:
         print("ℹ️  Prometheus metrics disabled")
         # Utile en dev si on veut alléger le monitoring
 
+# ═══════════════════════════════════════════════════════════════════════════
+# 👥 MULTIPROCESS - Gauges lues dans le processus et workers arrêtés
+# ═══════════════════════════════════════════════════════════════════════════
+
+class GaugeRefresher:
+    """
+    Recopie périodiquement des valeurs lues dans le processus vers des gauges
+    
+    En multiprocess, /metrics lit les fichiers mmap de tous les workers :
+    set_function (valeur calculée au scrape, dans le seul worker interrogé) et
+    les collecteurs personnalisés n'y apparaissent pas. Chaque worker recopie
+    donc ses valeurs toutes les refresh_seconds et retire au passage les
+    gauges 'live*' des workers arrêtés.
+    """
+    
+    def __init__(self, refresh_seconds: float = 5):
+        self.refresh_seconds = refresh_seconds
+        self._bindings = []
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def add(self, gauge, read):
+        self._bindings.append((gauge, read))
+    
+    def refresh(self):
+        for gauge, read in self._bindings:
+            try:
+                gauge.set(read())
+            except Exception as e:
+                print(f"⚠️  Gauge refresh failed: {e}")
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prometheus-gauge-refresher", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            cleanup_dead_workers()
+            self._stop.wait(self.refresh_seconds)
+
+gauge_refresher = GaugeRefresher(PROMETHEUS_CONFIG["refresh_seconds"])
+
+def bind_gauge(gauge, read):
+    """
+    Gauge dont la valeur est lue dans le processus
+    
+    - Mono-processus : lue au moment du scrape (set_function)
+    - Multiprocess : recopiée par gauge_refresher
+    """
+    if MULTIPROCESS:
+        gauge_refresher.add(gauge, read)
+    else:
+        gauge.set_function(read)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def cleanup_dead_workers(path=None) -> list:
+    """
+    Supprime les gauges 'live*' des workers arrêtés (worker redémarré par uvicorn,
+    crash, OOM). Les compteurs et histogrammes des workers arrêtés sont conservés :
+    les totaux restent monotones.
+    
+    Returns:
+        list: PIDs des workers nettoyés
+    """
+    path = path or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return []
+    dead = set()
+    for db_file in Path(path).glob("gauge_live*_*.db"):
+        pid = db_file.stem.rsplit("_", 1)[-1]
+        if pid.isdigit() and not _pid_alive(int(pid)):
+            dead.add(int(pid))
+    for pid in dead:
+        multiprocess.mark_process_dead(pid, path)
+    return sorted(dead)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # 📝 HELPERS - Fonctions de tracking appelées par l'API
 # ═══════════════════════════════════════════════════════════════════════════
@@ -113,4 +244,328 @@ def track_image_size(width: int, height: int):
         abnormal_image_size_counter.labels(type='large').inc()
     else:
         abnormal_image_size_counter.labels(type='normal').inc()
-    
\ No newline at end of file
+    
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🔌 POOL DE CONNEXIONS - Dimensionnement du pool SQLAlchemy
+# ═══════════════════════════════════════════════════════════════════════════
+
+db_pool_checked_out = Gauge(
+    'cv_db_pool_checked_out',
+    'Connexions du pool actuellement utilisées',
+    ['pool'],  # 'primary' ou 'replica'
+    multiprocess_mode='livesum'  # Un pool par worker : total des connexions vers PostgreSQL
+)
+
+db_pool_overflow = Gauge(
+    'cv_db_pool_overflow',
+    'Connexions ouvertes au-delà de pool_size (négatif : connexions pas encore ouvertes)',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+db_pool_size = Gauge(
+    'cv_db_pool_size',
+    'Taille configurée du pool (pool_size)',
+    ['pool'],
+    multiprocess_mode='livesum'
+)
+
+db_pool_wait_histogram = Histogram(
+    'cv_db_pool_wait_seconds',
+    'Temps d\'attente d\'une connexion libre du pool',
+    ['pool'],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+db_pool_timeouts_counter = Counter(
+    'cv_db_pool_timeouts_total',
+    'Nombre de QueueTimeout (aucune connexion libre avant pool_timeout)',
+    ['pool']
+)
+
+db_pool_overflow_connections_counter = Counter(
+    'cv_db_pool_overflow_connections_total',
+    'Connexions ouvertes en débordement (au-delà de pool_size)',
+    ['pool']
+)
+
+db_pool_invalidations_counter = Counter(
+    'cv_db_pool_invalidations_total',
+    'Connexions invalidées (erreur de connexion, pre-ping en échec)',
+    ['pool', 'kind']  # 'hard' ou 'soft'
+)
+
+def track_pool_wait(pool_name: str, wait_seconds: float, timed_out: bool):
+    """
+    Enregistre l'attente d'une connexion du pool
+    
+    🔗 APPELÉ PAR : InstrumentedQueuePool (src/database/db_connector.py)
+    """
+    db_pool_wait_histogram.labels(pool=pool_name).observe(wait_seconds)
+    if timed_out:
+        db_pool_timeouts_counter.labels(pool=pool_name).inc()
+
+def instrument_db_pool(engine, pool_name: str):
+    """
+    Exporte l'état du pool de connexions d'un moteur SQLAlchemy
+    
+    - Connexions utilisées, débordement et taille : lus au moment du scrape
+      (engine.pool est relu, le pool peut être recréé par engine.dispose())
+    - Connexions en débordement et invalidations : événements du pool
+    - Temps d'attente et QueueTimeout : InstrumentedQueuePool
+    
+    💡 UTILISATION
+    Comparer cv_db_pool_checked_out et cv_db_pool_wait_seconds aux pics de
+    trafic pour ajuster DB_POOL_SIZE / DB_POOL_MAX_OVERFLOW.
+    
+    Args:
+        engine: Moteur SQLAlchemy (pool InstrumentedQueuePool)
+        pool_name: Label 'pool' des métriques
+    """
+    from sqlalchemy import event
+    from src.database.db_connector import InstrumentedQueuePool
+    
+    bind_gauge(db_pool_checked_out.labels(pool=pool_name), lambda: engine.pool.checkedout())
+    bind_gauge(db_pool_overflow.labels(pool=pool_name), lambda: engine.pool.overflow())
+    bind_gauge(db_pool_size.labels(pool=pool_name), lambda: engine.pool.size())
+    
+    if track_pool_wait not in InstrumentedQueuePool.wait_observers:
+        InstrumentedQueuePool.wait_observers.append(track_pool_wait)
+    
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if engine.pool.overflow() > 0:
+            db_pool_overflow_connections_counter.labels(pool=pool_name).inc()
+    
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        db_pool_invalidations_counter.labels(pool=pool_name, kind='hard').inc()
+    
+    @event.listens_for(engine, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        db_pool_invalidations_counter.labels(pool=pool_name, kind='soft').inc()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🐢 REQUÊTES SQL - Part de PostgreSQL dans la latence des endpoints
+# ═══════════════════════════════════════════════════════════════════════════
+
+db_query_histogram = Histogram(
+    'cv_db_query_duration_seconds',
+    'Latence des requêtes SQL',
+    ['query', 'caller'],  # Empreinte normalisée ('SELECT predictions_feedback 3f9a1c2e'), méthode de service
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+def track_db_query(query: str, caller: str, duration_seconds: float):
+    """
+    Enregistre la latence d'une requête SQL
+    
+    🔗 APPELÉ PAR : src/database/query_monitor.py (événement after_cursor_execute)
+    """
+    db_query_histogram.labels(query=query, caller=caller).observe(duration_seconds)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ⏱️ ÉTAPES D'UNE PRÉDICTION - Où passe le temps de /api/predict
+# ═══════════════════════════════════════════════════════════════════════════
+
+request_stage_histogram = Histogram(
+    'cv_request_stage_seconds',
+    'Durée de chaque étape d\'une requête de prédiction',
+    ['stage'],  # receive, read, decode, resize, inference, image_stats, db, render
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+def track_request_stages(durations: dict):
+    """
+    Enregistre les durées des étapes d'une requête
+    
+    🔗 APPELÉ PAR : /api/predict (StageTimer.durations, en secondes)
+    """
+    for stage, seconds in durations.items():
+        request_stage_histogram.labels(stage=stage).observe(seconds)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧮 MÉMOIRE - RSS, tas Python (tracemalloc) et allocateur TensorFlow
+# ═══════════════════════════════════════════════════════════════════════════
+# Le RSS courant est exporté par le collecteur par défaut (process_resident_memory_bytes)
+
+memory_peak_rss = Gauge(
+    'cv_memory_peak_rss_bytes',
+    'Pic de RSS du processus depuis son démarrage',
+    multiprocess_mode='liveall'  # Mémoire par worker (label pid)
+)
+
+memory_python_heap = Gauge(
+    'cv_memory_python_traced_bytes',
+    'Mémoire Python suivie par tracemalloc (0 si le suivi est inactif)',
+    ['kind'],  # 'current' ou 'peak'
+    multiprocess_mode='liveall'
+)
+
+memory_tf_allocator = Gauge(
+    'cv_memory_tensorflow_allocator_bytes',
+    'Mémoire allouée par l\'allocateur TensorFlow',
+    ['device', 'kind'],  # 'CPU:0', 'GPU:0' ; 'current' ou 'peak'
+    multiprocess_mode='liveall'
+)
+
+def instrument_memory():
+    """
+    Exporte la comptabilité mémoire (valeurs lues au moment du scrape)
+    
+    🔗 APPELÉ PAR : setup_prometheus, après le chargement du modèle
+    (seuls les devices TensorFlow présents à ce moment sont exportés)
+    """
+    from src.monitoring.memory_monitor import process_memory, python_heap, tensorflow_memory
+    
+    bind_gauge(memory_peak_rss, lambda: process_memory()["peak_rss_bytes"] or 0)
+    bind_gauge(memory_python_heap.labels(kind='current'), lambda: python_heap()["traced_bytes"])
+    bind_gauge(memory_python_heap.labels(kind='peak'), lambda: python_heap()["traced_peak_bytes"])
+    
+    for device in tensorflow_memory():
+        for kind in ('current', 'peak'):
+            bind_gauge(
+                memory_tf_allocator.labels(device=device, kind=kind),
+                lambda device=device, kind=kind: tensorflow_memory((device,)).get(device, {}).get(f"{kind}_bytes", 0)
+            )
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🎯 SLO DE LATENCE - Quantiles sur fenêtre glissante (DDSketch)
+# ═══════════════════════════════════════════════════════════════════════════
+
+latency_quantile = Gauge(
+    'cv_prediction_latency_quantile_ms',
+    'Quantile de la latence de bout en bout de /api/predict sur la fenêtre glissante',
+    ['quantile'],  # '0.5', '0.95', '0.99'
+    multiprocess_mode='livemax'  # Quantiles non additionnables : pire worker
+)
+
+latency_slo_breached = Gauge(
+    'cv_prediction_latency_slo_breached',
+    'SLO de latence dépassé (1) ou respecté (0)',
+    ['quantile'],
+    multiprocess_mode='livemax'  # 1 dès qu'un worker dépasse le SLO
+)
+
+def instrument_latency_slo():
+    """
+    Exporte les quantiles de latence et l'état des SLO (valeurs lues au scrape)
+    
+    💡 Les quantiles sont calculés dans le processus : contrairement à la
+    moyenne, un p99 qui se dégrade sur 1 % des requêtes est visible.
+    """
+    from src.monitoring.latency_slo import latency_monitor
+    
+    for q in latency_monitor.REPORTED_QUANTILES:
+        bind_gauge(latency_quantile.labels(quantile=str(q)),
+                   lambda q=q: latency_monitor.window.merged().quantile(q) or 0)
+    for q in latency_monitor.slos:
+        bind_gauge(latency_slo_breached.labels(quantile=str(q)),
+                   lambda q=q: 1 if latency_monitor.breached[q] else 0)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 🧭 DÉRIVE - Prédictions et images reçues comparées à l'entraînement
+# ═══════════════════════════════════════════════════════════════════════════
+
+drift_statistic = Gauge(
+    'cv_drift_statistic',
+    'Écart entre la fenêtre glissante et la référence de validation',
+    ['feature', 'statistic'],  # 'raw_score', 'predicted_class', 'brightness', 'image_format'... ; 'psi', 'kl', 'ks'
+    multiprocess_mode='livemax'  # Pire worker
+)
+
+drift_detected = Gauge(
+    'cv_drift_detected',
+    'Dérive détectée (1) ou non (0)',
+    ['feature'],
+    multiprocess_mode='livemax'
+)
+
+drift_window_samples = Gauge(
+    'cv_drift_window_samples',
+    'Observations dans la fenêtre glissante de dérive',
+    ['feature'],
+    multiprocess_mode='livesum'
+)
+
+predicted_class_ratio = Gauge(
+    'cv_predicted_class_ratio',
+    'Part de chaque classe prédite sur la fenêtre glissante',
+    ['predicted_class'],  # 'Cat', 'Dog'
+    multiprocess_mode='liveall'
+)
+
+image_stats_stride = Gauge(
+    'cv_image_stats_pixel_stride',
+    'Sous-échantillonnage des pixels des statistiques d\'image (> 1 : budget de temps dépassé)',
+    multiprocess_mode='livemax'
+)
+
+def instrument_drift():
+    """
+    Exporte les statistiques de dérive (dernière évaluation) et la répartition des classes
+    
+    💡 Sans référence (modèle entraîné avant son introduction), aucune série n'est exportée :
+    relancer scripts/train.py ou CatDogTrainer.save_drift_reference.
+    """
+    from src.monitoring.drift_monitor import drift_monitor
+    
+    for name, feature in drift_monitor.features.items():
+        for statistic in drift_monitor.STATISTICS:
+            if statistic == 'ks' and not feature.ordered:
+                continue
+            bind_gauge(drift_statistic.labels(feature=name, statistic=statistic),
+                       lambda name=name, statistic=statistic: drift_monitor.statistics[name].get(statistic) or 0)
+        bind_gauge(drift_detected.labels(feature=name), lambda name=name: 1 if drift_monitor.drifted[name] else 0)
+        bind_gauge(drift_window_samples.labels(feature=name),
+                   lambda feature=feature: int(feature.window.counts().sum()))
+    
+    from src.monitoring.image_stats import image_stats_extractor
+    bind_gauge(image_stats_stride, lambda: image_stats_extractor.stride)
+    
+    classes = drift_monitor.features.get('predicted_class')
+    for label in (classes.labels if classes else []):
+        bind_gauge(predicted_class_ratio.labels(predicted_class=label),
+                   lambda label=label: classes.proportions()[label])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# 📢 DISCORD - Livraison des alertes (file d'envoi en arrière-plan)
+# ═══════════════════════════════════════════════════════════════════════════
+
+discord_alerts_counter = Counter(
+    'cv_discord_alerts_total',
+    'Alertes Discord par issue de livraison',
+    ['outcome']  # sent, failed, dropped, coalesced, retried, rate_limited
+)
+
+discord_queue_depth = Gauge(
+    'cv_discord_queue_depth',
+    'Alertes Discord en attente d\'envoi',
+    multiprocess_mode='livesum'  # Une file par worker
+)
+
+def track_discord_delivery(outcome: str):
+    """
+    Enregistre l'issue d'une livraison Discord
+    
+    🔗 APPELÉ PAR : DiscordNotifier.observers (src/monitoring/discord_notifier.py)
+    """
+    discord_alerts_counter.labels(outcome=outcome).inc()
+
+def instrument_discord():
+    """Abonne les compteurs Prometheus aux livraisons du notifier Discord (une seule fois)"""
+    from src.monitoring.discord_notifier import DELIVERY_OUTCOMES, notifier
+    
+    if track_discord_delivery in notifier.observers:
+        return
+    for outcome in DELIVERY_OUTCOMES:
+        discord_alerts_counter.labels(outcome=outcome)  # Séries présentes dès le démarrage, à 0
+    notifier.observers.append(track_discord_delivery)
+    bind_gauge(discord_queue_depth, notifier.queue_depth)
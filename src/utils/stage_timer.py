@@ -0,0 +1,71 @@
+"""
+Chronométrage par étape d'une requête (réception, lecture de l'upload, décodage,
+redimensionnement, inférence, écriture en base, rendu JSON)
+
+Un StageTimer est créé par requête et passé aux fonctions qui doivent découper
+leur temps en étapes. Coût : deux appels à perf_counter et une écriture de dict
+par étape, négligeable devant une inférence.
+
+Les durées sont exposées :
+- dans l'en-tête HTTP Server-Timing (onglet Réseau des navigateurs)
+- dans l'histogramme Prometheus cv_request_stage_seconds (si activé)
+
+RequestStartMiddleware horodate l'arrivée de la requête : le temps passé avant
+l'appel de l'endpoint (réception de l'upload, parsing multipart) devient l'étape
+'receive'.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class RequestStartMiddleware:
+    """
+    Middleware ASGI minimal : horodate l'arrivée de chaque requête HTTP
+    (request.state.start_time) avant la lecture du corps, pour mesurer la
+    réception de l'upload et le parsing du formulaire multipart
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["start_time"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+class StageTimer:
+    """Durées des étapes d'une requête, dans leur ordre d'exécution"""
+
+    def __init__(self, start: Optional[float] = None):
+        self.start = start if start is not None else time.perf_counter()
+        self.durations: Dict[str, float] = {}  # Secondes par étape
+
+    @contextmanager
+    def stage(self, name: str):
+        """Chronomètre le bloc ; une étape répétée cumule ses durées"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - start
+
+    def record(self, name: str, seconds: float):
+        """Ajoute une étape mesurée par ailleurs"""
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        """Secondes écoulées depuis le début de la requête (ou la création du timer)"""
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        """
+        Valeur de l'en-tête Server-Timing (durées en millisecondes)
+
+        Exemple : 'receive;dur=1.2, decode;dur=3.4, inference;dur=41.0, total;dur=52.3'
+        """
+        metrics = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        metrics.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
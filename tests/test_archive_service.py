@@ -0,0 +1,113 @@
+"""
+Tests de l'archive Parquet des prédictions (écriture partitionnée par jour et requêtes)
+et de la rétention des partitions (jamais de suppression sans archive si elle est activée)
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.database.export_service import PARQUET_AVAILABLE
+
+def make_row(row_id, created_at, inference_time_ms, success=True, feedback=None):
+    return (row_id, created_at, inference_time_ms, success, 'cat' if success else 'error',
+            90.0, 10.0, feedback is not None, None, feedback, None)
+
+BATCHES = [
+    [make_row(1, datetime(2025, 1, 1, 10), 100, feedback=1),
+     make_row(2, datetime(2025, 1, 1, 23), 200, feedback=0)],
+    [make_row(3, datetime(2025, 1, 2, 8), 300),
+     make_row(4, datetime(2025, 1, 3, 9), 50, success=False)],
+]
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow non installé")
+class TestArchiveService:
+    """Tests de l'archive colonnaire"""
+    
+    def test_write_one_directory_per_day(self, tmp_path):
+        """Un dossier date=YYYY-MM-DD par jour, sans fichier temporaire résiduel"""
+        from src.database.archive_service import ArchiveService
+        counts = ArchiveService.write_batches(BATCHES, "predictions_feedback_2025_01", tmp_path)
+        
+        assert sum(counts.values()) == 4
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "date=2025-01-01", "date=2025-01-02", "date=2025-01-03"
+        ]
+        assert not list(tmp_path.rglob("*.tmp"))
+    
+    def test_kpis_with_time_range(self, tmp_path):
+        """Les KPI ne portent que sur la période demandée"""
+        from src.database.archive_service import ArchiveService
+        ArchiveService.write_batches(BATCHES, "predictions_feedback_2025_01", tmp_path)
+        
+        kpi = ArchiveService.get_kpi_inference_time(
+            datetime(2025, 1, 1), datetime(2025, 1, 2), archive_dir=tmp_path
+        )
+        assert kpi['total_predictions'] == 2
+        assert kpi['avg_inference_time_ms'] == 150
+        
+        # Les prédictions en échec sont exclues
+        kpi_all = ArchiveService.get_kpi_inference_time(archive_dir=tmp_path)
+        assert kpi_all['total_predictions'] == 3
+        assert kpi_all['max_inference_time_ms'] == 300
+        
+        satisfaction = ArchiveService.get_kpi_user_satisfaction(archive_dir=tmp_path)
+        assert satisfaction['total_feedbacks'] == 2
+        assert satisfaction['satisfaction_rate'] == 50
+    
+    def test_rewrite_is_idempotent(self, tmp_path):
+        """Relancer l'archivage d'une partition remplace ses fichiers"""
+        from src.database.archive_service import ArchiveService
+        ArchiveService.write_batches(BATCHES, "predictions_feedback_2025_01", tmp_path)
+        ArchiveService.write_batches(BATCHES, "predictions_feedback_2025_01", tmp_path)
+        
+        assert ArchiveService.get_kpi_inference_time(archive_dir=tmp_path)['total_predictions'] == 3
+    
+    def test_empty_archive(self, tmp_path):
+        """Une archive absente renvoie des KPI nuls"""
+        from src.database.archive_service import ArchiveService
+        kpi = ArchiveService.get_kpi_inference_time(archive_dir=tmp_path / "absent")
+        assert kpi['total_predictions'] == 0
+
+class TestRetention:
+    """Tests de la suppression des partitions expirées"""
+    
+    @pytest.fixture
+    def retention(self, monkeypatch):
+        """Une partition expirée ; archivage et suppression enregistrés"""
+        from src.database import partition_manager
+        from src.database.partition_manager import PartitionManager
+        calls = []
+        monkeypatch.setattr(PartitionManager, "expired_partitions",
+                            staticmethod(lambda db, retention_months=None: ["predictions_feedback_2024_01"]))
+        monkeypatch.setattr(PartitionManager, "archive_partition",
+                            staticmethod(lambda db, partition: calls.append(("archive", partition)) or 10))
+        monkeypatch.setattr(PartitionManager, "rollup_and_drop_partition",
+                            staticmethod(lambda db, partition: calls.append(("drop", partition)) or 24))
+        monkeypatch.setattr(partition_manager, "PARQUET_AVAILABLE", False)
+        return partition_manager, calls
+    
+    def test_no_drop_without_parquet_when_archive_enabled(self, retention, monkeypatch):
+        """Archivage activé mais pyarrow absent : la partition est conservée"""
+        partition_manager, calls = retention
+        monkeypatch.setitem(partition_manager.ARCHIVE_CONFIG, "enabled", True)
+        with pytest.raises(RuntimeError, match="pyarrow"):
+            partition_manager.PartitionManager.apply_retention(db=None)
+        assert calls == []
+    
+    def test_drop_without_archive_when_disabled(self, retention, monkeypatch):
+        """ARCHIVE_ENABLED=false : suppression sans archive"""
+        partition_manager, calls = retention
+        monkeypatch.setitem(partition_manager.ARCHIVE_CONFIG, "enabled", False)
+        assert partition_manager.PartitionManager.apply_retention(db=None) == {"predictions_feedback_2024_01": 24}
+        assert calls == [("drop", "predictions_feedback_2024_01")]
+    
+    def test_archive_before_drop(self, retention, monkeypatch):
+        """Archive Parquet écrite avant la suppression"""
+        partition_manager, calls = retention
+        monkeypatch.setitem(partition_manager.ARCHIVE_CONFIG, "enabled", True)
+        monkeypatch.setattr(partition_manager, "PARQUET_AVAILABLE", True)
+        partition_manager.PartitionManager.apply_retention(db=None)
+        assert calls == [("archive", "predictions_feedback_2024_01"), ("drop", "predictions_feedback_2024_01")]
@@ -0,0 +1,190 @@
+"""
+Tests de la reprise d'un entraînement interrompu (état complet sauvegardé tous les N pas)
+
+L'entraînement tourne dans un sous-processus (ce fichier exécuté comme script),
+tué par SIGKILL au milieu d'une epoch puis relancé. Les batches rejoués à la
+reprise sont comparés d'un processus à l'autre via CatDogTrainer.prepare_data.
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+STEPS_PER_EPOCH = 12
+EVERY_STEPS = 5
+KILL_AT_STEP = 23  # Epoch 2, après le checkpoint du pas 20
+
+
+def small_model(metrics=None):
+    """Petit modèle avec augmentation et dropout (état aléatoire)"""
+    import tensorflow as tf
+
+    model = tf.keras.Sequential([
+        tf.keras.Input((16, 16, 3)),
+        tf.keras.layers.Rescaling(1.0 / 255),
+        tf.keras.layers.RandomFlip("horizontal"),
+        tf.keras.layers.Conv2D(4, 3, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    model.compile(optimizer=tf.keras.optimizers.Adam(0.01), loss="binary_crossentropy", metrics=metrics)
+    return model
+
+
+def train(output: Path, checkpoint_dir: Path, kill_at: int):
+    """small_model, 3 epochs de 12 pas ; les poids finaux sont ceux de la première epoch"""
+    import tensorflow as tf
+    from src.data.pipeline import batch_images, epoch_batches
+    from src.models.training_loop import TrainingCheckpoint, fit_loop
+
+    tf.keras.utils.set_random_seed(0)
+    tf.config.experimental.enable_op_determinism()
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 256, (120, 16, 16, 3), dtype=np.uint8)
+    labels = (images[..., 0].mean(axis=(1, 2)) > 127).astype(np.int32)
+    train_images = tf.data.Dataset.from_tensor_slices((images[:96], labels[:96])).cache()
+    train_epoch = epoch_batches(lambda epoch: train_images, batch_size=8, shuffle_buffer=96, seed=0)
+    val_ds = batch_images(tf.data.Dataset.from_tensor_slices((images[96:], labels[96:])), batch_size=8)
+
+    model = small_model()
+
+    class Killer(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch = epoch
+
+        def on_train_batch_end(self, batch, logs=None):
+            if self.epoch * STEPS_PER_EPOCH + batch + 1 == kill_at:
+                os.kill(os.getpid(), signal.SIGKILL)
+
+    class FirstEpochBest(tf.keras.callbacks.EarlyStopping):
+        """Meilleure epoch : la première, avant l'interruption ; ses poids sont restaurés à la fin"""
+        def on_epoch_end(self, epoch, logs=None):
+            super().on_epoch_end(epoch, {"val_accuracy": -float(epoch)})
+
+    early_stopping = FirstEpochBest(monitor="val_accuracy", mode="max", patience=10, restore_best_weights=True)
+    checkpoint = TrainingCheckpoint(checkpoint_dir / "v1", EVERY_STEPS, keep=2)
+    history = fit_loop(model, train_epoch, val_ds, epochs=3, steps_per_epoch=STEPS_PER_EPOCH, validation_steps=3,
+                       callbacks=[Killer(), early_stopping], checkpoint=checkpoint, verbose=0)
+    np.savez(output, *model.get_weights())
+    output.with_suffix(".json").write_text(json.dumps(history.history))
+
+
+def run(tmp_path: Path, name: str, kill_at: int = 0):
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+    command = [sys.executable, __file__, str(tmp_path / f"{name}.npz"), str(tmp_path / name), str(kill_at)]
+    return subprocess.run(command, env=env, capture_output=True, text=True, timeout=300)
+
+
+def test_killed_training_resumes_to_identical_state(tmp_path):
+    reference = run(tmp_path, "reference")
+    assert reference.returncode == 0, reference.stderr
+
+    killed = run(tmp_path, "resumed", kill_at=KILL_AT_STEP)
+    assert killed.returncode == -signal.SIGKILL
+    saved = sorted(path.name for path in (tmp_path / "resumed" / "v1").glob("*.index"))
+    assert saved == ["ckpt-15.index", "ckpt-20.index"]  # keep=2 : les checkpoints 5, 10 et 12 sont supprimés
+
+    resumed = run(tmp_path, "resumed")
+    assert resumed.returncode == 0, resumed.stderr
+    assert "Reprise de l'entraînement: epoch 2, pas 8/12" in resumed.stdout
+    assert not (tmp_path / "resumed" / "v1").exists()  # Effacé à la fin de l'entraînement
+
+    expected, actual = np.load(tmp_path / "reference.npz"), np.load(tmp_path / "resumed.npz")
+    for name in expected.files:
+        np.testing.assert_allclose(actual[name], expected[name], rtol=1e-6, atol=1e-7)
+    expected_history = json.loads((tmp_path / "reference.json").read_text())
+    actual_history = json.loads((tmp_path / "resumed.json").read_text())
+    assert expected_history.keys() == actual_history.keys()
+    for key in expected_history:
+        np.testing.assert_allclose(actual_history[key], expected_history[key], rtol=1e-6)
+
+
+def test_fit_loop_matches_model_fit():
+    """Sans interruption, fit_loop (checkpoints actifs par défaut) entraîne comme model.fit"""
+    import tensorflow as tf
+    from src.models.training_loop import fit_loop
+
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 256, (76, 16, 16, 3), dtype=np.uint8)
+    labels = (images[..., 0].mean(axis=(1, 2)) > 127).astype(np.int32)
+    train_ds = tf.data.Dataset.from_tensor_slices((images[:60], labels[:60])).batch(8)  # Dernier batch incomplet
+    val_ds = tf.data.Dataset.from_tensor_slices((images[60:], labels[60:])).batch(8)
+    seen = []
+
+    class Recorder(tf.keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            seen.append((epoch, sorted(logs)))
+
+    tf.keras.utils.set_random_seed(0)
+    expected_model = small_model(metrics=["accuracy"])
+    expected = expected_model.fit(train_ds, epochs=3, validation_data=val_ds, callbacks=[Recorder()], verbose=0)
+    expected_seen, seen[:] = list(seen), []
+    tf.keras.utils.set_random_seed(0)
+    actual_model = small_model(metrics=["accuracy"])
+    actual = fit_loop(actual_model, lambda epoch: train_ds, val_ds, epochs=3, steps_per_epoch=8,
+                      validation_steps=2, callbacks=[Recorder()], verbose=0)
+
+    assert seen == expected_seen
+    assert actual.history.keys() == expected.history.keys()
+    for key in expected.history:
+        np.testing.assert_allclose(actual.history[key], expected.history[key], rtol=1e-5)
+    for actual_weights, expected_weights in zip(actual_model.get_weights(), expected_model.get_weights()):
+        np.testing.assert_allclose(actual_weights, expected_weights, rtol=1e-5, atol=1e-6)
+
+
+def prepare(output: Path, skip: int):
+    """Batches d'une epoch rejoués après skip pas, avec la configuration par défaut"""
+    from src.models.trainer import CatDogTrainer
+
+    trainer = CatDogTrainer()
+    trainer.prepare_data()
+    batches = [(float(images.numpy().astype(np.float64).sum()), labels.numpy().tolist())
+               for images, labels in trainer.train_epoch(1).skip(skip)]
+    output.write_text(json.dumps({"steps": trainer.steps["train"], "batches": batches}))
+
+
+def test_resumed_epoch_replays_same_batches_through_trainer(tmp_path):
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+    from benchmark_distributed_training import synthetic_archive, worker_env
+
+    archive = synthetic_archive(tmp_path / "synthetic.zip", 200, size=(48, 36))
+    env = worker_env(tmp_path, archive, threads=2, epochs=1)
+    env.pop("TRAINING_DETERMINISTIC", None)  # Valeur par défaut : false
+    reports = []
+    for name, skip in (("full", 0), ("resumed", 2)):
+        output = tmp_path / f"{name}.json"
+        command = [sys.executable, __file__, "prepare", str(output), str(skip)]
+        result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=300)
+        assert result.returncode == 0, result.stderr
+        assert "deterministic=True" in result.stdout  # Imposé par les checkpoints actifs
+        reports.append(json.loads(output.read_text()))
+
+    full, resumed = reports
+    assert full["steps"] == len(full["batches"]) > 2
+    assert resumed["batches"] == full["batches"][2:]
+
+
+def test_other_data_versions_are_removed(tmp_path):
+    from src.models.training_loop import TrainingCheckpoint
+
+    (tmp_path / "0ab1_b64").mkdir()
+    (tmp_path / "0ab1_b64" / "checkpoint").write_text("")  # Ancienne version des données
+    (tmp_path / "0ab2_b64").mkdir()  # Nom de checkpoint, sans fichier checkpoint
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "checkpoint").write_text("")  # Répertoire sans rapport
+    TrainingCheckpoint(tmp_path / "0ab3_b64", every_steps=10)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["0ab2_b64", "models"]
+
+
+if __name__ == "__main__":
+    if sys.argv[1] == "prepare":
+        prepare(Path(sys.argv[2]), int(sys.argv[3]))
+    else:
+        train(Path(sys.argv[1]), Path(sys.argv[2]), int(sys.argv[3]))
@@ -0,0 +1,79 @@
+"""
+Tests des KPI sur une période arbitraire (base et archive Parquet simulées)
+"""
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.api.main import app
+from src.database.db_connector import get_read_db
+from src.monitoring import dashboard_service
+from src.monitoring.dashboard_service import DashboardService
+
+Recent = namedtuple("Recent", "sum_time min_time max_time total_predictions")
+
+class FakeSession:
+    """Session dont chaque query(...).filter(...).first() renvoie la ligne suivante"""
+    
+    def __init__(self, *rows):
+        self.rows = list(rows)
+    
+    def query(self, *columns):
+        return self
+    
+    def filter(self, *conditions):
+        return self
+    
+    def first(self):
+        return self.rows.pop(0)
+
+@pytest.fixture
+def archive(monkeypatch):
+    """Archive : 2 prédictions (40 et 60 ms), 1 feedback positif"""
+    monkeypatch.setattr(dashboard_service, "PARQUET_AVAILABLE", True)
+    monkeypatch.setattr(dashboard_service.ArchiveService, "get_kpi_inference_time", staticmethod(
+        lambda start, end: {'sum_inference_time_ms': 100, 'total_predictions': 2,
+                            'min_inference_time_ms': 40, 'max_inference_time_ms': 60}))
+    monkeypatch.setattr(dashboard_service.ArchiveService, "get_kpi_user_satisfaction", staticmethod(
+        lambda start, end: {'positive_feedbacks': 1, 'total_feedbacks': 1}))
+
+class TestLongRangeKpis:
+    """Tests de la fusion base / archive"""
+    
+    def test_database_and_archive_are_merged(self, archive):
+        db = FakeSession(Recent(200, 0, 150, 3), (2, 1))  # Temps d'inférence nul : minimum légitime
+        kpis = DashboardService.get_long_range_kpis(db, datetime(2025, 1, 1), datetime(2025, 7, 1))
+        
+        assert kpis['kpi_inference'] == {'avg_inference_time_ms': 60.0, 'min_inference_time_ms': 0,
+                                         'max_inference_time_ms': 150, 'total_predictions': 5}
+        assert kpis['kpi_satisfaction']['satisfaction_rate'] == pytest.approx(66.67)
+    
+    def test_empty_database(self, archive):
+        db = FakeSession(Recent(None, None, None, 0), (0, 0))
+        kpis = DashboardService.get_long_range_kpis(db, datetime(2024, 1, 1), datetime(2024, 2, 1))
+        assert (kpis['kpi_inference']['min_inference_time_ms'], kpis['kpi_inference']['max_inference_time_ms']) == (40, 60)
+
+class TestLongRangeEndpoint:
+    """Tests de GET /api/statistics/long-range"""
+    
+    @pytest.fixture
+    def client(self, archive):
+        app.dependency_overrides[get_read_db] = lambda: FakeSession(Recent(200, 0, 150, 3), (2, 1))
+        yield TestClient(app)
+        app.dependency_overrides.pop(get_read_db)
+    
+    def test_period_kpis(self, client):
+        response = client.get("/api/statistics/long-range",
+                              params={"start": "2025-01-01T00:00:00", "end": "2025-07-01T00:00:00"})
+        assert response.status_code == 200
+        assert response.json()['kpi_inference']['total_predictions'] == 5
+    
+    def test_empty_period_is_rejected(self, client):
+        response = client.get("/api/statistics/long-range",
+                              params={"start": "2025-07-01T00:00:00", "end": "2025-01-01T00:00:00"})
+        assert response.status_code == 400
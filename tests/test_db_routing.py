@@ -0,0 +1,118 @@
+"""
+Tests du routage lecture/écriture (réplica en lecture avec repli sur la base principale)
+Les bases PostgreSQL sont remplacées par des doublures SQLite locales
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.database.db_connector import ReplicaRouter
+
+class FakeLagRouter(ReplicaRouter):
+    """Routeur dont le retard de réplication est simulé"""
+    
+    def __init__(self, *args, lag=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lag = lag
+        self.checks = 0
+    
+    def replica_lag(self):
+        self.checks += 1
+        return self.lag
+
+@pytest.fixture
+def primary():
+    return create_engine("sqlite://")
+
+@pytest.fixture
+def replica():
+    return create_engine("sqlite://")
+
+class TestReplicaRouter:
+    """Tests du choix du moteur de lecture"""
+    
+    def test_without_replica_reads_go_to_primary(self, primary):
+        """Sans réplica configuré, tout passe par la base principale"""
+        router = ReplicaRouter(primary)
+        assert router.read_engine() is primary
+    
+    def test_healthy_replica_is_used(self, primary, replica):
+        """Un réplica à jour reçoit les lectures"""
+        router = FakeLagRouter(primary, replica, max_lag_seconds=30, lag=1.0)
+        router.check_replica()
+        assert router.read_engine() is replica
+    
+    def test_lagging_replica_falls_back_to_primary(self, primary, replica):
+        """Un réplica trop en retard est écarté"""
+        router = FakeLagRouter(primary, replica, max_lag_seconds=30, lag=120.0)
+        router.check_replica()
+        assert router.read_engine() is primary
+        assert router.replica_lag_seconds == 120.0
+    
+    def test_unreachable_replica_falls_back_to_primary(self, primary, tmp_path):
+        """Un réplica injoignable est écarté sans erreur pour l'appelant"""
+        unreachable = create_engine(f"sqlite:///{tmp_path / 'absent' / 'replica.db'}")
+        router = ReplicaRouter(primary, unreachable)
+        assert router.check_replica() is False
+        assert router.read_engine() is primary
+        assert router.replica_healthy is False
+    
+    def test_unchecked_replica_is_not_used(self, primary, replica):
+        """Avant la première vérification, les lectures vont à la base principale"""
+        router = FakeLagRouter(primary, replica)
+        router.start = lambda: None
+        assert router.read_engine() is primary
+    
+    def test_read_engine_never_waits_for_the_replica(self, primary, replica):
+        """Une vérification lente (réplica qui ne répond pas) ne bloque pas les lectures"""
+        release = threading.Event()
+        
+        class SlowRouter(FakeLagRouter):
+            def replica_lag(self):
+                release.wait(5)
+                return super().replica_lag()
+        
+        router = SlowRouter(primary, replica, check_interval_seconds=60)
+        try:
+            start = time.perf_counter()
+            for _ in range(10):
+                assert router.read_engine() is primary
+            assert time.perf_counter() - start < 0.5
+        finally:
+            release.set()
+            router.stop()
+    
+    def test_background_check_updates_state(self, primary, replica):
+        """Le thread d'arrière-plan vérifie le réplica une fois par intervalle"""
+        router = FakeLagRouter(primary, replica, check_interval_seconds=60, lag=1.0)
+        router.start()
+        try:
+            deadline = time.monotonic() + 5
+            while router.last_check is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            for _ in range(10):
+                assert router.read_engine() is replica
+            assert router.checks == 1
+        finally:
+            router.stop()
+    
+    def test_replica_recovers_after_interval(self, primary, replica):
+        """Le réplica est de nouveau utilisé dès qu'il rattrape son retard"""
+        router = FakeLagRouter(primary, replica, check_interval_seconds=0.01, lag=120.0)
+        router.start()
+        try:
+            deadline = time.monotonic() + 5
+            while router.last_check is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert router.read_engine() is primary
+            router.lag = 0.0
+            while router.read_engine() is not replica and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert router.read_engine() is replica
+        finally:
+            router.stop()
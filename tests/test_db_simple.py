@@ -68,10 +68,10 @@ def test_predictions_feedback_table_structure():
             columns = result.fetchall()
             column_names = [col[0] for col in columns]
             
-            # Colonnes obligatoires attendues
+            # Colonnes obligatoires attendues (format de stockage compact)
             required_columns = [
                 'id', 'created_at', 'inference_time_ms', 'success',
-                'prediction_result', 'proba_cat', 'proba_dog',
+                'score_dog', 'result_code',
                 'rgpd_consent', 'filename', 'user_feedback', 
                 'user_comment'
             ]
@@ -89,6 +89,58 @@ def test_predictions_feedback_table_structure():
     except Exception as e:
         pytest.fail(f"Vérification de la structure échouée: {e}")
 
+def test_predictions_feedback_is_partitioned():
+    """Test du partitionnement mensuel et de la table d'agrégats horaires"""
+    try:
+        engine = create_engine(DB_URL)
+        
+        with engine.connect() as connection:
+            # Table parente partitionnée par RANGE
+            result = connection.execute(text(f"""
+                SELECT pt.partstrat
+                FROM pg_partitioned_table pt
+                JOIN pg_class c ON c.oid = pt.partrelid
+                WHERE c.relname = '{DB_TABLE_MONITORING}'
+            """))
+            row = result.fetchone()
+            assert row is not None, "predictions_feedback n'est pas partitionnée"
+            assert row[0] == 'r'
+            
+            # Partition du mois courant présente
+            result = connection.execute(text(
+                "SELECT to_regclass('predictions_feedback_' || to_char(CURRENT_DATE, 'YYYY_MM'))"
+            ))
+            assert result.fetchone()[0] is not None, "Partition du mois courant manquante"
+        
+        inspector = inspect(engine)
+        assert 'predictions_hourly_rollup' in inspector.get_table_names()
+        
+        print(f"\nPartitionnement validé")
+        
+    except Exception as e:
+        pytest.fail(f"Vérification du partitionnement échouée: {e}")
+
+def test_predictions_feedback_compat_view():
+    """Test de la vue de compatibilité exposant les anciennes colonnes"""
+    try:
+        engine = create_engine(DB_URL)
+        
+        with engine.connect() as connection:
+            result = connection.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = 'predictions_feedback_v1'
+            """))
+            column_names = [row[0] for row in result.fetchall()]
+            
+            for col in ['prediction_result', 'proba_cat', 'proba_dog', 'user_feedback']:
+                assert col in column_names, f"Colonne manquante dans la vue: {col}"
+            
+            print(f"\nVue de compatibilité validée")
+            
+    except Exception as e:
+        pytest.fail(f"Vérification de la vue échouée: {e}")
+
 # Permet l'exécution directe du fichier
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "-s"])
\ No newline at end of file
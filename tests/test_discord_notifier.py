@@ -0,0 +1,201 @@
+"""
+Tests du notifier Discord contre un serveur HTTP local (bouchon de webhook)
+"""
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.monitoring.discord_notifier import DiscordNotifier, TokenBucket
+
+FAST_CONFIG = {
+    "queue_size": 10,
+    "coalesce_seconds": 60,
+    "rate_per_second": 1000,
+    "burst": 100,
+    "timeout_seconds": 0.5,
+    "max_retries": 2,
+    "backoff_seconds": 0.01,
+}
+
+class StubWebhook:
+    """Serveur de webhook : enregistre les payloads et renvoie les réponses programmées"""
+    
+    def __init__(self):
+        self.payloads = []
+        self.responses = []  # (status, corps JSON, délai) consommés dans l'ordre, puis 204
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                status, reply, delay = stub.responses.pop(0) if stub.responses else (204, None, 0)
+                time.sleep(delay)
+                stub.payloads.append((status, json.loads(body)))
+                data = json.dumps(reply).encode() if reply is not None else b""
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client parti (timeout)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def webhook():
+    stub = StubWebhook()
+    yield stub
+    stub.close()
+
+@pytest.fixture
+def make_notifier(webhook):
+    notifiers = []
+    def factory(**config):
+        notifier = DiscordNotifier(webhook.url, config={**FAST_CONFIG, **config})
+        notifiers.append(notifier)
+        return notifier
+    yield factory
+    for notifier in notifiers:
+        notifier.close()
+
+class TestDelivery:
+    """Tests de l'envoi en arrière-plan"""
+    
+    def test_send_alert_does_not_block(self, webhook, make_notifier):
+        webhook.responses.append((204, None, 0.3))  # Webhook lent
+        notifier = make_notifier()
+        
+        start = time.perf_counter()
+        assert notifier.send_alert("Slow", "message", level="error", metrics={"Latency": "3s"})
+        assert time.perf_counter() - start < 0.05
+        
+        assert notifier.flush(timeout=5)
+        embed = webhook.payloads[0][1]["embeds"][0]
+        assert embed["title"] == "🚨 Slow"
+        assert embed["fields"][0] == {"name": "Latency", "value": "3s", "inline": True}
+        assert notifier.stats["sent"] == 1
+    
+    def test_429_respects_retry_after(self, webhook, make_notifier):
+        webhook.responses.append((429, {"retry_after": 0.2, "global": False}, 0))
+        notifier = make_notifier()
+        
+        start = time.perf_counter()
+        notifier.send_alert("Rate limited", "message")
+        assert notifier.flush(timeout=5)
+        
+        assert [status for status, _ in webhook.payloads] == [429, 204]
+        assert time.perf_counter() - start >= 0.2
+        assert notifier.stats["rate_limited"] == 1
+        assert notifier.stats["sent"] == 1
+    
+    def test_timeouts_are_retried_then_counted_as_failed(self, webhook, make_notifier):
+        webhook.responses.extend([(204, None, 1.0)] * 3)  # Plus long que timeout_seconds
+        notifier = make_notifier()
+        
+        notifier.send_alert("Timeout", "message")
+        assert notifier.flush(timeout=10)
+        assert notifier.stats["retried"] == 2
+        assert notifier.stats["failed"] == 1
+    
+    def test_client_errors_are_not_retried(self, webhook, make_notifier):
+        webhook.responses.append((400, {"message": "Invalid Form Body"}, 0))
+        notifier = make_notifier()
+        
+        notifier.send_alert("Bad payload", "message")
+        assert notifier.flush(timeout=5)
+        assert len(webhook.payloads) == 1
+        assert notifier.stats["failed"] == 1
+
+class TestCoalescing:
+    """Tests de la déduplication et de la file bornée"""
+    
+    def test_identical_alerts_are_coalesced(self, webhook):
+        clock = [0.0]
+        notifier = DiscordNotifier(webhook.url, config=FAST_CONFIG, clock=lambda: clock[0])
+        try:
+            assert notifier.send_alert("DB down", "message", key="db")
+            for _ in range(5):
+                assert not notifier.send_alert("DB down", "message", key="db")
+            assert notifier.send_alert("Other", "message")  # Autre clé : non coalescée
+            
+            clock[0] = 61  # Fenêtre écoulée : l'alerte suivante signale les occurrences supprimées
+            assert notifier.send_alert("DB down", "message", key="db")
+            assert notifier.flush(timeout=5)
+        finally:
+            notifier.close()
+        
+        assert notifier.stats["coalesced"] == 5
+        last_fields = webhook.payloads[-1][1]["embeds"][0]["fields"]
+        assert {"name": "Coalesced", "value": "5 similar alert(s) suppressed", "inline": True} in last_fields
+    
+    def test_full_queue_drops_alerts(self, webhook, make_notifier):
+        webhook.responses.append((204, None, 0.5))
+        notifier = make_notifier(queue_size=1)
+        results = [notifier.send_alert(f"Alert {i}", "message") for i in range(5)]
+        
+        assert results[0] and notifier.stats["dropped"] >= 3
+        assert notifier.flush(timeout=5)
+    
+    def test_dropped_alert_is_not_coalesced(self, webhook):
+        """Une alerte perdue (file pleine) ne bloque pas les suivantes de sa clé"""
+        clock = [0.0]
+        notifier = DiscordNotifier(webhook.url, config={**FAST_CONFIG, "queue_size": 1}, clock=lambda: clock[0])
+        try:
+            assert notifier.send_alert("DB down", "message", key="db")
+            for _ in range(2):
+                assert not notifier.send_alert("DB down", "message", key="db")
+            assert notifier.flush(timeout=5)
+            
+            clock[0] = 61
+            webhook.responses.append((204, None, 0.5))
+            assert notifier.send_alert("Slow", "message")
+            deadline = time.monotonic() + 5
+            while not notifier._queue.empty() and time.monotonic() < deadline:
+                time.sleep(0.01)  # Alerte en cours d'envoi par le worker
+            assert notifier.send_alert("Filler", "message")
+            assert not notifier.send_alert("DB down", "message", key="db")  # File pleine
+            assert notifier.flush(timeout=5)
+            
+            assert notifier.send_alert("DB down", "message", key="db")
+            assert notifier.flush(timeout=5)
+        finally:
+            notifier.close()
+        
+        assert notifier.stats["dropped"] == 1
+        last_fields = webhook.payloads[-1][1]["embeds"][0]["fields"]
+        assert {"name": "Coalesced", "value": "2 similar alert(s) suppressed", "inline": True} in last_fields
+    
+    def test_disabled_without_webhook(self):
+        os.environ.pop('DISCORD_WEBHOOK_URL', None)
+        notifier = DiscordNotifier()
+        assert notifier.send_alert("Ignored", "message") is False
+
+class TestTokenBucket:
+    """Tests du limiteur de débit"""
+    
+    def test_burst_then_rate(self):
+        clock = [0.0]
+        bucket = TokenBucket(rate=2, burst=3, clock=lambda: clock[0])
+        stop = threading.Event()
+        for _ in range(3):
+            assert bucket.acquire(stop)
+        assert bucket.wait_time() == pytest.approx(0.5)
+        clock[0] = 0.5
+        assert bucket.wait_time() == 0
@@ -0,0 +1,84 @@
+"""
+Tests de l'entraînement multi-workers (TF_CONFIG, parts des workers, cluster local de 2 processus)
+"""
+import json
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+from src.data.preprocessing import validate_dataset
+from src.data.shards import build_shards, sharded_images, worker_counts
+from src.models.distributed import cluster_info, equal_steps, tf_config_from_hosts
+
+
+class TestCluster:
+    """Tests de la lecture de TF_CONFIG"""
+
+    def test_single_process_without_tf_config(self):
+        assert cluster_info("") == {"workers": 1, "index": 0, "chief": True}
+
+    def test_worker_zero_is_chief(self):
+        hosts = ["host1:2222", "host2:2222", "host3:2222"]
+        assert cluster_info(tf_config_from_hosts(hosts, 0)) == {"workers": 3, "index": 0, "chief": True}
+        assert cluster_info(tf_config_from_hosts(hosts, 2)) == {"workers": 3, "index": 2, "chief": False}
+        with pytest.raises(ValueError):
+            tf_config_from_hosts(hosts, 3)
+
+    def test_explicit_chief_comes_first(self):
+        cluster = {"chief": ["host0:2222"], "worker": ["host1:2222", "host2:2222"]}
+        config = lambda task_type, index: json.dumps({"cluster": cluster, "task": {"type": task_type, "index": index}})
+        assert cluster_info(config("chief", 0)) == {"workers": 3, "index": 0, "chief": True}
+        assert cluster_info(config("worker", 0)) == {"workers": 3, "index": 1, "chief": False}
+        with pytest.raises(ValueError):
+            cluster_info(config("ps", 0))
+
+    def test_equal_steps_follow_smallest_share(self):
+        assert equal_steps([130, 129, 127], batch_size=64) == 1
+        assert equal_steps([10, 12], batch_size=64) == 1  # Au moins un pas (part répétée)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    """20 images de niveaux de gris distincts, shards de 4 images"""
+    data_path = tmp_path / "PetImages"
+    for folder_name in ("Cat", "Dog"):
+        (data_path / folder_name).mkdir(parents=True)
+    for i in range(20):
+        folder_name = ("Cat", "Dog")[i % 2]
+        Image.new("L", (20, 20), color=i * 10).convert("RGB").save(data_path / folder_name / f"{i}.png")
+    manifest_path = tmp_path / "manifest.json"
+    validate_dataset(data_path, manifest_path=manifest_path, quarantine_dir=tmp_path / "quarantine", workers=1)
+    return build_shards(data_path, manifest_path=manifest_path, shards_dir=tmp_path / "shards",
+                        image_size=(8, 8), shard_size=4, workers=1, validation_split=0.2, seed=1)
+
+@pytest.mark.parametrize("num_workers", [2, 3, 8])  # 8 > 4 fichiers : répartition par image
+def test_workers_read_disjoint_shares(index_path, num_workers):
+    shares = []
+    for worker_index in range(num_workers):
+        dataset = sharded_images(index_path, "train", shuffle=True, seed=0, deterministic=False,
+                                 num_workers=num_workers, worker_index=worker_index)
+        shares.append([int(image[0, 0, 0]) for image, _ in dataset.as_numpy_iterator()])
+
+    assert [len(share) for share in shares] == worker_counts(index_path, "train", num_workers)
+    seen = [value for share in shares for value in share]
+    assert len(seen) == len(set(seen)) == 16
+
+
+def test_two_worker_cluster_trains_in_sync(tmp_path):
+    benchmark = pytest.importorskip("benchmark_distributed_training")
+    archive = benchmark.synthetic_archive(tmp_path / "synthetic.zip", 160, size=(48, 48))
+    reports = benchmark.run_cluster(2, tmp_path, archive, threads=1, epochs=1, timeout=300)
+
+    chief, worker = reports
+    assert chief["chief"] and not worker["chief"]
+    assert chief["global_batch_size"] == worker["global_batch_size"] == 2 * 64
+    assert chief["epochs"][0]["steps"] == worker["epochs"][0]["steps"]
+    assert chief["val_accuracy"] == worker["val_accuracy"]  # Poids identiques sur les deux workers
+
+    logs = [(tmp_path / "2_workers" / f"worker_{i}.log").read_text() for i in range(2)]
+    assert "Modèle sauvegardé" in logs[0] and "Modèle sauvegardé" not in logs[1]
+    assert (tmp_path / "2_workers" / "models" / "cats_dogs_model.keras").exists()
@@ -0,0 +1,137 @@
+"""
+Tests du téléchargeur (plages parallèles, reprise, sha256) contre un serveur HTTP local
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.download import download_file
+
+CHUNK = 64 * 1024
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Sert server.payload avec support des Range (désactivable) et pannes programmées"""
+
+    def do_GET(self):
+        server = self.server
+        payload = server.payload
+        match = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        with server.lock:
+            server.requests.append(self.headers.get("Range"))
+            fail = match is not None and int(match.group(1)) in server.failing_offsets
+        if fail:
+            self.send_error(503)
+            return
+        if match and server.ranges:
+            start, end = int(match.group(1)), min(int(match.group(2)), len(payload) - 1)
+            body = payload[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(payload)}")
+        else:
+            body = payload
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", server.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    httpd.payload = os.urandom(10 * CHUNK + 123)  # Archive fixture : 11 plages, la dernière partielle
+    httpd.etag = '"v1"'
+    httpd.ranges = True
+    httpd.failing_offsets = set()
+    httpd.requests = []
+    httpd.lock = threading.Lock()
+    httpd.url = f"http://127.0.0.1:{httpd.server_port}/kagglecatsanddogs.zip"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def range_requests(server):
+    return [r for r in server.requests if r and r != "bytes=0-0"]
+
+
+def test_parallel_ranges_and_checksum(server, tmp_path):
+    dest = tmp_path / "archive.zip"
+    download_file(server.url, dest, sha256=sha256(server.payload), workers=4, chunk_size=CHUNK)
+
+    assert dest.read_bytes() == server.payload
+    assert len(range_requests(server)) == 11
+    assert (tmp_path / "archive.zip.sha256").read_text().split()[0] == sha256(server.payload)
+    assert not (tmp_path / "archive.zip.part").exists()
+    assert not (tmp_path / "archive.zip.part.json").exists()
+
+    server.requests.clear()
+    download_file(server.url, dest, workers=4, chunk_size=CHUNK)  # Déjà présent, empreinte enregistrée
+    assert server.requests == []
+
+def test_resume_fetches_only_missing_ranges(server, tmp_path):
+    dest = tmp_path / "archive.zip"
+    server.failing_offsets = {3 * CHUNK, 7 * CHUNK}
+    with pytest.raises(requests.HTTPError):
+        download_file(server.url, dest, workers=1, chunk_size=CHUNK, retries=0)
+    state = json.loads((tmp_path / "archive.zip.part.json").read_text())
+    assert 3 not in state["done"] and len(state["done"]) >= 3
+
+    server.failing_offsets = set()
+    server.requests.clear()
+    download_file(server.url, dest, sha256=sha256(server.payload), workers=4, chunk_size=CHUNK)
+    assert dest.read_bytes() == server.payload
+    assert len(range_requests(server)) == 11 - len(state["done"])
+
+def test_changed_remote_restarts_download(server, tmp_path):
+    dest = tmp_path / "archive.zip"
+    server.failing_offsets = {5 * CHUNK}
+    with pytest.raises(requests.HTTPError):
+        download_file(server.url, dest, workers=1, chunk_size=CHUNK, retries=0)
+
+    server.payload, server.etag, server.failing_offsets = os.urandom(len(server.payload)), '"v2"', set()
+    server.requests.clear()
+    download_file(server.url, dest, sha256=sha256(server.payload), workers=4, chunk_size=CHUNK)
+    assert len(range_requests(server)) == 11  # Plages de la version précédente ignorées
+
+def test_retry_recovers_transient_failure(server, tmp_path):
+    server.failing_offsets = {2 * CHUNK}
+    original = FixtureHandler.do_GET
+
+    def fail_once(handler):
+        original(handler)
+        server.failing_offsets.clear()
+
+    FixtureHandler.do_GET = fail_once
+    try:
+        dest = download_file(server.url, tmp_path / "archive.zip", workers=2, chunk_size=CHUNK, retries=1)
+    finally:
+        FixtureHandler.do_GET = original
+    assert dest.read_bytes() == server.payload
+
+def test_checksum_mismatch_is_rejected(server, tmp_path):
+    dest = tmp_path / "archive.zip"
+    with pytest.raises(ValueError, match="sha256"):
+        download_file(server.url, dest, sha256="0" * 64, workers=4, chunk_size=CHUNK)
+    assert not dest.exists() and not (tmp_path / "archive.zip.part").exists()
+
+def test_server_without_ranges_streams_sequentially(server, tmp_path):
+    server.ranges = False
+    dest = download_file(server.url, tmp_path / "archive.zip", workers=4, chunk_size=CHUNK)
+    assert dest.read_bytes() == server.payload
@@ -0,0 +1,167 @@
+"""
+Tests de la détection de dérive des prédictions (référence, fenêtre glissante, PSI/KL/KS, alertes)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.monitoring.drift_monitor import (
+    DriftMonitor, SlidingCounts, categorical_histogram, drift_statistics,
+    load_reference, save_reference, score_reference
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def reference():
+    """Scores de validation : classes équilibrées, modèle plutôt confiant"""
+    rng = np.random.default_rng(0)
+    scores = np.concatenate([rng.beta(1, 8, 5000), rng.beta(8, 1, 5000)])
+    return {"features": score_reference(scores, bins=20)}
+
+def make_monitor(reference, clock, **kwargs):
+    options = {"thresholds": {"psi": 0.25, "ks": 0.2}, "window_seconds": 600, "slices": 6,
+               "min_samples": 400, "evaluation_interval_seconds": 0, "clock": clock}
+    options.update(kwargs)
+    return DriftMonitor(reference, **options)
+
+def validation_like(rng, n):
+    """Scores mélangés dans le même ordre qu'un trafic réel (pas tous les chats d'abord)"""
+    return rng.permutation(np.concatenate([rng.beta(1, 8, n // 2), rng.beta(8, 1, n // 2)]))
+
+def observe_scores(monitor, scores):
+    for score in scores:
+        monitor.observe({"raw_score": score, "predicted_class": "Dog" if score > 0.5 else "Cat"})
+
+
+class TestStatistics:
+    """Tests des statistiques PSI, KL et KS"""
+
+    def test_identical_distributions(self):
+        stats = drift_statistics([10, 20, 30, 40], [1, 2, 3, 4])
+        assert stats["psi"] == pytest.approx(0, abs=1e-9)
+        assert stats["kl"] == pytest.approx(0, abs=1e-9)
+        assert stats["ks"] == pytest.approx(0, abs=1e-9)
+
+    def test_shifted_distribution(self):
+        stats = drift_statistics([50, 30, 15, 5], [5, 15, 30, 50])
+        assert stats["psi"] > 0.25
+        assert stats["kl"] > 0
+        assert stats["ks"] == pytest.approx(0.6)  # Répartitions cumulées : 0.8 contre 0.2
+
+    def test_empty_bin_stays_finite(self):
+        stats = drift_statistics([100, 0], [50, 50])
+        assert np.isfinite(stats["psi"]) and np.isfinite(stats["kl"])
+
+    def test_unordered_feature_has_no_ks(self):
+        assert drift_statistics([1, 1], [1, 2], ordered=False)["ks"] is None
+
+
+class TestReference:
+    """Tests de la référence sauvegardée par l'entraînement"""
+
+    def test_score_reference(self, reference):
+        features = reference["features"]
+        assert len(features["raw_score"]["edges"]) == 21
+        assert sum(features["raw_score"]["counts"]) == 10000
+        assert features["predicted_class"]["labels"] == ["Cat", "Dog"]
+        assert sum(features["predicted_class"]["counts"]) == 10000
+
+    def test_categorical_other_bucket(self):
+        histogram = categorical_histogram(["JPEG", "PNG", "GIF"], ["JPEG", "PNG", "other"])
+        assert histogram["counts"] == [1, 1, 1]
+
+    def test_save_merges_features(self, tmp_path, reference):
+        path = tmp_path / "drift_reference.json"
+        save_reference(path, reference["features"])
+        save_reference(path, {"extra": categorical_histogram(["a"], ["a", "other"])})
+        loaded = load_reference(path)
+        assert set(loaded["features"]) == {"raw_score", "predicted_class", "extra"}
+        assert not list(tmp_path.glob("*.tmp"))
+
+
+class TestSlidingCounts:
+    """Tests de la fenêtre glissante"""
+
+    def test_expired_slices_are_dropped(self):
+        clock = FakeClock()
+        window = SlidingCounts(3, window_seconds=60, slices=6, clock=clock)
+        window.add(0)
+        clock.now += 30
+        window.add(1)
+        assert window.counts().tolist() == [1, 1, 0]
+        clock.now += 40  # La première tranche sort de la fenêtre
+        assert window.counts().tolist() == [0, 1, 0]
+
+    def test_update_is_constant_time(self):
+        window = SlidingCounts(20, window_seconds=3600, slices=12)
+        start = time.perf_counter()
+        for i in range(20000):
+            window.add(i % 20)
+        per_update_us = (time.perf_counter() - start) / 20000 * 1e6
+        assert per_update_us < 50
+
+
+class TestDriftMonitor:
+    """Tests de la détection et des alertes"""
+
+    def test_no_reference_disables_monitoring(self):
+        monitor = DriftMonitor(None, thresholds={"psi": 0.25})
+        monitor.observe({"raw_score": 0.9})
+        assert not monitor.enabled
+        assert monitor.snapshot() == {}
+
+    def test_stable_traffic_does_not_alert(self, reference):
+        monitor = make_monitor(reference, FakeClock())
+        alerts = []
+        monitor.on_drift.append(lambda *args: alerts.append(args))
+
+        rng = np.random.default_rng(1)
+        observe_scores(monitor, validation_like(rng, 1000))
+
+        assert alerts == []
+        assert monitor.statistics["raw_score"]["psi"] < 0.1
+
+    def test_drift_alert_and_recovery(self, reference):
+        clock = FakeClock()
+        monitor = make_monitor(reference, clock)
+        drifts, recoveries = [], []
+        monitor.on_drift.append(lambda *args: drifts.append(args))
+        monitor.on_recover.append(lambda *args: recoveries.append(args))
+        rng = np.random.default_rng(2)
+
+        observe_scores(monitor, rng.uniform(0.35, 0.65, 500))  # Modèle hésitant : scores autour de 0.5
+        feature, statistics, thresholds, samples = next(alert for alert in drifts if alert[0] == "raw_score")
+        assert statistics["psi"] > thresholds["psi"]
+        assert samples >= 400
+        assert monitor.drifted["raw_score"]
+
+        clock.now += 700  # La fenêtre se vide, le trafic redevient normal
+        observe_scores(monitor, validation_like(rng, 600))
+        assert "raw_score" in [feature for feature, *_ in recoveries]
+        assert not monitor.drifted["raw_score"]
+
+    def test_class_ratio_drift(self, reference):
+        monitor = make_monitor(reference, FakeClock())
+        drifts = []
+        monitor.on_drift.append(lambda feature, *args: drifts.append(feature))
+
+        observe_scores(monitor, np.random.default_rng(3).beta(8, 1, 500))  # Uniquement des chiens
+
+        assert "predicted_class" in drifts
+        assert monitor.features["predicted_class"].proportions()["Dog"] == 1.0
+
+    def test_min_samples(self, reference):
+        monitor = make_monitor(reference, FakeClock(), min_samples=1000)
+        observe_scores(monitor, [0.5] * 500)
+        assert monitor.statistics["raw_score"] == {}
+        assert not monitor.drifted["raw_score"]
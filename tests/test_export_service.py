@@ -0,0 +1,58 @@
+"""
+Tests de la sérialisation en flux de l'export des prédictions
+(sans base de données : les lots sont fournis directement)
+"""
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.database.export_service import ExportService, COLUMN_NAMES, PARQUET_AVAILABLE
+
+ROW_CAT = (1, datetime(2025, 1, 1, 12, 0), 42, True, 'cat', 95.34, 4.66, True, 'chat.jpg', 1, 'super')
+ROW_ERROR = (2, datetime(2025, 1, 1, 12, 5), 10, False, 'error', 0.0, 0.0, False, None, None, 'boom')
+BATCHES = [[ROW_CAT], [ROW_ERROR], []]
+
+class TestExportService:
+    """Tests des formats d'export"""
+    
+    def test_csv_header_and_rows(self):
+        """Le CSV contient l'en-tête puis une ligne par prédiction"""
+        content = b"".join(ExportService.stream(BATCHES, "csv")).decode("utf-8")
+        rows = list(csv.reader(io.StringIO(content)))
+        assert rows[0] == COLUMN_NAMES
+        assert len(rows) == 3
+        assert rows[1][1] == "2025-01-01T12:00:00"
+    
+    def test_csv_yields_one_chunk_per_batch(self):
+        """Un chunk est produit par lot (pas d'accumulation en mémoire)"""
+        chunks = list(ExportService.stream_csv(iter(BATCHES)))
+        assert len(chunks) == 3
+    
+    def test_ndjson(self):
+        """Une ligne JSON par prédiction"""
+        content = b"".join(ExportService.stream(BATCHES, "ndjson")).decode("utf-8")
+        lines = [json.loads(line) for line in content.splitlines()]
+        assert len(lines) == 2
+        assert lines[0]["prediction_result"] == "cat"
+        assert lines[1]["filename"] is None
+    
+    @pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow non installé")
+    def test_parquet_roundtrip(self):
+        """Le flux Parquet concaténé est un fichier lisible"""
+        import pyarrow.parquet as pq
+        content = b"".join(ExportService.stream(BATCHES, "parquet"))
+        table = pq.read_table(io.BytesIO(content))
+        assert table.num_rows == 2
+        assert table.column_names == COLUMN_NAMES
+        assert table.column("prediction_result").to_pylist() == ["cat", "error"]
+    
+    def test_unknown_format(self):
+        """Un format inconnu est refusé"""
+        with pytest.raises(ValueError):
+            ExportService.stream(BATCHES, "xml")
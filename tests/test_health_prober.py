@@ -0,0 +1,85 @@
+"""
+Tests de la sonde de santé en arrière-plan
+Bases SQLite locales en remplacement de PostgreSQL
+"""
+import os
+import sys
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.monitoring.health_prober import HealthProber
+
+@pytest.fixture
+def healthy_engine():
+    return create_engine("sqlite://")
+
+@pytest.fixture
+def broken_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'absent' / 'db.sqlite'}")
+
+class TestHealthProber:
+    """Tests de la sonde"""
+    
+    def test_status_before_first_check(self, healthy_engine):
+        prober = HealthProber(healthy_engine, lambda: True)
+        status = prober.status()
+        assert status["db_connected"] is None
+        assert status["age_seconds"] is None
+    
+    def test_check_records_state(self, healthy_engine):
+        prober = HealthProber(healthy_engine, lambda: True)
+        status = prober.check()
+        assert status["db_connected"] is True
+        assert status["model_loaded"] is True
+        assert status["last_success_at"] == status["checked_at"]
+        assert status["db_latency_ms"] >= 0
+    
+    def test_failure_is_reported(self, broken_engine):
+        prober = HealthProber(broken_engine, lambda: False)
+        status = prober.check()
+        assert status["db_connected"] is False
+        assert status["db_error"]
+        assert status["last_failure_at"] == status["checked_at"]
+        assert status["last_success_at"] is None
+    
+    def test_callbacks(self, healthy_engine, broken_engine):
+        prober = HealthProber(broken_engine, lambda: True)
+        checks, downs = [], []
+        prober.on_check.append(checks.append)
+        prober.on_db_down.append(lambda: downs.append(True))
+        
+        prober.check()
+        prober.check()  # Toujours en panne : pas de nouvelle alerte
+        prober.engine = healthy_engine
+        prober.check()
+        prober.engine = broken_engine
+        prober.check()
+        
+        assert checks == [False, False, True, False]
+        assert len(downs) == 2
+    
+    def test_background_thread(self, healthy_engine):
+        prober = HealthProber(healthy_engine, lambda: True, interval_seconds=0.01)
+        prober.start()
+        try:
+            deadline = time.monotonic() + 5
+            while prober.status()["db_connected"] is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            prober.stop()
+        assert prober.status()["db_connected"] is True
+    
+    def test_status_is_served_from_memory(self, healthy_engine):
+        prober = HealthProber(healthy_engine, lambda: True)
+        prober.check()
+        healthy_engine.dispose()
+        prober.engine = None  # Toute I/O lèverait une erreur
+        
+        start = time.perf_counter()
+        for _ in range(1000):
+            status = prober.status()
+        assert (time.perf_counter() - start) / 1000 < 0.001
+        assert status["db_connected"] is True
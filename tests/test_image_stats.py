@@ -0,0 +1,101 @@
+"""
+Tests des statistiques d'images reçues (features, budget de temps, référence, dérive)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.monitoring.drift_monitor import DriftMonitor
+from src.monitoring.image_stats import (
+    ImageStatsExtractor, compute_image_features, features_from_file, reference_from_directory
+)
+
+def image_input(pixels, width=400, height=300, mode="RGB", image_format="JPEG"):
+    return {"pixels": pixels, "width": width, "height": height, "mode": mode, "format": image_format}
+
+@pytest.fixture
+def photos(tmp_path):
+    """Images d'entraînement : photos couleur JPEG, luminosité moyenne"""
+    rng = np.random.default_rng(0)
+    for i in range(40):
+        pixels = rng.integers(60, 200, (90, 120, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(tmp_path / f"photo_{i}.jpg", quality=90)
+    return tmp_path
+
+
+class TestFeatures:
+    """Tests du calcul des features"""
+
+    def test_uniform_gray_image(self):
+        pixels = np.full((128, 128, 3), 100, dtype=np.uint8)
+        features = compute_image_features(pixels, 800, 400, "RGB", "PNG")
+        assert features["brightness"] == pytest.approx(100, abs=0.01)
+        assert features["contrast"] == pytest.approx(0, abs=0.01)
+        assert features["saturation"] == 0
+        assert features["aspect_ratio"] == 2
+        assert (features["channel_mode"], features["image_format"]) == ("RGB", "PNG")
+
+    def test_saturation_detects_color(self):
+        pixels = np.zeros((128, 128, 3), dtype=np.uint8)
+        pixels[..., 0] = 255  # Rouge pur
+        assert compute_image_features(pixels, 1, 1, "RGB", None)["saturation"] == 255
+
+    def test_file_keeps_original_mode_and_format(self, tmp_path):
+        path = tmp_path / "gray.png"
+        Image.new("L", (200, 100), color=50).save(path)
+        features = features_from_file(path, (128, 128))
+        assert (features["channel_mode"], features["image_format"]) == ("L", "PNG")
+        assert features["brightness"] == pytest.approx(50, abs=0.5)
+        assert features["aspect_ratio"] == 2
+
+
+class TestBudget:
+    """Tests du coût par requête"""
+
+    def test_cost_within_default_budget(self):
+        extractor = ImageStatsExtractor(budget_ms=1.0)
+        image = image_input(np.random.default_rng(1).integers(0, 255, (128, 128, 3), dtype=np.uint8))
+        extractor.extract(image)  # Échauffement
+        start = time.perf_counter()
+        for _ in range(200):
+            extractor.extract(image)
+        assert (time.perf_counter() - start) / 200 * 1000 < 1.0
+
+    def test_stride_grows_when_over_budget(self):
+        extractor = ImageStatsExtractor(budget_ms=0, max_stride=4)
+        image = image_input(np.zeros((128, 128, 3), dtype=np.uint8))
+        for _ in range(5):
+            extractor.extract(image)
+        assert extractor.stride == 4
+        assert extractor.over_budget == 5
+
+
+class TestInputDrift:
+    """Tests de la référence d'entraînement et de la détection de dérive"""
+
+    def test_reference_from_directory(self, photos):
+        reference = reference_from_directory(photos, (128, 128), sample_size=30)
+        assert sum(reference["brightness"]["counts"]) == 30
+        assert reference["image_format"]["counts"][0] == 30  # JPEG
+        assert reference["channel_mode"]["counts"][0] == 30  # RGB
+
+    def test_grayscale_screenshots_drift(self, photos):
+        reference = {"features": reference_from_directory(photos, (128, 128))}
+        monitor = DriftMonitor(reference, thresholds={"psi": 0.25}, min_samples=50,
+                               evaluation_interval_seconds=0)
+        drifts = []
+        monitor.on_drift.append(lambda feature, *args: drifts.append(feature))
+
+        extractor = ImageStatsExtractor()
+        screenshot = image_input(np.full((128, 128, 3), 240, dtype=np.uint8),
+                                 width=1920, height=1080, mode="L", image_format="PNG")
+        for _ in range(60):
+            monitor.observe(extractor.extract(screenshot))
+
+        assert {"brightness", "saturation", "channel_mode", "image_format"} <= set(drifts)
+        assert "aspect_ratio" in drifts  # 16:9 contre 4:3
@@ -0,0 +1,116 @@
+"""
+Tests du suivi des quantiles de latence (DDSketch, fenêtre glissante, alertes SLO)
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.monitoring.latency_slo import DDSketch, LatencySLOMonitor, SlidingWindowQuantiles
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class TestDDSketch:
+    """Tests du sketch de quantiles"""
+    
+    @pytest.mark.parametrize("q", [0.5, 0.95, 0.99])
+    def test_relative_accuracy(self, q):
+        values = np.random.default_rng(0).lognormal(mean=4, sigma=1, size=20000)
+        sketch = DDSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        
+        expected = np.quantile(values, q, method="lower")
+        assert abs(sketch.quantile(q) - expected) / expected <= 0.0101
+    
+    def test_memory_is_bounded(self):
+        sketch = DDSketch(relative_accuracy=0.01, max_bins=64)
+        values = np.geomspace(0.001, 1e6, 5000)
+        for value in values:
+            sketch.add(value)
+        assert len(sketch.bins) <= 64
+        assert sketch.count == 5000
+        expected = np.quantile(values, 0.99, method="lower")
+        assert sketch.quantile(0.99) == pytest.approx(expected, rel=0.0101)  # Les grandes valeurs restent précises
+    
+    def test_merge(self):
+        a, b, both = DDSketch(), DDSketch(), DDSketch()
+        for value in range(1, 101):
+            (a if value % 2 else b).add(value)
+            both.add(value)
+        a.merge(b)
+        assert a.count == 100
+        assert a.quantile(0.95) == both.quantile(0.95)
+    
+    def test_empty_and_zero(self):
+        sketch = DDSketch()
+        assert sketch.quantile(0.5) is None
+        sketch.add(0)
+        assert sketch.quantile(0.5) == 0.0
+
+class TestSlidingWindow:
+    """Tests de la fenêtre glissante"""
+    
+    def test_old_slices_expire(self):
+        clock = FakeClock()
+        window = SlidingWindowQuantiles(window_seconds=60, slices=6, clock=clock)
+        for _ in range(100):
+            window.add(1000)
+        clock.now += 30
+        for _ in range(100):
+            window.add(10)
+        assert window.merged().count == 200
+        
+        clock.now += 45  # Les valeurs à 1000 ms sortent de la fenêtre
+        assert window.merged().count == 100
+        assert window.quantiles([0.99])[0.99] == pytest.approx(10, rel=0.01)
+
+class TestLatencySLOMonitor:
+    """Tests de la détection des dépassements de SLO"""
+    
+    @pytest.fixture
+    def monitor(self):
+        clock = FakeClock()
+        monitor = LatencySLOMonitor(slos={0.95: 500}, window_seconds=60, slices=6, hysteresis=0.2,
+                                    min_samples=10, evaluation_interval_seconds=0, clock=clock)
+        monitor.clock = clock
+        monitor.events = []
+        monitor.on_breach.append(lambda *args: monitor.events.append(("breach",) + args))
+        monitor.on_recover.append(lambda *args: monitor.events.append(("recover",) + args))
+        return monitor
+    
+    def test_no_alert_below_min_samples(self, monitor):
+        for _ in range(9):
+            monitor.observe(5000)
+        assert monitor.events == []
+    
+    def test_breach_then_recovery_with_hysteresis(self, monitor):
+        for _ in range(20):
+            monitor.observe(800)
+        assert [event[0] for event in monitor.events] == ["breach"]  # Une seule alerte
+        assert monitor.snapshot()["slo_breached"] == {"p95": True}
+        
+        monitor.clock.now += 120  # Nouvelle fenêtre : p95 à 450 ms, sous le seuil mais dans l'hystérésis
+        for _ in range(20):
+            monitor.observe(450)
+        assert [event[0] for event in monitor.events] == ["breach"]
+        
+        for _ in range(500):  # Les 450 ms passent sous les 5 % les plus lents
+            monitor.observe(300)
+        assert [event[0] for event in monitor.events] == ["breach", "recover"]
+        assert monitor.snapshot()["slo_breached"] == {"p95": False}
+    
+    def test_snapshot(self, monitor):
+        for value in range(1, 101):
+            monitor.observe(value)
+        snapshot = monitor.snapshot()
+        assert snapshot["count"] == 100
+        assert snapshot["p50_ms"] == pytest.approx(50, rel=0.02)
+        assert snapshot["p99_ms"] == pytest.approx(99, rel=0.02)
@@ -0,0 +1,85 @@
+"""
+Tests de la comptabilité mémoire et régression de croissance mémoire de l'inférence
+"""
+import gc
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.monitoring.memory_monitor import HeapSnapshots, memory_summary, process_memory, tensorflow_memory
+
+PREDICTIONS = 2000
+MAX_RSS_GROWTH_BYTES = 50 * 1024 * 1024  # Au-delà : fuite probable (buffers PIL, tableaux numpy, tenseurs)
+
+class TestMemorySummary:
+    """Tests des relevés mémoire"""
+    
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="/proc requis")
+    def test_process_memory(self):
+        memory = process_memory()
+        assert memory["rss_bytes"] > 0
+        assert memory["peak_rss_bytes"] >= memory["rss_bytes"] // 2
+    
+    def test_summary_sections(self):
+        summary = memory_summary()
+        assert set(summary) == {"process", "python_heap", "tensorflow"}
+    
+    def test_heap_snapshots_diff(self):
+        snapshots = HeapSnapshots()
+        try:
+            assert snapshots.diff() is None  # Snapshot de référence
+            retained = [bytearray(1024) for _ in range(1000)]
+            diff = snapshots.diff(top_n=5)
+            assert len(diff) <= 5
+            assert any("test_memory_monitor.py" in entry["location"] and entry["size_diff_bytes"] > 1000 * 1024
+                       for entry in diff)
+            del retained
+        finally:
+            snapshots.stop()
+
+@pytest.fixture(scope="module")
+def predictor():
+    tf = pytest.importorskip("tensorflow")
+    from src.models.predictor import CatDogPredictor
+    
+    predictor = CatDogPredictor.__new__(CatDogPredictor)  # Petit modèle de même interface
+    predictor.image_size = (128, 128)
+    predictor.model = tf.keras.Sequential([
+        tf.keras.Input(shape=(128, 128, 3)),
+        tf.keras.layers.Rescaling(1 / 255),
+        tf.keras.layers.Conv2D(4, 3, strides=4, activation="relu"),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    return predictor
+
+def jpeg(seed: int) -> bytes:
+    pixels = np.random.default_rng(seed).integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+class TestPredictionMemoryGrowth:
+    """Régression : la mémoire reste bornée sur des milliers de prédictions"""
+    
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="/proc requis")
+    def test_rss_growth_is_bounded(self, predictor):
+        images = [jpeg(seed) for seed in range(8)]
+        for image in images:  # Préchauffage : graphe tf.function, caches des allocateurs
+            predictor.predict(image)
+        gc.collect()
+        baseline = process_memory()["rss_bytes"]
+        
+        for i in range(PREDICTIONS):
+            result = predictor.predict(images[i % len(images)])
+            assert result["prediction"] in ("Cat", "Dog")
+        gc.collect()
+        
+        growth = process_memory()["rss_bytes"] - baseline
+        assert growth < MAX_RSS_GROWTH_BYTES, f"RSS +{growth / 1024 / 1024:.1f} Mo après {PREDICTIONS} prédictions"
+        assert "CPU:0" in tensorflow_memory()
@@ -0,0 +1,52 @@
+"""
+Tests de la création périodique des partitions à venir (sans PostgreSQL)
+"""
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.database import partition_manager
+from src.database.partition_manager import FuturePartitionScheduler, PartitionManager
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+
+class TestFuturePartitionScheduler:
+    """Tests du thread de création des partitions de l'API"""
+    
+    def test_run_once_creates_partitions(self, monkeypatch):
+        sessions, calls = [], []
+        monkeypatch.setattr(PartitionManager, "ensure_future_partitions",
+                            staticmethod(lambda db, months_ahead=None: calls.append(months_ahead) or 2))
+        scheduler = FuturePartitionScheduler(lambda: sessions.append(FakeSession()) or sessions[-1], 3600,
+                                             months_ahead=4)
+        assert scheduler.run_once() == 2
+        assert calls == [4]
+        assert sessions[0].closed
+    
+    def test_database_errors_are_not_raised(self, monkeypatch):
+        """Base indisponible : l'API démarre quand même, nouvel essai à l'intervalle suivant"""
+        def unavailable():
+            raise ConnectionError("connection refused")
+        scheduler = FuturePartitionScheduler(unavailable, 3600)
+        assert scheduler.run_once() is None
+    
+    def test_started_thread_runs_immediately(self, monkeypatch):
+        created = partition_manager.threading.Event()
+        monkeypatch.setattr(PartitionManager, "ensure_future_partitions",
+                            staticmethod(lambda db, months_ahead=None: created.set() or 0))
+        scheduler = FuturePartitionScheduler(FakeSession, 3600)
+        scheduler.start()
+        try:
+            assert created.wait(5)
+        finally:
+            scheduler.stop()
+    
+    def test_disabled_with_zero_interval(self):
+        scheduler = FuturePartitionScheduler(FakeSession, 0)
+        scheduler.start()
+        assert scheduler._thread is None
@@ -0,0 +1,111 @@
+"""
+Tests du pipeline d'entrée tf.data (choix du cache, cache disque, décodage, temps d'attente)
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+import tensorflow as tf
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.pipeline import (
+    InputStallMonitor, cache_path, choose_cache, directory_images, input_pipeline
+)
+
+@pytest.fixture
+def images(tmp_path):
+    """6 chats noirs et 6 chiens blancs"""
+    data_path = tmp_path / "PetImages"
+    keys = []
+    for folder_name, color in (("Cat", 0), ("Dog", 255)):
+        (data_path / folder_name).mkdir(parents=True)
+        for i in range(6):
+            Image.new("RGB", (40 + i, 30), color=(color,) * 3).save(data_path / folder_name / f"{i}.jpg")
+            keys.append(f"{folder_name}/{i}.jpg")
+    return data_path, keys
+
+def collect(dataset):
+    batches = [(x.numpy(), y.numpy()) for x, y in dataset]
+    return np.concatenate([x for x, _ in batches]), np.concatenate([y for _, y in batches])
+
+
+class TestCacheStrategy:
+    """Tests du choix du cache selon le budget mémoire"""
+
+    def test_auto_uses_memory_within_budget(self):
+        # 20 000 images 128×128 ≈ 938 Mo décodées, + 8192 de buffer de mélange ≈ 1,3 Go
+        assert choose_cache("auto", 20000, (128, 128), ram_budget_mb=2048, shuffle_buffer=8192) == "memory"
+
+    def test_auto_falls_back_to_disk(self):
+        assert choose_cache("auto", 20000, (128, 128), ram_budget_mb=1024, shuffle_buffer=8192) == "disk"
+
+    def test_explicit_strategy_and_validation(self):
+        assert choose_cache("none", 10 ** 9, (128, 128), ram_budget_mb=1) == "none"
+        with pytest.raises(ValueError):
+            choose_cache("ssd", 10, (128, 128), ram_budget_mb=1)
+
+
+class TestPipeline:
+    """Tests des sources et de la fin de chaîne commune"""
+
+    def test_directory_images_decoded_in_parallel(self, images):
+        data_path, keys = images
+        dataset = input_pipeline(directory_images(data_path, keys, (16, 16), deterministic=False), batch_size=5)
+        x, y = collect(dataset)
+        assert x.dtype == np.float32 and x.shape == (12, 16, 16, 3)
+        np.testing.assert_array_equal(x.mean(axis=(1, 2, 3)) > 127, y == 1)
+
+    def test_disk_cache_replays_decoded_images(self, images, tmp_path):
+        data_path, keys = images
+        cache_dir = tmp_path / "tf_cache"
+        cache_dir.mkdir()
+        (cache_dir / "oldversion_directory_train.index").write_text("")
+        (cache_dir / "v1_directory_train_0.lockfile").write_text("")
+
+        cache_file = cache_path(cache_dir, "v1_directory_train")
+        assert sorted(os.listdir(cache_dir)) == []  # Autre version et verrou orphelin supprimés
+        dataset = input_pipeline(directory_images(data_path, keys, (16, 16)), batch_size=4,
+                                 cache="disk", cache_file=cache_file, shuffle_buffer=12, seed=0)
+        first_x, first_y = collect(dataset)
+        assert any(name.startswith("v1_directory_train") for name in os.listdir(cache_dir))
+
+        for key in keys:  # Deuxième epoch servie par le cache, sans relire les fichiers
+            (data_path / key).unlink()
+        second_x, second_y = collect(dataset)
+        assert sorted(second_y) == sorted(first_y)
+        np.testing.assert_array_equal(second_x.mean(axis=(1, 2, 3)) > 127, second_y == 1)
+
+
+class TestStallMonitor:
+    """Tests du temps d'attente du pipeline par epoch"""
+
+    def fit(self, dataset, epochs=2):
+        model = tf.keras.Sequential([tf.keras.Input((4,)), tf.keras.layers.Dense(1)])
+        model.compile(optimizer="sgd", loss="mse")
+        monitor = InputStallMonitor()
+        model.fit(monitor.watch(dataset), epochs=epochs, callbacks=[monitor], verbose=0)
+        return monitor.history
+
+    def test_slow_pipeline_is_reported(self):
+        def slow(x):
+            time.sleep(0.03)
+            return x
+
+        features = tf.data.Dataset.from_tensor_slices(np.ones((8, 4), np.float32))
+        slow_ds = features.map(lambda x: tf.py_function(slow, [x], tf.float32)).map(
+            lambda x: (tf.ensure_shape(x, (4,)), tf.constant(1.0))).batch(1)
+        history = self.fit(slow_ds)
+
+        assert [epoch["epoch"] for epoch in history] == [1, 2]
+        assert all(epoch["steps"] == 8 for epoch in history)
+        assert history[-1]["stall_seconds"] >= 8 * 0.025
+        assert 0 < history[-1]["stall_ratio"] <= 1
+
+    def test_prefetched_pipeline_barely_stalls(self):
+        data = (np.ones((64, 4), np.float32), np.ones(64, np.float32))
+        fast_ds = tf.data.Dataset.from_tensor_slices(data).batch(8).cache().prefetch(tf.data.AUTOTUNE)
+        history = self.fit(fast_ds)
+        assert history[-1]["stall_seconds"] < 0.05
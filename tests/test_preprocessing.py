@@ -0,0 +1,147 @@
+"""
+Tests de la validation incrémentale des images (manifeste, pool de processus, quarantaine)
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.preprocessing import load_manifest, validate_dataset, validate_image
+
+@pytest.fixture
+def dataset(tmp_path):
+    """PetImages miniature : 6 JPEG valides, 1 fichier tronqué, 1 faux JPEG"""
+    data_path = tmp_path / "PetImages"
+    rng = np.random.default_rng(0)
+    for folder_name in ("Cat", "Dog"):
+        (data_path / folder_name).mkdir(parents=True)
+        for i in range(3):
+            pixels = rng.integers(0, 255, (40, 60, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(data_path / folder_name / f"{i}.jpg")
+    (data_path / "Cat" / "broken.jpg").write_bytes((data_path / "Cat" / "0.jpg").read_bytes()[:50])
+    (data_path / "Dog" / "fake.jpg").write_bytes(b"not an image at all")
+    return data_path
+
+@pytest.fixture
+def paths(tmp_path):
+    return {"manifest_path": tmp_path / "manifest.json", "quarantine_dir": tmp_path / "quarantine"}
+
+
+def test_validate_image(dataset):
+    entry = validate_image(dataset / "Cat" / "0.jpg")
+    assert entry["valid"] and (entry["width"], entry["height"]) == (60, 40)
+    assert len(entry["sha256"]) == 64
+    
+    entry = validate_image(dataset / "Dog" / "fake.jpg")
+    assert not entry["valid"] and entry["reason"]
+
+def test_invalid_images_are_quarantined(dataset, paths):
+    summary = validate_dataset(dataset, workers=2, **paths)
+    
+    assert summary == {**summary, "total": 8, "checked": 8, "reused": 0, "quarantined": 2}
+    assert not (dataset / "Dog" / "fake.jpg").exists()
+    assert (paths["quarantine_dir"] / "Dog" / "fake.jpg").exists()
+    assert (paths["quarantine_dir"] / "Cat" / "broken.jpg").exists()
+    
+    manifest = load_manifest(paths["manifest_path"])
+    assert len(manifest["files"]) == 6
+    assert set(manifest["quarantined"]) == {"Cat/broken.jpg", "Dog/fake.jpg"}
+    assert manifest["files"]["Dog/1.jpg"]["valid"] is True
+
+def test_unchanged_files_are_not_rechecked(dataset, paths):
+    validate_dataset(dataset, workers=2, **paths)
+    
+    summary = validate_dataset(dataset, workers=2, **paths)
+    assert (summary["checked"], summary["reused"], summary["quarantined"]) == (0, 6, 0)
+    
+    Image.new("RGB", (10, 10)).save(dataset / "Cat" / "new.jpg")
+    os.utime(dataset / "Dog" / "0.jpg", ns=(0, 0))  # mtime modifié : revérifié
+    summary = validate_dataset(dataset, workers=1, **paths)
+    assert (summary["checked"], summary["reused"]) == (2, 5)
+
+
+@pytest.fixture
+def staging(tmp_path, dataset, monkeypatch):
+    """Source en lecture (RAW_DATA_DIR/PetImages) et répertoire de travail TEMP_DIR"""
+    from src.data import preprocessing
+    raw_dir = dataset.parent
+    work_dir = tmp_path / "work"
+    monkeypatch.setattr(preprocessing, "RAW_DATA_DIR", raw_dir)
+    monkeypatch.setattr(preprocessing, "TEMP_DIR", work_dir)
+    return dataset, work_dir / "PetImages"
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink", "copy"])
+def test_staging_modes(staging, mode):
+    from src.data.preprocessing import setup_data_directory
+    source_path, target_path = staging
+    
+    assert setup_data_directory(mode) == target_path
+    staged = target_path / "Cat" / "0.jpg"
+    assert staged.read_bytes() == (source_path / "Cat" / "0.jpg").read_bytes()
+    assert staged.is_symlink() == (mode == "symlink")
+    assert (staged.stat().st_ino == (source_path / "Cat" / "0.jpg").stat().st_ino) == (mode != "copy")
+
+def test_auto_staging_uses_hardlinks_on_same_filesystem(staging):
+    from src.data.preprocessing import choose_staging_mode
+    source_path, target_path = staging
+    target_path.parent.mkdir(parents=True)
+    assert choose_staging_mode(source_path, target_path.parent) == "hardlink"
+    assert choose_staging_mode(source_path, target_path.parent, "copy") == "copy"
+
+def test_auto_staging_copies_without_statvfs(staging, paths, monkeypatch):
+    """Windows : ni os.statvfs ni liens symboliques sans privilège"""
+    from src.data.preprocessing import choose_staging_mode, setup_data_directory
+    source_path, target_path = staging
+    monkeypatch.delattr(os, "statvfs")
+    assert choose_staging_mode(source_path, target_path.parent) == "copy"
+    assert setup_data_directory("auto", paths["manifest_path"]) == target_path
+    assert not (target_path / "Cat" / "0.jpg").is_symlink()
+
+def test_quarantine_never_touches_source(staging, paths):
+    from src.data.preprocessing import setup_data_directory
+    source_path, target_path = staging
+    
+    setup_data_directory("symlink", paths["manifest_path"])
+    assert validate_dataset(target_path, workers=1, **paths)["quarantined"] == 2
+    assert (source_path / "Dog" / "fake.jpg").exists()
+    
+    # Nouvelle préparation : les fichiers en quarantaine ne sont pas re-préparés
+    setup_data_directory("symlink", paths["manifest_path"])
+    summary = validate_dataset(target_path, workers=1, **paths)
+    assert (summary["checked"], summary["quarantined"]) == (0, 0)
+    assert not (target_path / "Dog" / "fake.jpg").exists()
+
+def test_quarantine_with_hardlinks_across_runs(staging, paths):
+    from src.data.preprocessing import quarantine_file, setup_data_directory
+    source_path, target_path = staging
+    
+    for _ in range(2):
+        setup_data_directory("hardlink", paths["manifest_path"])
+        validate_dataset(target_path, workers=1, **paths)
+        assert not (target_path / "Dog" / "fake.jpg").exists()
+        assert not (target_path / "Cat" / "broken.jpg").exists()
+    assert (paths["quarantine_dir"] / "Dog" / "fake.jpg").exists()
+    assert (source_path / "Dog" / "fake.jpg").exists()
+    
+    # Lien re-préparé vers la copie en quarantaine (même inode) : retiré du répertoire de travail
+    os.link(source_path / "Dog" / "fake.jpg", target_path / "Dog" / "fake.jpg")
+    quarantine_file(target_path / "Dog" / "fake.jpg", target_path, paths["quarantine_dir"])
+    assert not (target_path / "Dog" / "fake.jpg").exists()
+    assert (paths["quarantine_dir"] / "Dog" / "fake.jpg").exists()
+
+def test_changed_quarantined_source_is_staged_again(staging, paths):
+    from src.data.preprocessing import setup_data_directory
+    source_path, target_path = staging
+    
+    setup_data_directory("symlink", paths["manifest_path"])
+    validate_dataset(target_path, workers=1, **paths)
+    Image.new("RGB", (10, 10)).save(source_path / "Dog" / "fake.jpg.tmp", format="JPEG")
+    os.replace(source_path / "Dog" / "fake.jpg.tmp", source_path / "Dog" / "fake.jpg")  # Image corrigée
+    
+    setup_data_directory("symlink", paths["manifest_path"])
+    summary = validate_dataset(target_path, workers=1, **paths)
+    assert (summary["checked"], summary["quarantined"]) == (1, 0)
+    assert (target_path / "Dog" / "fake.jpg").exists()
@@ -0,0 +1,102 @@
+"""
+Tests du profilage par échantillonnage des piles
+"""
+import os
+import re
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.monitoring import profiler
+from src.monitoring.profiler import ContinuousProfiler, StackSampler
+
+COLLAPSED_LINE = re.compile(r"^\S.*;.* \d+$")
+
+def busy_function(stop_event):
+    while not stop_event.is_set():
+        sum(range(1000))
+
+class TestStackSampler:
+    """Tests de l'échantillonneur"""
+    
+    def test_captures_other_threads(self):
+        stop_event = threading.Event()
+        worker = threading.Thread(target=busy_function, args=(stop_event,), name="busy-worker")
+        worker.start()
+        try:
+            sampler = StackSampler(interval_seconds=0.001)
+            sampler.run(0.2)
+        finally:
+            stop_event.set()
+            worker.join()
+        
+        collapsed = sampler.collapsed()
+        assert sampler.samples > 0
+        assert all(COLLAPSED_LINE.match(line) for line in collapsed.splitlines())
+        assert any(line.startswith("busy-worker;") and "busy_function (test_profiler.py" in line
+                   for line in collapsed.splitlines())
+        assert "run (profiler.py" not in collapsed  # Le thread d'échantillonnage est exclu
+    
+    def test_stats_report_overhead(self):
+        sampler = StackSampler(interval_seconds=0.01)
+        sampler.run(0.05)
+        stats = sampler.stats(0.05)
+        assert stats["samples"] > 0
+        assert 0 <= stats["overhead"] < 1
+
+class TestProfile:
+    """Tests de la capture à la demande"""
+    
+    def test_single_capture_at_a_time(self):
+        assert profiler._profile_lock.acquire(blocking=False)
+        try:
+            assert profiler.profile(0.01) is None
+        finally:
+            profiler._profile_lock.release()
+        
+        stop_event = threading.Event()
+        worker = threading.Thread(target=busy_function, args=(stop_event,))
+        worker.start()
+        try:
+            collapsed, stats = profiler.profile(0.05, interval_ms=5)
+        finally:
+            stop_event.set()
+            worker.join()
+        assert stats["samples"] > 0
+        assert "busy_function" in collapsed
+
+class TestContinuousProfiler:
+    """Tests du mode continu"""
+    
+    def test_flush_rotates_files(self, tmp_path):
+        continuous = ContinuousProfiler(tmp_path, interval_ms=1, window_seconds=0.01, keep=2)
+        for second in range(3):
+            continuous.sampler.sample_once()
+            path = continuous.flush()
+            os.rename(path, tmp_path / f"profile-20260101-00000{second}-{os.getpid()}.collapsed")
+        
+        continuous.sampler.sample_once()
+        continuous.flush()
+        files = sorted(p.name for p in tmp_path.glob("profile-*.collapsed"))
+        assert len(files) == 2
+        assert f"profile-20260101-000000-{os.getpid()}.collapsed" not in files
+        assert not list(tmp_path.glob("*.tmp"))
+    
+    def test_rotation_keeps_other_workers_files(self, tmp_path):
+        """keep s'applique par worker : les profils des autres pid ne sont pas supprimés"""
+        other_workers = [tmp_path / f"profile-20260101-00000{second}-1.collapsed" for second in range(3)]
+        for path in other_workers:
+            path.write_text("main 1\n", encoding="utf-8")
+        continuous = ContinuousProfiler(tmp_path, interval_ms=1, window_seconds=0.01, keep=1)
+        continuous.sampler.sample_once()
+        continuous.flush()
+        assert all(path.exists() for path in other_workers)
+        assert len(list(tmp_path.glob(f"profile-*-{os.getpid()}.collapsed"))) == 1
+    
+    def test_start_and_stop(self, tmp_path):
+        continuous = ContinuousProfiler(tmp_path, interval_ms=1, window_seconds=0.02, keep=5)
+        continuous.start()
+        time.sleep(0.1)
+        continuous.stop()
+        assert list(tmp_path.glob("profile-*.collapsed"))
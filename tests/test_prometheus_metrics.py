@@ -74,4 +74,65 @@ class TestDockerHealth:
         """L'app démarre même si Prometheus désactivé"""
         os.environ['ENABLE_PROMETHEUS'] = 'false'
         response = client.get("/health")
-        assert response.status_code == 200
\ No newline at end of file
+        assert response.status_code == 200
+
+
+class TestDatabasePoolMetrics:
+    """Tests des métriques du pool de connexions"""
+    
+    @pytest.fixture
+    def pool_engine(self, tmp_path):
+        from sqlalchemy import create_engine
+        from src.database.db_connector import InstrumentedQueuePool
+        from src.monitoring.prometheus_metrics import instrument_db_pool
+        
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_logging_name="test_pool",
+            pool_size=1,
+            max_overflow=1,
+            pool_timeout=0.1
+        )
+        instrument_db_pool(engine, "test_pool")
+        yield engine
+        engine.dispose()
+    
+    @staticmethod
+    def sample(name, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, {"pool": "test_pool", **labels}) or 0
+    
+    def test_checked_out_and_overflow(self, pool_engine):
+        """Les connexions utilisées et le débordement sont lus au scrape"""
+        overflow_before = self.sample("cv_db_pool_overflow_connections_total")
+        first = pool_engine.connect()
+        second = pool_engine.connect()
+        assert self.sample("cv_db_pool_checked_out") == 2
+        assert self.sample("cv_db_pool_overflow") == 1
+        assert self.sample("cv_db_pool_overflow_connections_total") == overflow_before + 1
+        first.close()
+        second.close()
+        assert self.sample("cv_db_pool_checked_out") == 0
+    
+    def test_wait_and_timeout(self, pool_engine):
+        """Chaque obtention de connexion est mesurée, un pool saturé compte un timeout"""
+        from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+        
+        waits_before = self.sample("cv_db_pool_wait_seconds_count")
+        timeouts_before = self.sample("cv_db_pool_timeouts_total")
+        connections = [pool_engine.connect(), pool_engine.connect()]
+        with pytest.raises(PoolTimeoutError):
+            pool_engine.connect()
+        for connection in connections:
+            connection.close()
+        
+        assert self.sample("cv_db_pool_wait_seconds_count") == waits_before + 3
+        assert self.sample("cv_db_pool_timeouts_total") == timeouts_before + 1
+    
+    def test_invalidation(self, pool_engine):
+        """Une connexion invalidée est comptée"""
+        before = self.sample("cv_db_pool_invalidations_total", kind="hard")
+        with pool_engine.connect() as connection:
+            connection.invalidate()
+        assert self.sample("cv_db_pool_invalidations_total", kind="hard") == before + 1
@@ -0,0 +1,110 @@
+"""
+Tests des métriques Prometheus en mode multiprocess (plusieurs workers uvicorn)
+Chaque worker est un sous-processus qui écrit dans un dossier mmap temporaire
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from prometheus_client import CollectorRegistry
+from prometheus_client.multiprocess import MultiProcessCollector
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+WORKER_CODE = """
+import sys
+sys.path.insert(0, {root!r})
+from src.monitoring.prometheus_metrics import (
+    MULTIPROCESS, bind_gauge, db_pool_checked_out, gauge_refresher, track_feedback, update_db_status
+)
+assert MULTIPROCESS
+for _ in range({feedbacks}):
+    track_feedback("positive")
+update_db_status({connected})
+bind_gauge(db_pool_checked_out.labels(pool="primary"), lambda: {checked_out})
+gauge_refresher.refresh()
+print("ready", flush=True)
+sys.stdin.readline()  # Le worker reste vivant jusqu'à la fermeture de stdin
+"""
+
+
+def start_worker(multiproc_dir, feedbacks, connected=True, checked_out=2):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir)}
+    code = WORKER_CODE.format(root=str(ROOT_DIR), feedbacks=feedbacks,
+                              connected=connected, checked_out=checked_out)
+    worker = subprocess.Popen([sys.executable, "-c", code], env=env, text=True,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    assert worker.stdout.readline().strip() == "ready"
+    return worker
+
+
+def stop_worker(worker):
+    worker.stdin.close()
+    worker.wait(timeout=30)
+
+
+def collect(multiproc_dir, name, labels=None):
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=str(multiproc_dir))
+    return registry.get_sample_value(name, labels or {})
+
+
+@pytest.fixture
+def workers(tmp_path):
+    started = []
+    yield tmp_path, started
+    for worker in started:
+        if worker.poll() is None:
+            stop_worker(worker)
+
+
+class TestMultiprocessMetrics:
+    """Agrégation des métriques de plusieurs workers"""
+
+    def test_counters_are_summed_across_workers(self, workers):
+        multiproc_dir, started = workers
+        started += [start_worker(multiproc_dir, feedbacks) for feedbacks in (3, 5, 7)]
+
+        assert collect(multiproc_dir, "cv_user_feedback_total", {"feedback_type": "positive"}) == 15
+
+    def test_live_gauges_follow_worker_modes(self, workers):
+        multiproc_dir, started = workers
+        started.append(start_worker(multiproc_dir, 1, connected=True, checked_out=2))
+        started.append(start_worker(multiproc_dir, 1, connected=False, checked_out=3))
+
+        assert collect(multiproc_dir, "cv_db_pool_checked_out", {"pool": "primary"}) == 5  # livesum
+        assert collect(multiproc_dir, "cv_database_connected") == 0  # livemin
+
+    def test_dead_worker_cleanup_keeps_counters(self, workers):
+        from src.monitoring.prometheus_metrics import cleanup_dead_workers
+
+        multiproc_dir, started = workers
+        started += [start_worker(multiproc_dir, 4), start_worker(multiproc_dir, 6)]
+        stop_worker(started[0])
+
+        assert cleanup_dead_workers(multiproc_dir) == [started[0].pid]
+        assert cleanup_dead_workers(multiproc_dir) == []
+        assert collect(multiproc_dir, "cv_db_pool_checked_out", {"pool": "primary"}) == 2
+        assert collect(multiproc_dir, "cv_user_feedback_total", {"feedback_type": "positive"}) == 10
+
+
+class TestDiscordDeliveryMetrics:
+    """Les issues de livraison Discord alimentent un Counter (compatible multiprocess)"""
+
+    def test_observer_counts_outcomes(self):
+        from prometheus_client import REGISTRY
+        from src.monitoring.discord_notifier import DiscordNotifier
+        from src.monitoring.prometheus_metrics import track_discord_delivery
+
+        notifier = DiscordNotifier(webhook_url="http://127.0.0.1:9/unused", config={"coalesce_seconds": 60})
+        notifier.observers.append(track_discord_delivery)
+        before = REGISTRY.get_sample_value("cv_discord_alerts_total", {"outcome": "coalesced"}) or 0
+
+        notifier._last_sent["test"] = notifier._clock()
+        assert notifier.send_alert("Test", "message", key="test") is False
+
+        assert REGISTRY.get_sample_value("cv_discord_alerts_total", {"outcome": "coalesced"}) == before + 1
+        assert notifier.stats["coalesced"] == 1
@@ -0,0 +1,145 @@
+"""
+Tests de l'instrumentation des requêtes SQL (empreintes, appelant, journal des requêtes lentes)
+Base SQLite locale en remplacement de PostgreSQL
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.database import query_monitor
+from src.database.query_monitor import (
+    QUERY_OBSERVERS, SlowQueryLog, fingerprint, instrument_engine, normalize_statement, track_queries
+)
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    return engine
+
+@pytest.fixture
+def observed():
+    """Requêtes observées : liste de (empreinte, appelant, secondes)"""
+    calls = []
+    observer = lambda *args: calls.append(args)
+    QUERY_OBSERVERS.append(observer)
+    yield calls
+    QUERY_OBSERVERS.remove(observer)
+
+@track_queries
+class SampleService:
+    @staticmethod
+    def count(connection):
+        return connection.execute(text("SELECT 1")).scalar()
+    
+    @staticmethod
+    def iter_values(connection):
+        for value in (1, 2):
+            yield connection.execute(text(f"SELECT {value}")).scalar()
+
+class TestFingerprint:
+    """Tests de la normalisation des requêtes"""
+    
+    def test_literals_and_parameters_are_normalized(self):
+        a = "SELECT * FROM predictions_feedback WHERE id = 12 AND filename = 'chat.jpg'"
+        b = "SELECT *   FROM predictions_feedback WHERE id = %(id_1)s AND filename = %(filename_1)s"
+        assert normalize_statement(a) == normalize_statement(b)
+        assert fingerprint(a) == fingerprint(b)
+    
+    def test_in_lists_are_collapsed(self):
+        assert fingerprint("SELECT id FROM t WHERE id IN (1, 2, 3)") == fingerprint("SELECT id FROM t WHERE id IN (4)")
+    
+    def test_fingerprint_names_verb_and_table(self):
+        assert fingerprint("INSERT INTO predictions_feedback (id) VALUES (%s)").startswith("INSERT predictions_feedback ")
+
+class TestQueryInstrumentation:
+    """Tests des événements SQLAlchemy"""
+    
+    def test_caller_is_service_method(self, engine, observed):
+        with engine.connect() as connection:
+            assert SampleService.count(connection) == 1
+            connection.execute(text("SELECT 2"))
+        assert [call[1] for call in observed] == ["SampleService.count", "unknown"]
+        assert all(call[2] >= 0 for call in observed)
+    
+    def test_generator_caller(self, engine, observed):
+        with engine.connect() as connection:
+            assert list(SampleService.iter_values(connection)) == [1, 2]
+        assert [call[1] for call in observed] == ["SampleService.iter_values"] * 2
+    
+    def test_slow_queries_are_logged(self, engine, monkeypatch):
+        log = SlowQueryLog(maxlen=2)
+        monkeypatch.setattr(query_monitor, "slow_query_log", log)
+        monkeypatch.setitem(query_monitor.QUERY_MONITOR_CONFIG, "slow_query_ms", 0)
+        
+        with engine.connect() as connection:
+            for value in range(3):
+                connection.execute(text("SELECT :value"), {"value": value})
+        
+        entries = log.entries()
+        assert len(entries) == 2  # Journal borné
+        assert entries[0]["statement"] == "SELECT ?"  # Aucun paramètre conservé
+        assert entries[0]["explain"] is None  # EXPLAIN réservé à PostgreSQL
+    
+    def test_fast_queries_are_not_logged(self, engine, monkeypatch):
+        log = SlowQueryLog(maxlen=10)
+        monkeypatch.setattr(query_monitor, "slow_query_log", log)
+        monkeypatch.setitem(query_monitor.QUERY_MONITOR_CONFIG, "slow_query_ms", 60_000)
+        
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        assert log.entries() == []
+
+class TestExplainSampling:
+    """Tests de l'échantillonnage d'EXPLAIN ANALYZE"""
+    
+    class FakeConnection:
+        """Connexion DBAPI qui enregistre les commandes ; l'EXPLAIN échoue"""
+        
+        def __init__(self, autocommit=False):
+            self.autocommit = autocommit
+            self.executed = []
+        
+        def cursor(self):
+            connection = self
+            
+            class Cursor:
+                def execute(self, statement, parameters=None):
+                    connection.executed.append(statement.split(" (")[0])
+                    if statement.startswith("EXPLAIN"):
+                        raise RuntimeError("canceling statement due to statement timeout")
+                
+                def close(self):
+                    pass
+            
+            return Cursor()
+    
+    @pytest.mark.parametrize("autocommit, expected", [
+        (False, ["SAVEPOINT query_monitor_explain", "EXPLAIN", "ROLLBACK TO SAVEPOINT query_monitor_explain",
+                 "RELEASE SAVEPOINT query_monitor_explain"]),
+        (True, ["BEGIN", "EXPLAIN", "ROLLBACK"]),
+    ])
+    def test_explain_is_always_rolled_back(self, autocommit, expected):
+        """Un EXPLAIN en échec est annulé sans interrompre la transaction de l'appelant"""
+        connection = self.FakeConnection(autocommit)
+        cursor = type("Cursor", (), {"connection": connection})()
+        explain = query_monitor._explain_analyze(cursor, "SELECT 1", {})
+        assert explain.startswith("EXPLAIN indisponible")
+        assert connection.executed == expected
+    
+    def test_only_plain_selects_are_sampled(self, engine, monkeypatch):
+        """Une CTE peut modifier des données : jamais ré-exécutée"""
+        sampled = []
+        monkeypatch.setattr(query_monitor, "_explain_analyze", lambda cursor, statement, parameters: sampled.append(statement))
+        monkeypatch.setattr(query_monitor, "slow_query_log", SlowQueryLog(maxlen=10))
+        monkeypatch.setitem(query_monitor.QUERY_MONITOR_CONFIG, "slow_query_ms", 0)
+        monkeypatch.setitem(query_monitor.QUERY_MONITOR_CONFIG, "explain_sample_rate", 1)
+        monkeypatch.setattr(engine.dialect, "name", "postgresql")
+        
+        with engine.connect() as connection:
+            connection.execute(text("WITH n AS (SELECT 1 AS v) SELECT v FROM n"))
+            connection.execute(text("SELECT 2"))
+        assert sampled == ["SELECT 2"]
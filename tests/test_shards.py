@@ -0,0 +1,66 @@
+"""
+Tests des shards prétraités (version du contenu, reconstruction, pipeline tf.data)
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.preprocessing import validate_dataset
+from src.data.shards import build_shards, load_sharded_dataset
+
+@pytest.fixture
+def dataset(tmp_path):
+    """10 chats noirs et 10 chiens blancs de tailles variées"""
+    data_path = tmp_path / "PetImages"
+    for folder_name, color in (("Cat", 0), ("Dog", 255)):
+        (data_path / folder_name).mkdir(parents=True)
+        for i in range(10):
+            Image.new("RGB", (60 + i, 40), color=(color,) * 3).save(data_path / folder_name / f"{i}.jpg")
+    manifest_path = tmp_path / "manifest.json"
+    validate_dataset(data_path, manifest_path=manifest_path, quarantine_dir=tmp_path / "quarantine", workers=1)
+    return data_path, manifest_path, tmp_path / "shards"
+
+def build(dataset, **kwargs):
+    data_path, manifest_path, shards_dir = dataset
+    options = {"image_size": (32, 32), "shard_size": 4, "workers": 1, "validation_split": 0.2, "seed": 1}
+    options.update(kwargs)
+    return build_shards(data_path, manifest_path=manifest_path, shards_dir=shards_dir, **options)
+
+
+def test_shards_are_content_versioned(dataset):
+    index_path = build(dataset)
+    built_at = index_path.stat().st_mtime_ns
+    
+    assert build(dataset) == index_path  # Contenu inchangé : pas de reconstruction
+    assert index_path.stat().st_mtime_ns == built_at
+    
+    new_index_path = build(dataset, image_size=(16, 16))
+    assert new_index_path != index_path
+    assert not index_path.parent.exists()  # Ancienne version supprimée
+
+def test_splits_and_shard_files(dataset):
+    index_path = build(dataset)
+    shard_dir = index_path.parent
+    index = json.loads(index_path.read_text())
+    
+    counts = {split: sum(shard["count"] for shard in shards) for split, shards in index["splits"].items()}
+    assert counts == {"train": 16, "validation": 4}
+    images = np.load(shard_dir / index["splits"]["train"][0]["images"], mmap_mode="r")
+    assert images.shape == (4, 32, 32, 3) and images.dtype == np.uint8
+
+def test_pipeline_yields_labelled_batches(dataset):
+    index_path = build(dataset)
+    train_ds = load_sharded_dataset(index_path, "train", batch_size=5, shuffle=True, seed=0, parallel_shards=2)
+    
+    seen = 0
+    for images, labels in train_ds:
+        assert images.dtype.name == "float32" and images.shape[1:] == (32, 32, 3)
+        means = images.numpy().mean(axis=(1, 2, 3))
+        np.testing.assert_array_equal(means > 127, labels.numpy() == 1)  # Chiens blancs, chats noirs
+        seen += int(images.shape[0])
+    assert seen == 16
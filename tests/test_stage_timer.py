@@ -0,0 +1,82 @@
+"""
+Tests du chronométrage par étape (StageTimer, en-tête Server-Timing)
+"""
+import io
+import os
+import re
+import sys
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.utils.stage_timer import RequestStartMiddleware, StageTimer
+
+SERVER_TIMING = re.compile(r"^\w+;dur=\d+\.\d(, \w+;dur=\d+\.\d)*$")
+
+class TestStageTimer:
+    """Tests du timer"""
+    
+    def test_stages_are_ordered_and_cumulated(self):
+        timer = StageTimer()
+        with timer.stage("decode"):
+            pass
+        with timer.stage("resize"):
+            pass
+        with timer.stage("decode"):
+            pass
+        timer.record("receive", 0.5)
+        
+        assert list(timer.durations) == ["decode", "resize", "receive"]
+        assert timer.durations["receive"] == 0.5
+    
+    def test_stage_is_recorded_on_error(self):
+        timer = StageTimer()
+        with pytest.raises(ValueError):
+            with timer.stage("inference"):
+                raise ValueError("échec")
+        assert "inference" in timer.durations
+    
+    def test_server_timing_header(self):
+        timer = StageTimer()
+        timer.record("db", 0.0123)
+        header = timer.server_timing()
+        
+        assert SERVER_TIMING.match(header)
+        assert header.startswith("db;dur=12.3, total;dur=")
+
+class TestRequestStartMiddleware:
+    """Tests de l'horodatage des requêtes"""
+    
+    def test_start_time_is_set_before_endpoint(self):
+        app = FastAPI()
+        app.add_middleware(RequestStartMiddleware)
+        
+        @app.get("/timed")
+        async def timed(request: Request):
+            timer = StageTimer(start=request.state.start_time)
+            timer.record("receive", timer.elapsed())
+            return {"receive": timer.durations["receive"]}
+        
+        response = TestClient(app).get("/timed")
+        assert response.status_code == 200
+        assert response.json()["receive"] >= 0
+
+class TestPredictorStages:
+    """Tests des étapes du prétraitement"""
+    
+    def test_preprocess_records_decode_and_resize(self):
+        from src.models.predictor import CatDogPredictor
+        
+        predictor = CatDogPredictor.__new__(CatDogPredictor)  # Sans chargement du modèle
+        predictor.image_size = (64, 64)
+        buffer = io.BytesIO()
+        Image.new("L", (120, 80)).save(buffer, format="PNG")
+        
+        timer = StageTimer()
+        array = predictor.preprocess_image(buffer.getvalue(), timer)
+        
+        assert array.shape == (1, 64, 64, 3)
+        assert list(timer.durations) == ["decode", "resize"]
@@ -0,0 +1,52 @@
+"""
+Tests du mode d'entraînement (précision mixte, compilation XLA, export float32)
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.settings import MODEL_CONFIG
+from src.models.trainer import CatDogTrainer
+
+@pytest.fixture
+def trainer():
+    trainer = CatDogTrainer()
+    trainer.config = {**MODEL_CONFIG, "image_size": (32, 32)}
+    return trainer
+
+@pytest.fixture
+def batch():
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 255, (8, 32, 32, 3)).astype(np.float32), rng.integers(0, 2, 8).astype(np.int32)
+
+
+def test_mixed_precision_keeps_sigmoid_in_float32(trainer, batch):
+    model = trainer.create_model(precision="mixed_bfloat16", jit_compile=False)
+    assert model.get_layer("conv_1").compute_dtype == "bfloat16"
+    assert model.get_layer("conv_1").kernel.dtype == "float32"  # Poids maîtres en float32
+    assert model.get_layer("score").compute_dtype == "float32"
+    assert model(batch[0]).dtype == tf.float32
+
+def test_export_is_float32_with_same_weights(trainer, batch):
+    model = trainer.create_model(precision="mixed_bfloat16", jit_compile=False)
+    model.fit(*batch, epochs=1, verbose=0)
+    exported = trainer.export_model(model)
+
+    assert {layer.dtype_policy.name for layer in exported.layers if layer.weights} == {"float32"}
+    np.testing.assert_array_equal(exported.get_layer("conv_2").get_weights()[0],
+                                  model.get_layer("conv_2").get_weights()[0])
+    np.testing.assert_allclose(exported.predict(batch[0], verbose=0), model.predict(batch[0], verbose=0), atol=0.02)
+
+def test_xla_training_with_augmentation_in_pipeline(trainer, batch):
+    model = trainer.create_model(precision="float32", jit_compile=True, augmentation=False)
+    assert model.jit_compile
+    assert "data_augmentation" not in [layer.name for layer in model.layers]
+
+    dataset = trainer.augment_dataset(tf.data.Dataset.from_tensor_slices(batch).batch(4))
+    history = model.fit(dataset, epochs=1, verbose=0)
+    assert model.jit_compile  # Keras repasse à False si le modèle n'est pas compilable
+    assert np.isfinite(history.history["loss"][0])
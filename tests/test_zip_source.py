@@ -0,0 +1,88 @@
+"""
+Tests de la lecture des images directement dans l'archive zip (index, validation, shards, tf.data)
+"""
+import io
+import os
+import pickle
+import sys
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.data.preprocessing import validate_dataset
+from src.data.shards import build_shards, load_sharded_dataset
+from src.data.zip_source import ZipImageArchive, archive_dataset
+from src.monitoring.image_stats import reference_from_directory
+
+def jpeg_bytes(size, color):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color=(color,) * 3).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+@pytest.fixture
+def archive(tmp_path):
+    """Archive au format Kaggle : 6 chats noirs, 6 chiens blancs, 1 fichier corrompu"""
+    zip_path = tmp_path / "kagglecatsanddogs.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("PetImages/", "")
+        zf.writestr("readme.txt", "licence")
+        for folder_name, color in (("Cat", 0), ("Dog", 255)):
+            for i in range(6):
+                zf.writestr(f"PetImages/{folder_name}/{i}.jpg", jpeg_bytes((50 + i, 40), color))
+        zf.writestr("PetImages/Dog/666.jpg", b"pas une image")
+    return ZipImageArchive(zip_path)
+
+
+def test_index_is_cached_next_to_archive(archive):
+    keys = archive.keys()
+    assert len(keys) == 13 and keys[0] == "Cat/0.jpg"
+    assert archive.index_path.exists()
+
+    reopened = ZipImageArchive(archive.zip_path)
+    reopened._zip = None  # L'index en cache suffit : le répertoire central n'est pas relu
+    assert reopened.index() == archive.index()
+
+def test_archive_is_picklable_for_process_pools(archive):
+    copy = pickle.loads(pickle.dumps(archive))
+    assert copy.read("Cat/0.jpg") == archive.read("Cat/0.jpg")
+
+def test_validation_reads_the_archive(archive, tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    quarantine_dir = tmp_path / "quarantine"
+    summary = validate_dataset(archive, manifest_path=manifest_path, quarantine_dir=quarantine_dir, workers=2)
+    assert (summary["total"], summary["checked"], summary["quarantined"]) == (13, 13, 0)
+    assert not quarantine_dir.exists()  # Archive jamais modifiée
+
+    again = validate_dataset(archive, manifest_path=manifest_path, quarantine_dir=quarantine_dir, workers=2)
+    assert (again["checked"], again["reused"]) == (0, 13)  # Empreinte taille + CRC inchangée
+
+def test_shards_built_from_archive(archive, tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    validate_dataset(archive, manifest_path=manifest_path, quarantine_dir=tmp_path / "q", workers=1)
+    index_path = build_shards(archive, manifest_path=manifest_path, image_size=(16, 16),
+                              shards_dir=tmp_path / "shards", workers=2, validation_split=0.25)
+
+    images, labels = zip(*[(x.numpy(), y.numpy()) for x, y in load_sharded_dataset(index_path, "train", 32)])
+    images, labels = np.concatenate(images), np.concatenate(labels)
+    assert len(labels) == 9  # 12 images valides, 3 en validation
+    assert np.all(images[labels == 0] < 10) and np.all(images[labels == 1] > 245)
+
+def test_archive_dataset_batches(archive):
+    keys = [key for key in archive.keys() if key != "Dog/666.jpg"]
+    dataset = archive_dataset(archive, keys, (16, 16), batch_size=5, shuffle=True, workers=2)
+
+    for _ in range(2):  # Deux epochs : le générateur est relancé
+        batches = list(dataset)
+        assert [int(x.shape[0]) for x, _ in batches] == [5, 5, 2]
+        images = np.concatenate([x.numpy() for x, _ in batches])
+        labels = np.concatenate([y.numpy() for _, y in batches])
+        assert images.dtype == np.float32 and images.shape[1:] == (16, 16, 3)
+        assert sorted(labels) == [0] * 6 + [1] * 6
+        assert np.all(images[labels == 0] < 10)
+
+def test_image_reference_from_archive(archive):
+    reference = reference_from_directory(archive, (16, 16), sample_size=20)
+    assert sum(reference["brightness"]["counts"]) == 12  # Fichier corrompu ignoré